@@ -1,26 +1,80 @@
 from flask import Flask, request, jsonify
 import joblib
-import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from flask_cors import CORS
 import requests
 import geohash  # pip install python-geohash
 import mysql.connector
+import atexit
+import base64
+import hmac
 import json
+import logging
+import os
+import queue
+import secrets
+import time
 from mysql.connector import Error
-import bcrypt
 import jwt
+from contextlib import contextmanager
 from functools import wraps
+from db_pool import ConnectionPool, PoolTimeout
+from flat_forest import FlatForest
+import model_artifact
+import route
+from traffic_grid import GridSpec, GridStore, render_tile
+from favorites_forecast import FavoritesForecaster
+from password_pool import PasswordPool, PasswordPoolBusy
+from token_cache import TokenCache, TokenRevoked
+from model_registry import ModelBundle, ModelRegistry, file_signature
+from prediction_cache import PredictionCache
+from gazetteer import Gazetteer
+from history_writer import HistoryWriter
+import history_pages
+import migrations
+from inference import ScalerParams, feature_row, parse_datetime, parse_step, time_slots
+from logging_setup import DUMP_LOGGER_NAME, get_logger, setup_logging
+from geocode_cache import GeocodeCache
+from prediction_table import PredictionTable, file_hash
 
 app = Flask(__name__)
 CORS(app)
 
+# Loglama ayarları (DEBUG seviyesinde istek verisi ve özellikler de yazılır)
+LOG_LEVEL = "INFO"
+LOG_JSON = True
+DEBUG_DUMP_SAMPLE_RATE = 0.01  # Pahalı özellik dökümlerinin yazılma oranı
+
 # Google Geocoding API anahtarınızı buraya ekleyin
 GOOGLE_API_KEY = "google-key"
+GOOGLE_GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
 
 # JWT secret key (production'da güvenli bir key kullanın)
 JWT_SECRET_KEY = "CrowdPredictor_2024_Secret_Key_MySuperSecretKey12345"
 
+# Erişim token'ı kısa ömürlü; arayüz 401 alınca /token/refresh ile yeniler (traffic-map/src/api.js)
+ACCESS_TOKEN_TTL = timedelta(minutes=15)
+REFRESH_TOKEN_TTL = timedelta(days=30)
+TOKEN_CACHE_SIZE = 10000  # Doğrulanmış erişim token'ları (özet -> user_id, exp); 0: kapalı
+
+# Şifre hash'leme (bcrypt) ayrı süreçlerde yapılır; havuz doluysa /register ve /login 503 döner
+BCRYPT_ROUNDS = 12  # Daha düşük maliyetli eski hash'ler başarılı girişte yeniden hash'lenir
+PASSWORD_WORKERS = 2  # 0: istek thread'inde hash'le
+PASSWORD_MAX_PENDING = 16  # Çalışanlara ek olarak bekleyebilecek iş sayısı
+PASSWORD_TIMEOUT = 10
+PASSWORD_WORKER_NICE = 5  # Worker süreçleri /predict'ten düşük öncelikli
+
+# Şifre worker'ları modül yüklenirken, loglama dinleyicisi ve diğer thread'ler başlamadan fork edilir
+password_pool = PasswordPool(PASSWORD_WORKERS, PASSWORD_MAX_PENDING, rounds=BCRYPT_ROUNDS,
+                             timeout=PASSWORD_TIMEOUT, nice=PASSWORD_WORKER_NICE)
+password_pool.start()
+atexit.register(password_pool.shutdown)
+
+setup_logging(LOG_LEVEL, json_output=LOG_JSON, dump_sample_rate=DEBUG_DUMP_SAMPLE_RATE)
+logger = get_logger()
+dump_logger = logging.getLogger(DUMP_LOGGER_NAME)
+
 # MySQL bağlantı bilgileri
 MYSQL_CONFIG = {
     'host': 'localhost',
@@ -29,132 +83,267 @@ MYSQL_CONFIG = {
     'database': 'traffic_predictor'
 }
 
-# Global değişkenler
-model = None
-scaler = None
+# Model dosyaları (uygulamanın çalıştırıldığı dizine göre)
+MODEL_PATH = "trafik_model.pkl"
+SCALER_PATH = "scaler.pkl"
+PREDICTION_TABLE_PATH = "trafik_model.table.npz"
+
+# RandomForest'ı düz dizi değerlendiricisine derle (sklearn'ün çağrı başı yükü olmadan)
+USE_FLAT_FOREST = True
+
+# Worker'lar arasında paylaşılan mmap model paketi (yoksa pkl'den üretilir)
+USE_MODEL_ARTIFACT = True
+MODEL_ARTIFACT_DIR = "trafik_model.artifact"
+MODEL_ARTIFACT_VERIFY_CHECKSUMS = False  # True: açılışta tüm dosyaların SHA-256'sı kontrol edilir
+
+# Çalışırken model değiştirme: dosyalar bu aralıkla (sn) kontrol edilir, 0 ise
+# sadece /admin/reload-model ile yeniden yüklenir
+MODEL_WATCH_INTERVAL = 5.0
+MODEL_WARMUP_ROUNDS = 5  # Yeni sürüm etkinleşmeden önceki ısınma tahmini sayısı
+MODEL_WARMUP_ROWS = 16
+
+# Tahmin sonucu önbelleği: (model sürümü, 9 özellik) -> (seviye, traffic_info); 0 ise kapalı
+PREDICTION_CACHE_SIZE = 20000
+
+# Yönetim endpoint'leri için anahtar (production'da değiştirin, X-Admin-Key başlığıyla gönderilir)
+ADMIN_API_KEY = "CrowdPredictor_2024_Admin_Key_ChangeMe"
+
+# Modelin eğitimde gördüğü özellik sırası
+FEATURE_NAMES = [
+    "hour", "day_of_week", "is_weekend", "month",
+    "MINIMUM_SPEED", "MAXIMUM_SPEED", "NUMBER_OF_VEHICLES",
+    "LATITUDE", "LONGITUDE"
+]
+
+# /predict/batch için tek istekte kabul edilen en fazla kayıt
+MAX_BATCH_SIZE = 1000
+
+# /predict/profile: varsayılan aralık ve adım, en fazla dilim sayısı (7 gün x 5 dakika)
+PROFILE_DEFAULT_HOURS = 24
+PROFILE_DEFAULT_STEP = "15m"
+PROFILE_TRIP_MINUTES = 60  # En iyi çıkış penceresinin varsayılan uzunluğu
+MAX_PROFILE_SLOTS = 7 * 24 * 12
+
+# /predict/route: rota bu uzunluğu aşmayan parçalara bölünür, parçalar orta
+# noktalarının geohash hücresine göre gruplanıp hücre başına bir kez skorlanır
+ROUTE_MAX_SEGMENT_KM = 0.25
+ROUTE_GEOHASH_PRECISION = 6  # ~1.2 km x 0.6 km
+MAX_ROUTE_POINTS = 5000
+ROUTE_CACHE_SIZE = 50000  # (model sürümü, hücre özellik satırı) -> olasılıklar
+
+# Şehir geneli trafik ızgarası (/grid): eğitim verisinin kapsadığı alan (eğitim
+# betiği "Koordinat aralığı" olarak yazdırır; veri değişirse güncellenmeli)
+GRID_BOUNDS = (40.80, 41.35, 28.45, 29.45)  # (min_lat, max_lat, min_lng, max_lng)
+GRID_PRECISION = 6  # ~1.2 km x 0.6 km, 101 x 92 hücre
+GRID_HOURS_AHEAD = 24  # Önceden hesaplanan saat sayısı
+GRID_REFRESH_INTERVAL = 300
+GRID_MIN_ZOOM = 8
+GRID_MAX_ZOOM = 16
+GRID_CACHE_CONTROL = "public, max-age=300"
+TILE_CACHE_SIZE = 4096
+
+# Favori başlangıç noktaları için önceden hesaplanan saatlik tahminler (/favorites/forecast)
+FAVORITES_FORECAST_HOURS = 6  # İçinde bulunulan saat dahil
+FAVORITES_FORECAST_INTERVAL = 300  # Saat dönünce ayrıca beklemeden yenilenir
+
+# İstanbul'daki popüler lokasyonlar için sabit koordinatlar
+LOCATION_COORDS = {
+    "maltepe": (40.9333, 29.1333),
+    "kadıköy": (40.9917, 29.0270),
+    "üsküdar": (41.0214, 29.0161),
+    "beşiktaş": (41.0422, 29.0061),
+    "şişli": (41.0602, 28.9887),
+    "beyoğlu": (41.0370, 28.9857),
+    "fatih": (41.0186, 28.9647),
+    "bakırköy": (40.9744, 28.8719),
+    "zeytinburnu": (41.0058, 28.9019),
+    "pendik": (40.8783, 29.2333),
+    "kartal": (40.9061, 29.1856),
+    "ataşehir": (40.9833, 29.1167),
+    "levent": (41.0814, 29.0092),
+    "maslak": (41.1086, 29.0219),
+    "taksim": (41.0370, 28.9857),
+    "sultanahmet": (41.0058, 28.9769),
+    "eminönü": (41.0186, 28.9647)
+}
+
+# Adres çözülemezse kullanılan konum (Kadıköy)
+DEFAULT_LOCATION = (40.9917, 29.0270)
+
+# İsteğe bağlı yer adı dosyası (name,lat,lng); varsa sabit lokasyonlara eklenir
+GAZETTEER_PATH = "istanbul_gazetteer.csv"
+
+# Geocoding önbelleği ayarları (süreler saniye cinsinden)
+GEOCODE_CACHE_PATH = "geocode_cache.sqlite3"
+GEOCODE_CACHE_SIZE = 4096
+GEOCODE_CACHE_TTL = 30 * 24 * 3600
+GEOCODE_NEGATIVE_TTL = 24 * 3600
+
+# Bağlantı havuzu ayarları (recycle ve timeout saniye cinsinden)
+DB_POOL_SIZE = 5
+DB_POOL_MAX_OVERFLOW = 10
+DB_POOL_RECYCLE = 3600
+DB_POOL_TIMEOUT = 10
+
+db_pool = ConnectionPool(
+    lambda: mysql.connector.connect(**MYSQL_CONFIG),
+    size=DB_POOL_SIZE,
+    max_overflow=DB_POOL_MAX_OVERFLOW,
+    recycle=DB_POOL_RECYCLE,
+    timeout=DB_POOL_TIMEOUT
+)
+
+# Arama geçmişi yazma kuyruğu ayarları
+HISTORY_QUEUE_SIZE = 10000
+HISTORY_BATCH_SIZE = 200
+HISTORY_FLUSH_INTERVAL = 0.5
+HISTORY_SPILL_PATH = "search_history_spill.jsonl"
+HISTORY_DEAD_LETTER_PATH = "search_history_rejected.jsonl"  # Kalıcı olarak reddedilen satırlar
+MAX_ADDRESS_LENGTH = 255  # search_history ve favorites origin/destination sütun boyu
+HISTORY_PAGE_SIZE = 50  # GET /search-history varsayılan sayfa boyutu
+MAX_HISTORY_PAGE_SIZE = 200
+HISTORY_CACHE_CONTROL = "private, no-cache"  # Tarayıcı saklar ama her seferinde ETag ile doğrular
 
-# Database bağlantısı
-def get_db_connection():
+# Database bağlantısı (havuzdan alınır, blok sonunda havuza iade edilir)
+@contextmanager
+def db_connection():
     try:
-        connection = mysql.connector.connect(**MYSQL_CONFIG)
-        return connection
-    except Error as e:
-        print(f"❌ Database bağlantı hatası: {e}")
-        return None
+        connection = db_pool.acquire()
+    except (Error, PoolTimeout) as e:
+        logger.error("Database bağlantı hatası", extra={"fields": {"error": str(e)}})
+        yield None
+        return
 
-# Database tabloları oluştur
-def create_tables():
-    connection = get_db_connection()
-    if connection is None:
-        return False
-    
-    cursor = connection.cursor()
-    
     try:
-        # Users tablosu
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(100) NOT NULL,
-            email VARCHAR(100) UNIQUE NOT NULL,
-            password_hash VARCHAR(255) NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-        
-        # Search history tablosu
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS search_history (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT NOT NULL,
-            origin VARCHAR(255) NOT NULL,
-            destination VARCHAR(255),
-            datetime TIMESTAMP NOT NULL,
-            prediction_result JSON,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-            INDEX idx_user_datetime (user_id, created_at)
-        )
-        """)
-        
-        # Favorites tablosu
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS favorites (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT NOT NULL,
-            origin VARCHAR(255) NOT NULL,
-            destination VARCHAR(255),
-            route_name VARCHAR(100),
-            prediction_result JSON,
-            search_datetime DATETIME,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-            INDEX idx_user_id (user_id)
-        )
-        """)
-        
-        # Mevcut tabloya search_datetime sütununu ekle (eğer yoksa)
+        yield connection
+    except BaseException:
+        db_pool.release(connection, invalidate=not connection.is_connected())
+        raise
+    else:
+        db_pool.release(connection)
+
+# Database şemasını güncelle (bekleyen göçleri uygula)
+def create_tables():
+    with db_connection() as connection:
+        if connection is None:
+            return False
+
         try:
-            cursor.execute("ALTER TABLE favorites ADD COLUMN search_datetime DATETIME")
-            print("✅ Favorites tablosuna search_datetime sütunu eklendi")
-        except mysql.connector.Error as e:
-            if "Duplicate column name" in str(e):
-                print("✅ search_datetime sütunu zaten mevcut")
-            else:
-                print(f"⚠️ ALTER TABLE hatası: {e}")
-        
-        connection.commit()
-        print("✅ Database tabloları başarıyla oluşturuldu")
-        return True
-        
-    except Error as e:
-        print(f"❌ Tablo oluşturma hatası: {e}")
-        return False
-    finally:
-        cursor.close()
-        connection.close()
+            applied = migrations.migrate(connection)
+            if applied:
+                print(f"✅ Şema göçleri uygulandı: {applied}")
+            return True
+        except Exception as e:
+            logger.exception("Şema göçleri uygulanamadı")
+            print(f"❌ Tablo oluşturma hatası: {e}")
+            return False
+
+def decode_access_token(token):
+    """Tam JWT doğrulaması; yenileme token'ları erişim için kabul edilmez"""
+    claims = jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
+    # "type" claim'i olmayan eski token'lar erişim token'ı sayılır
+    if claims.get("type", "access") != "access":
+        raise jwt.InvalidTokenError("Erişim token'ı değil")
+    return claims
+
+
+token_cache = TokenCache(decode_access_token, TOKEN_CACHE_SIZE)
+
+
+def issue_tokens(user_id):
+    """Kısa ömürlü erişim token'ı ve yenileme token'ı; (gövde, refresh_tokens satırı)"""
+    now = datetime.utcnow()
+    jti = secrets.token_hex(16)
+    expires_at = now + REFRESH_TOKEN_TTL
+    tokens = {
+        'token': jwt.encode({
+            'user_id': user_id,
+            'type': 'access',
+            'exp': now + ACCESS_TOKEN_TTL
+        }, JWT_SECRET_KEY, algorithm='HS256'),
+        'refresh_token': jwt.encode({
+            'user_id': user_id,
+            'type': 'refresh',
+            'jti': jti,
+            'exp': expires_at
+        }, JWT_SECRET_KEY, algorithm='HS256'),
+        'expires_in': int(ACCESS_TOKEN_TTL.total_seconds())
+    }
+    return tokens, (jti, user_id, expires_at)
+
+
+def respond(result):
+    """(gövde, durum kodu) ikilisini JSON yanıtına çevir"""
+    payload, status = result
+    return jsonify(payload), status
+
+
+# Aşağıdaki *_query / *_payload / parse_* fonksiyonları Flask'tan bağımsızdır:
+# asgi_app.py aynı uç noktaları aynı gövdelerle bunlar üzerinden sunar.
+# Hatalar (gövde, durum kodu) olarak döner.
+
+def parse_bearer(auth_header):
+    """Authorization başlığındaki token; (token, hata)"""
+    if auth_header is None:
+        return None, ({'message': 'Token eksik'}, 401)
+    try:
+        token = auth_header.split(" ")[1]
+    except IndexError:
+        return None, ({'message': 'Token format hatalı'}, 401)
+    if not token:
+        return None, ({'message': 'Token eksik'}, 401)
+    return token, None
+
+
+def authenticate(auth_header):
+    """Erişim token'ının user_id'si; (user_id, hata)"""
+    token, error = parse_bearer(auth_header)
+    if error is not None:
+        return None, error
+    try:
+        return token_cache.verify(token), None
+    except jwt.ExpiredSignatureError:
+        return None, ({'message': 'Token süresi dolmuş'}, 401)
+    except TokenRevoked:
+        return None, ({'message': 'Oturum kapatılmış'}, 401)
+    except (jwt.InvalidTokenError, KeyError):
+        return None, ({'message': 'Geçersiz token'}, 401)
+
+
+def bearer_token():
+    """Authorization başlığındaki token; (token, hata yanıtı)"""
+    token, error = parse_bearer(request.headers.get('Authorization'))
+    if error is not None:
+        return None, respond(error)
+    return token, None
+
 
 # JWT token doğrulama decorator
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            try:
-                token = auth_header.split(" ")[1]
-            except IndexError:
-                return jsonify({'message': 'Token format hatalı'}), 401
-        
-        if not token:
-            return jsonify({'message': 'Token eksik'}), 401
-        
-        try:
-            data = jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
-            current_user_id = data['user_id']
-        except jwt.ExpiredSignatureError:
-            return jsonify({'message': 'Token süresi dolmuş'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'message': 'Geçersiz token'}), 401
-        
+        current_user_id, error = authenticate(request.headers.get('Authorization'))
+        if error is not None:
+            return respond(error)
         return f(current_user_id, *args, **kwargs)
     return decorated
 
 
+# Yönetim anahtarı doğrulama decorator
+def admin_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        key = request.headers.get('X-Admin-Key', '')
+        if not ADMIN_API_KEY or not hmac.compare_digest(key.encode(), ADMIN_API_KEY.encode()):
+            return jsonify({'message': 'Yetkisiz'}), 403
+        return f(*args, **kwargs)
+    return decorated
+
+
 def load_model():
-    global model, scaler
+    """Modeli yükleyip etkin sürüm yap (model_registry üzerinden)"""
     try:
-        model = joblib.load("trafik_model.pkl")
-        print("✅ Model başarıyla yüklendi")
-        
-        # Scaler'ı yüklemeyi dene
-        try:
-            scaler = joblib.load("scaler.pkl")
-            print("✅ Scaler başarıyla yüklendi")
-        except FileNotFoundError:
-            print("⚠️ Scaler dosyası bulunamadı, ölçeklendirme yapılmayacak")
-            scaler = None
-        
+        model_registry.reload(force=True)
         return True
     except FileNotFoundError:
         print("❌ Model dosyası bulunamadı! Önce modeli eğitin.")
@@ -164,49 +353,247 @@ def load_model():
         return False
 
 
-def get_lat_lng_from_address(address, api_key):
-    # İstanbul'daki popüler lokasyonlar için sabit koordinatlar
-    location_coords = {
-        "maltepe": (40.9333, 29.1333),
-        "kadıköy": (40.9917, 29.0270),
-        "üsküdar": (41.0214, 29.0161),
-        "beşiktaş": (41.0422, 29.0061),
-        "şişli": (41.0602, 28.9887),
-        "beyoğlu": (41.0370, 28.9857),
-        "fatih": (41.0186, 28.9647),
-        "bakırköy": (40.9744, 28.8719),
-        "zeytinburnu": (41.0058, 28.9019),
-        "pendik": (40.8783, 29.2333),
-        "kartal": (40.9061, 29.1856),
-        "ataşehir": (40.9833, 29.1167),
-        "levent": (41.0814, 29.0092),
-        "maslak": (41.1086, 29.0219),
-        "taksim": (41.0370, 28.9857),
-        "sultanahmet": (41.0058, 28.9769),
-        "eminönü": (41.0186, 28.9647)
-    }
-    
-    # Adres içinde bilinen lokasyon var mı kontrol et
-    address_lower = address.lower()
-    for location, coords in location_coords.items():
-        if location in address_lower:
-            print(f"📍 Bilinen lokasyon kullanıldı: {location}")
-            return coords
+def load_model_bundle(prefer_artifact=True, compile_table=True):
+    """Güncel mmap model paketi varsa onu aç, yoksa pkl'i yükleyip paketi üret; etkin sürüme dokunmaz"""
+    source_paths = (MODEL_PATH, SCALER_PATH)
+    if prefer_artifact and USE_MODEL_ARTIFACT:
+        if not model_artifact.is_current(MODEL_ARTIFACT_DIR, source_paths) and os.path.exists(MODEL_PATH):
+            bundle = load_pickled_bundle()
+            try:
+                model_artifact.export_artifact(bundle.model, bundle.scaler_params, MODEL_ARTIFACT_DIR, source_paths)
+                print(f"✅ Model paketi yazıldı: {MODEL_ARTIFACT_DIR}")
+            except Exception as e:
+                print(f"⚠️ Model paketi yazılamadı: {str(e)}")
+                return compile_prediction_table(bundle) if compile_table else bundle
+
+        if model_artifact.is_current(MODEL_ARTIFACT_DIR, source_paths):
+            model, scaler_params, manifest = model_artifact.load_artifact(
+                MODEL_ARTIFACT_DIR, verify_checksums=MODEL_ARTIFACT_VERIFY_CHECKSUMS
+            )
+            print(f"✅ Model paketi açıldı (mmap): sürüm {manifest['version']}, "
+                  f"{model.n_estimators} ağaç, {model.node_count:,} düğüm")
+            bundle = ModelBundle(model, scaler_params, manifest["checksum"], manifest, source="artifact")
+            return compile_prediction_table(bundle) if compile_table else bundle
+
+    bundle = load_pickled_bundle()
+    return compile_prediction_table(bundle) if compile_table else bundle
+
+
+def load_pickled_bundle():
+    """trafik_model.pkl ve scaler.pkl'i joblib ile yükle"""
+    model = joblib.load(MODEL_PATH)
+    print("✅ Model başarıyla yüklendi")
+    if USE_FLAT_FOREST:
+        try:
+            model = FlatForest.from_sklearn(model)
+            print(f"✅ Model düz diziye derlendi: {model.n_estimators} ağaç, {model.node_count:,} düğüm")
+        except Exception as e:
+            print(f"⚠️ Model derlenemedi, sklearn ile devam ediliyor: {str(e)}")
     
-    # Google API'yi dene
+    # Scaler'ı yüklemeyi dene
+    try:
+        scaler = joblib.load(SCALER_PATH)
+        print("✅ Scaler başarıyla yüklendi")
+    except FileNotFoundError:
+        print("⚠️ Scaler dosyası bulunamadı, ölçeklendirme yapılmayacak")
+        scaler = None
+    # Checksum tahmin tablosunun hangi modele ait olduğunu da belirler
+    checksum = file_hash(MODEL_PATH, SCALER_PATH if scaler is not None else None)
+    return ModelBundle(model, ScalerParams.from_scaler(scaler), checksum, source="pickle")
+
+
+def compile_prediction_table(bundle, force=False):
+    """Bilinen lokasyonlar için tahmin tablosunu yükle; model değiştiyse yeniden derle"""
+    try:
+        if force and os.path.exists(PREDICTION_TABLE_PATH):
+            os.remove(PREDICTION_TABLE_PATH)
+
+        started = time.perf_counter()
+        table, compiled = PredictionTable.load_or_compile(
+            PREDICTION_TABLE_PATH,
+            bundle.checksum,
+            predict_proba=lambda matrix: predict_proba_matrix(matrix, bundle),
+            classes=bundle.model.classes_,
+            coords=list(LOCATION_COORDS.values()) + [DEFAULT_LOCATION],
+            feature_row=build_feature_row
+        )
+        elapsed = time.perf_counter() - started
+        if compiled:
+            print(f"✅ Tahmin tablosu derlendi: {len(table):,} kayıt ({elapsed:.1f} sn)")
+        else:
+            print(f"✅ Tahmin tablosu yüklendi: {len(table):,} kayıt")
+    except Exception as e:
+        table = None
+        print(f"⚠️ Tahmin tablosu hazırlanamadı, canlı model kullanılacak: {str(e)}")
+    return bundle._replace(prediction_table=table)
+
+
+def warm_up_model(bundle):
+    """Yeni sürümü bilinen lokasyonlarla skorla; geçersiz çıktı sürümü reddettirir"""
+    now = datetime.now()
+    coords = list(LOCATION_COORDS.values())[:MODEL_WARMUP_ROWS]
+    matrix = np.asarray([build_feature_row(now.hour, now.weekday(), now.month, lat, lng)
+                         for lat, lng in coords], dtype=np.float64)
+    probabilities = predict_proba_matrix(matrix, bundle)
+    if (probabilities.shape != (len(coords), len(bundle.model.classes_))
+            or not np.allclose(probabilities.sum(axis=1), 1.0)):
+        raise ValueError(f"Isınma tahmini geçersiz: {probabilities.shape}")
+
+
+def model_signature():
+    """Model dosyalarının ve paket manifestinin ucuz imzası (değişiklik izleme için)"""
+    return file_signature(MODEL_PATH, SCALER_PATH,
+                          os.path.join(MODEL_ARTIFACT_DIR, model_artifact.MANIFEST_NAME))
+
+
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE)  # (model sürümü, model girdisi) -> (seviye, traffic_info)
+route_cache = PredictionCache(ROUTE_CACHE_SIZE)  # (model sürümü, model girdisi) -> olasılıklar
+tile_cache = PredictionCache(TILE_CACHE_SIZE)  # (model sürümü, saat, z, x, y) -> PNG
+
+
+def clear_prediction_caches(bundle):
+    # Eski sürümün sonuçları yeni sürümde kullanılmaz; ızgaralar sürüm değişince yeniden hesaplanır
+    prediction_cache.clear()
+    route_cache.clear()
+    tile_cache.clear()
+
+
+model_registry = ModelRegistry(
+    load_model_bundle,
+    signature=model_signature,
+    warmup=warm_up_model,
+    warmup_rounds=MODEL_WARMUP_ROUNDS,
+    watch_interval=MODEL_WATCH_INTERVAL,
+    on_activate=clear_prediction_caches
+)
+atexit.register(model_registry.stop_watching)
+
+
+def score_grid_cells(moment, lats, lngs):
+    """Izgaradaki tüm hücreleri verilen saat için tek model çağrısıyla skorla"""
+    bundle = model_registry.current
+    count = len(lats)
+    matrix = build_feature_matrix(np.full(count, moment.hour), np.full(count, moment.weekday()),
+                                  np.full(count, moment.month), lats, lngs)
+    return bundle.version, bundle.model.classes_, predict_proba_matrix(matrix, bundle)
+
+
+grid_store = GridStore(
+    GridSpec(GRID_BOUNDS, GRID_PRECISION),
+    score_grid_cells,
+    version=lambda: model_registry.current.version,
+    hours_ahead=GRID_HOURS_AHEAD,
+    refresh_interval=GRID_REFRESH_INTERVAL
+)
+atexit.register(grid_store.stop)
+
+
+def load_favorite_origins():
+    """Tüm kullanıcıların farklı favori başlangıç noktaları"""
+    with db_connection() as connection:
+        if connection is None:
+            raise RuntimeError("Database bağlantı hatası")
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT DISTINCT origin FROM favorites")
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+
+def score_favorite_slots(hours, days, months, lats, lngs):
+    """(nokta, saat) satırlarının tamamını tek model çağrısıyla skorla"""
+    bundle = model_registry.current
+    matrix = build_feature_matrix(hours, days, months, lats, lngs)
+    return bundle.version, bundle.model.classes_, predict_proba_matrix(matrix, bundle)
+
+
+favorites_forecaster = FavoritesForecaster(
+    load_favorite_origins,
+    lambda origin: resolve_origin(origin),  # resolve_origin aşağıda tanımlı
+    score_favorite_slots,
+    version=lambda: model_registry.current.version,
+    hours_ahead=FAVORITES_FORECAST_HOURS,
+    refresh_interval=FAVORITES_FORECAST_INTERVAL
+)
+atexit.register(favorites_forecaster.stop)
+
+
+def password_pool_busy(e, key="message"):
+    response = jsonify({key: "Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin"})
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, 503
+
+
+def lookup_prediction(feature_info, bundle):
+    """Tahmini önceden hesaplanmış tablodan al, tabloda yoksa None döndür"""
+    if bundle.prediction_table is None:
+        return None
+    return bundle.prediction_table.lookup(
+        feature_info["hour"], feature_info["day_of_week"], feature_info["month"],
+        feature_info["latitude"], feature_info["longitude"]
+    )
+
+
+def parse_geocode_response(payload):
+    """Geocoding API yanıtındaki ilk sonucun (lat, lng)'si; sonuç yoksa None"""
+    results = payload.get("results")
+    if not results:
+        return None
+    location = results[0]["geometry"]["location"]
+    return location["lat"], location["lng"]
+
+
+def google_geocode(address, api_key=GOOGLE_API_KEY):
+    """Google Geocoding API ile adresi çöz; sonuç yoksa None, ağ hatasında exception"""
     try:
-        url = f"https://maps.googleapis.com/maps/api/geocode/json?address={address}&key={api_key}"
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            results = response.json().get("results")
-            if results:
-                location = results[0]["geometry"]["location"]
-                print(f"📍 Google API'den koordinat alındı")
-                return location["lat"], location["lng"]
+        response = requests.get(GOOGLE_GEOCODE_URL, params={"address": address, "key": api_key}, timeout=5)
+        response.raise_for_status()
     except Exception as e:
-        print(f"⚠️ Google API hatası: {str(e)}")
+        logger.warning("Google API hatası", extra={"fields": {"address": address, "error": str(e)}})
+        raise
+
+    result = parse_geocode_response(response.json())
+    if result is not None:
+        logger.debug("Google API'den koordinat alındı", extra={"fields": {"address": address}})
+    return result
+
+
+# Geocoder testlerde yerel bir stub ile değiştirilebilir: geocode_cache.geocoder = ...
+geocode_cache = GeocodeCache(
+    google_geocode,
+    db_path=GEOCODE_CACHE_PATH,
+    memory_size=GEOCODE_CACHE_SIZE,
+    ttl=GEOCODE_CACHE_TTL,
+    negative_ttl=GEOCODE_NEGATIVE_TTL
+)
+
+
+def load_gazetteer():
+    """Sabit lokasyonlardan ve varsa gazetteer dosyasından yer adı indeksini kur"""
+    index = Gazetteer.from_locations(LOCATION_COORDS)
+    if os.path.exists(GAZETTEER_PATH):
+        try:
+            added = index.load_csv(GAZETTEER_PATH)
+            print(f"✅ Gazetteer yüklendi: {added:,} yer adı")
+        except Exception as e:
+            print(f"⚠️ Gazetteer okunamadı: {str(e)}")
+    return index
+
+
+gazetteer = load_gazetteer()
+
+
+def get_lat_lng_from_address(address):
+    # Adres içinde bilinen lokasyon var mı kontrol et (en uzun eşleşen yer adı)
+    match = gazetteer.match(address)
+    if match is not None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Bilinen lokasyon kullanıldı", extra={"fields": {"location": match[0]}})
+        return match[1], match[2]
     
-    return None, None
+    # Önbellekte yoksa Google API'ye gidilir
+    return geocode_cache.get(address)
 
 
 def get_traffic_parameters(hour, day_of_week, is_weekend):
@@ -240,6 +627,14 @@ def get_traffic_parameters(hour, day_of_week, is_weekend):
             # Diğer saatler - normal trafik
             return {"min_speed": 40, "max_speed": 70, "num_vehicles": 250}
 
+# get_traffic_parameters sadece saate ve hafta sonu bilgisine bağlı:
+# [hafta sonu, saat] -> (min_speed, max_speed, num_vehicles)
+TRAFFIC_PARAMETER_TABLE = np.array([
+    [[params["min_speed"], params["max_speed"], params["num_vehicles"]]
+     for params in (get_traffic_parameters(hour, 5 if weekend else 0, weekend) for hour in range(24))]
+    for weekend in (0, 1)
+], dtype=np.float64)
+
 def get_traffic_info_from_prediction(prediction, feature_info):
     """Model çıktısı ve özellik bilgisine göre trafik bilgisini oluştur"""
     
@@ -289,10 +684,46 @@ def get_traffic_info_from_prediction(prediction, feature_info):
         "speed_range": f"{min_speed}-{max_speed} km/h"
     }
 
-def extract_features_from_request(data):
-    dt = pd.to_datetime(data.get("datetime"))
+def resolve_origin(address):
+    """Başlangıç adresini koordinata çevir, bulunamazsa Kadıköy'e düş"""
+    lat, lng = get_lat_lng_from_address(address)
+    if lat is None or lng is None:
+        # fallback: Kadıköy (sadece API başarısız olursa)
+        lat, lng = DEFAULT_LOCATION
+    return lat, lng
+
+def location_name(lat, lng):
+    """Koordinata en yakın bilinen yer adı (ters geohash indeksi), yoksa None"""
+    nearest = gazetteer.nearest(lat, lng)
+    return nearest[0] if nearest else None
+
+def build_feature_row(hour, day_of_week, month, lat, lng):
+    """Zaman ve konumdan modelin beklediği 9 özellikli satırı oluştur"""
+    is_weekend = int(day_of_week >= 5)
+    traffic_params = get_traffic_parameters(hour, day_of_week, is_weekend)
+    return [
+        hour, day_of_week, is_weekend, month,
+        traffic_params["min_speed"], traffic_params["max_speed"], traffic_params["num_vehicles"],
+        lat, lng
+    ]
+
+def build_feature_matrix(hours, days, months, lat, lng):
+    """build_feature_row'un dizi hali: her zaman dilimi için bir satır"""
+    is_weekend = (days >= 5).astype(np.int64)
+    matrix = np.empty((len(hours), len(FEATURE_NAMES)), dtype=np.float64)
+    matrix[:, 0] = hours
+    matrix[:, 1] = days
+    matrix[:, 2] = is_weekend
+    matrix[:, 3] = months
+    matrix[:, 4:7] = TRAFFIC_PARAMETER_TABLE[is_weekend, hours]
+    matrix[:, 7] = lat
+    matrix[:, 8] = lng
+    return matrix
+
+def extract_features_from_request(data, location=None):
+    dt = parse_datetime(data.get("datetime"))
     hour = dt.hour
-    day_of_week = dt.dayofweek
+    day_of_week = dt.weekday()
     is_weekend = int(day_of_week >= 5)
     month = dt.month
 
@@ -303,11 +734,9 @@ def extract_features_from_request(data):
     num_vehicles = traffic_params["num_vehicles"]
 
     # Adresten koordinat al (Google Geocoding API)
-    address = data.get("origin", "Kadıköy, İstanbul")
-    lat, lng = get_lat_lng_from_address(address, GOOGLE_API_KEY)
-    if lat is None or lng is None:
-        # fallback: Kadıköy (sadece API başarısız olursa)
-        lat, lng = 40.9917, 29.0270
+    if location is None:
+        location = resolve_origin(data.get("origin", "Kadıköy, İstanbul"))
+    lat, lng = location
 
     features = [
         hour, day_of_week, is_weekend, month,
@@ -325,10 +754,214 @@ def extract_features_from_request(data):
         "num_vehicles": num_vehicles,
         "latitude": lat,
         "longitude": lng,
+        "location_name": location_name(lat, lng),
         "auto_generated": True
     }
 
 
+def model_input(matrix, bundle):
+    """Ağaçların gördüğü girdi: ölçeklenmiş ve float32'ye çevrilmiş satırlar"""
+    if bundle.scaler_params is not None:
+        matrix = bundle.scaler_params.transform(matrix)
+    return np.asarray(matrix, dtype=np.float32)
+
+
+def predict_proba_matrix(matrix, bundle=None):
+    """Özellik matrisinin tamamını tek ölçeklendirme ve tek model çağrısıyla skorla"""
+    if bundle is None:
+        bundle = model_registry.current
+    if bundle.scaler_params is not None:
+        return bundle.model.predict_proba(bundle.scaler_params.transform(matrix))
+    return bundle.model.predict_proba(matrix)
+
+
+def predict_slots(bundle, hours, days, months, lat, lng):
+    """Zaman dilimlerinin (seviyeler, olasılıklar, kaynak) üçlüsü; tekrar eden satırlar bir kez skorlanır"""
+    if bundle.prediction_table is not None:
+        hit = bundle.prediction_table.lookup_many(hours, days, months, lat, lng)
+        if hit is not None:
+            return hit[0], hit[1], "table"
+
+    # Satır sadece (ay, gün, saat)'e bağlı: 15 dakikalık adımda her satır 4 kez tekrarlanır
+    keys = (months * 7 + days) * 24 + hours
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    probabilities = predict_proba_matrix(build_feature_matrix(hours[first], days[first], months[first], lat, lng),
+                                         bundle)
+    levels = bundle.model.classes_.take(np.argmax(probabilities, axis=1))
+    return levels[inverse], probabilities[inverse], "model"
+
+
+def predict_cells(bundle, centers, hour, day_of_week, month):
+    """Hücre merkezlerinin olasılıkları ve skorlanan hücre sayısı; önbellekte olmayanlar tek çağrıda skorlanır"""
+    rows = [build_feature_row(hour, day_of_week, month, lat, lng) for lat, lng in centers.tolist()]
+    inputs = model_input(np.asarray(rows, dtype=np.float64), bundle)
+    keys = [row.tobytes() for row in inputs]
+    probabilities = np.empty((len(rows), len(bundle.model.classes_)), dtype=np.float64)
+    misses = []
+    for i, key in enumerate(keys):
+        cached = route_cache.get(bundle.version, key)
+        if cached is None:
+            misses.append(i)
+        else:
+            probabilities[i] = cached
+    if misses:
+        scored = bundle.model.predict_proba(inputs[misses])
+        probabilities[misses] = scored
+        for i, proba in zip(misses, scored.tolist()):
+            route_cache.put(bundle.version, keys[i], tuple(proba))
+    return probabilities, len(misses)
+
+
+def best_departure_window(probabilities, classes, window):
+    """Beklenen trafik seviyesinin ortalaması en düşük olan ardışık `window` dilimin başlangıcı"""
+    window = min(window, len(probabilities))
+    expected = probabilities @ np.asarray(classes, dtype=np.float64)
+    totals = np.concatenate(([0.0], np.cumsum(expected)))
+    means = (totals[window:] - totals[:-window]) / window
+    start = int(np.argmin(means))  # Eşitlikte en erken pencere
+    return start, window, float(means[start])
+
+
+# Kullanıcı sorguları
+USER_INSERT_SQL = "INSERT INTO users (name, email, password_hash) VALUES (%s, %s, %s)"
+USER_BY_EMAIL_SQL = "SELECT id, name, password_hash FROM users WHERE email = %s"
+USER_REHASH_SQL = "UPDATE users SET password_hash = %s WHERE id = %s"
+
+
+# Yenileme token'ları: jti'ler refresh_tokens tablosunda. Tek kullanım ve logout veritabanında
+# tutulur; yeniden başlatma ve birden fazla süreç bunu etkilemez
+REFRESH_INSERT_SQL = "INSERT INTO refresh_tokens (jti, user_id, expires_at) VALUES (%s, %s, %s)"
+REFRESH_CONSUME_SQL = "UPDATE refresh_tokens SET used = 1 WHERE jti = %s AND user_id = %s AND used = 0"
+REFRESH_PURGE_SQL = "DELETE FROM refresh_tokens WHERE user_id = %s AND expires_at < %s"
+
+
+def login_payload(user, email, tokens):
+    """Başarılı giriş yanıtı; user (id, name, password_hash) satırı"""
+    return {
+        'message': 'Giriş başarılı',
+        **tokens,
+        'user': {
+            'id': user[0],
+            'name': user[1],
+            'email': email
+        }
+    }
+
+
+def parse_refresh_token(token):
+    """Yenileme token'ının claim'leri; (claims, hata)"""
+    if not token:
+        return None, ({'message': 'refresh_token gereklidir'}, 400)
+
+    try:
+        claims = jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        return None, ({'message': 'Oturum süresi dolmuş, tekrar giriş yapın'}, 401)
+    except jwt.InvalidTokenError:
+        return None, ({'message': 'Geçersiz token'}, 401)
+    # jti'siz (tablodan önceki) yenileme token'ları kabul edilmez: tekrar giriş gerekir
+    if claims.get('type') != 'refresh' or 'jti' not in claims:
+        return None, ({'message': 'Geçersiz token'}, 401)
+    return claims, None
+
+
+def start_session(user_id):
+    """Yeni token çifti; yenileme token'ı tabloya yazılır, kullanıcının süresi dolmuş satırları silinir; (gövde, hata)"""
+    tokens, row = issue_tokens(user_id)
+    with db_connection() as connection:
+        if connection is None:
+            return None, ({'message': 'Database bağlantı hatası'}, 500)
+        cursor = connection.cursor()
+        try:
+            cursor.execute(REFRESH_PURGE_SQL, (user_id, datetime.utcnow()))
+            cursor.execute(REFRESH_INSERT_SQL, row)
+            connection.commit()
+        except Error as e:
+            return None, ({'message': f'Oturum hatası: {str(e)}'}, 500)
+        finally:
+            cursor.close()
+    return tokens, None
+
+
+def refresh_session(token):
+    """Yenileme token'ını yeni bir erişim + yenileme token çiftiyle değiştir; (gövde, durum kodu)"""
+    claims, error = parse_refresh_token(token)
+    if error is not None:
+        return error
+
+    tokens, row = issue_tokens(claims['user_id'])
+    with db_connection() as connection:
+        if connection is None:
+            return {'message': 'Database bağlantı hatası'}, 500
+        cursor = connection.cursor()
+        try:
+            # Döndürme: her yenileme token'ı bir kez kullanılabilir. UPDATE satırı kilitler;
+            # aynı token'la eşzamanlı yenilemelerden yalnızca biri satırı değiştirir
+            cursor.execute(REFRESH_CONSUME_SQL, (claims['jti'], claims['user_id']))
+            if cursor.rowcount != 1:
+                return {'message': 'Geçersiz token'}, 401  # Kullanılmış, iptal edilmiş ya da bilinmiyor
+            cursor.execute(REFRESH_INSERT_SQL, row)
+            connection.commit()
+        except Error as e:
+            return {'message': f'Yenileme hatası: {str(e)}'}, 500
+        finally:
+            cursor.close()
+    return tokens, 200
+
+
+def revoke_refresh_claims(refresh_token, current_user_id):
+    """Logout'ta iptal edilecek yenileme token'ının claim'leri; başkasının ya da geçersizse None"""
+    if not refresh_token:
+        return None
+    try:
+        claims = jwt.decode(refresh_token, JWT_SECRET_KEY, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return None  # Süresi dolmuş ya da geçersiz yenileme token'ı zaten kullanılamaz
+    if claims.get('type') != 'refresh' or claims.get('user_id') != current_user_id or 'jti' not in claims:
+        return None
+    return claims
+
+
+def revoke_access_token(token):
+    """Erişim token'ını exp zamanına kadar reddet"""
+    # En fazla ACCESS_TOKEN_TTL yaşar: süreç belleğindeki iptal listesi yeterli
+    token_cache.revoke(token, jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])['exp'])
+
+
+def end_session(token, current_user_id, refresh_token=None):
+    """Erişim token'ını ve verildiyse yenileme token'ını iptal et"""
+    revoke_access_token(token)
+    claims = revoke_refresh_claims(refresh_token, current_user_id)
+    if claims is not None:
+        with db_connection() as connection:
+            if connection is None:
+                return {'message': 'Database bağlantı hatası'}, 500
+            cursor = connection.cursor()
+            try:
+                cursor.execute(REFRESH_CONSUME_SQL, (claims['jti'], current_user_id))
+                connection.commit()
+            except Error as e:
+                return {'message': f'Çıkış hatası: {str(e)}'}, 500
+            finally:
+                cursor.close()
+    return {'message': 'Çıkış yapıldı'}, 200
+
+
+def update_password_hash(user_id, new_hash):
+    """Eski maliyetle üretilmiş hash'i yenisiyle değiştir; hata girişi engellemez"""
+    with db_connection() as connection:
+        if connection is None:
+            return
+        cursor = connection.cursor()
+        try:
+            cursor.execute(USER_REHASH_SQL, (new_hash, user_id))
+            connection.commit()
+        except Error:
+            logger.exception("Şifre hash'i güncellenemedi", extra={"fields": {"user_id": user_id}})
+        finally:
+            cursor.close()
+
+
 # User Authentication Routes
 @app.route("/register", methods=["POST"])
 def register():
@@ -341,31 +974,30 @@ def register():
         if not all([name, email, password]):
             return jsonify({'message': 'Tüm alanlar gereklidir'}), 400
         
-        # Şifreyi hash'le
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        # Şifreyi hash'le (ayrı süreçte)
+        try:
+            password_hash = password_pool.hash(password)
+        except PasswordPoolBusy as e:
+            return password_pool_busy(e)
         
-        connection = get_db_connection()
-        if connection is None:
-            return jsonify({'message': 'Database bağlantı hatası'}), 500
+        with db_connection() as connection:
+            if connection is None:
+                return jsonify({'message': 'Database bağlantı hatası'}), 500
         
-        cursor = connection.cursor()
+            cursor = connection.cursor()
         
-        try:
-            cursor.execute(
-                "INSERT INTO users (name, email, password_hash) VALUES (%s, %s, %s)",
-                (name, email, password_hash)
-            )
-            connection.commit()
+            try:
+                cursor.execute(USER_INSERT_SQL, (name, email, password_hash))
+                connection.commit()
             
-            return jsonify({'message': 'Kullanıcı başarıyla kaydedildi'}), 201
+                return jsonify({'message': 'Kullanıcı başarıyla kaydedildi'}), 201
             
-        except mysql.connector.IntegrityError:
-            return jsonify({'message': 'Bu e-posta adresi zaten kullanılıyor'}), 409
-        except Error as e:
-            return jsonify({'message': f'Kayıt hatası: {str(e)}'}), 500
-        finally:
-            cursor.close()
-            connection.close()
+            except mysql.connector.IntegrityError:
+                return jsonify({'message': 'Bu e-posta adresi zaten kullanılıyor'}), 409
+            except Error as e:
+                return jsonify({'message': f'Kayıt hatası: {str(e)}'}), 500
+            finally:
+                cursor.close()
             
     except Exception as e:
         return jsonify({'message': f'Sunucu hatası: {str(e)}'}), 500
@@ -380,77 +1012,122 @@ def login():
         if not all([email, password]):
             return jsonify({'message': 'E-posta ve şifre gereklidir'}), 400
         
-        connection = get_db_connection()
-        if connection is None:
-            return jsonify({'message': 'Database bağlantı hatası'}), 500
+        with db_connection() as connection:
+            if connection is None:
+                return jsonify({'message': 'Database bağlantı hatası'}), 500
         
-        cursor = connection.cursor()
+            cursor = connection.cursor()
         
-        try:
-            cursor.execute(
-                "SELECT id, name, password_hash FROM users WHERE email = %s",
-                (email,)
-            )
-            user = cursor.fetchone()
-            
-            if user and bcrypt.checkpw(password.encode('utf-8'), user[2].encode('utf-8')):
-                # JWT token oluştur
-                token = jwt.encode({
-                    'user_id': user[0],
-                    'exp': datetime.utcnow() + timedelta(days=1)
-                }, JWT_SECRET_KEY, algorithm='HS256')
-                
-                return jsonify({
-                    'message': 'Giriş başarılı',
-                    'token': token,
-                    'user': {
-                        'id': user[0],
-                        'name': user[1],
-                        'email': email
-                    }
-                }), 200
-            else:
-                return jsonify({'message': 'Geçersiz e-posta veya şifre'}), 401
-                
-        except Error as e:
-            return jsonify({'message': f'Giriş hatası: {str(e)}'}), 500
-        finally:
-            cursor.close()
-            connection.close()
+            try:
+                cursor.execute(USER_BY_EMAIL_SQL, (email,))
+                user = cursor.fetchone()
+            except Error as e:
+                return jsonify({'message': f'Giriş hatası: {str(e)}'}), 500
+            finally:
+                cursor.close()
+
+        # bcrypt beklenirken bağlantı havuzdadır: giriş yoğunluğu diğer uçları bekletmez
+        valid = False
+        if user:
+            try:
+                valid, new_hash = password_pool.check(password, user[2])
+            except PasswordPoolBusy as e:
+                return password_pool_busy(e)
+            if new_hash is not None:
+                update_password_hash(user[0], new_hash)
+
+        if valid:
+            # JWT token'ları oluştur
+            tokens, error = start_session(user[0])
+            if error is not None:
+                return respond(error)
+            return jsonify(login_payload(user, email, tokens)), 200
+        else:
+            return jsonify({'message': 'Geçersiz e-posta veya şifre'}), 401
             
     except Exception as e:
         return jsonify({'message': f'Sunucu hatası: {str(e)}'}), 500
 
+@app.route("/token/refresh", methods=["POST"])
+def refresh_token():
+    """Yenileme token'ını yeni bir erişim + yenileme token çiftiyle değiştir (eskisi iptal edilir)"""
+    data = request.get_json(silent=True) or {}
+    return respond(refresh_session(data.get('refresh_token')))
+
+@app.route("/logout", methods=["POST"])
+@token_required
+def logout(current_user_id):
+    """Erişim token'ını ve verildiyse yenileme token'ını iptal et"""
+    token, _ = bearer_token()
+    data = request.get_json(silent=True) or {}
+    return respond(end_session(token, current_user_id, data.get('refresh_token')))
+
 @app.route("/", methods=["GET"])
 def home():
     return jsonify({
         "status": "active",
         "message": "İstanbul Trafik Tahmin API'si",
-        "model_loaded": model is not None,
+        "model_loaded": model_registry.current is not None,
         "endpoints": {
             "/predict": "POST - Trafik tahmini yap",
+            "/predict/batch": "POST - Birden fazla trafik tahmini (tek model çağrısı)",
+            "/predict/profile": "GET - Zaman aralığı boyunca trafik profili ve en iyi çıkış zamanı",
+            "/predict/route": "POST - Başlangıç -> varış rotası boyunca trafik tahmini",
+            "/grid/<hour>": "GET - Şehir geneli trafik ızgarası (saat ofseti ya da ISO saat)",
+            "/grid/<hour>/<z>/<x>/<y>.png": "GET - Trafik ızgarası harita karosu",
             "/health": "GET - API sağlık kontrolü",
-            "/model-info": "GET - Model bilgileri"
+            "/model-info": "GET - Model bilgileri",
+            "/admin/reload-model": "POST - Modeli yeniden başlatmadan yükle (X-Admin-Key)"
         }
     })
 
 
+def health_payload():
+    model_loaded = model_registry.current is not None
+    return {
+        "status": "healthy" if model_loaded else "model_not_loaded",
+        "model_available": model_loaded,
+        "model": model_registry.stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "route_cache": route_cache.stats(),
+        "traffic_grid": grid_store.stats(),
+        "tile_cache": tile_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "token_cache": token_cache.stats(),
+        "favorites_forecast": favorites_forecaster.stats(),
+        "geocode_cache": geocode_cache.stats(),
+        "db_pool": db_pool.stats(),
+        "search_history_queue": history_writer.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @app.route("/health", methods=["GET"])
 def health_check():
-    return jsonify({
-        "status": "healthy" if model is not None else "model_not_loaded",
-        "model_available": model is not None,
-        "timestamp": datetime.now().isoformat()
-    })
+    return jsonify(health_payload())
 
 
 @app.route("/model-info", methods=["GET"])
 def model_info():
-    if model is None:
+    bundle = model_registry.current
+    if bundle is None:
         return jsonify({"error": "Model yüklenmemiş"}), 400
 
+    manifest = bundle.manifest
     return jsonify({
-        "model_type": type(model).__name__,
+        "model_type": getattr(bundle.model, "source_type", type(bundle.model).__name__),
+        "evaluator": type(bundle.model).__name__,
+        "version": bundle.version,
+        "source": bundle.source,
+        "loaded_at": bundle.loaded_at,
+        "load_seconds": bundle.load_seconds,
+        "warmup_ms": bundle.warmup_ms,
+        "warmup_first_ms": bundle.warmup_first_ms,
+        "artifact": {
+            "version": manifest["version"],
+            "created_at": manifest["created_at"],
+            "checksum": manifest["checksum"]
+        } if manifest else None,
         "feature_count": 10,
         "traffic_levels": {
             0: {"name": "Az", "color": "green", "description": "Trafik akışı normal"},
@@ -461,10 +1138,26 @@ def model_info():
         "note": "Hız aralığı ve araç sayısı otomatik olarak hesaplanır"
     })
 
+@app.route("/admin/reload-model", methods=["POST"])
+@admin_required
+def reload_model():
+    """Model dosyalarını yeniden yükle; ?wait=1 ile yükleme bitene kadar beklenir"""
+    if request.args.get("wait") in ("1", "true"):
+        try:
+            changed = model_registry.reload(force=request.args.get("force") in ("1", "true"))
+        except Exception as e:
+            return jsonify({"error": f"Model yüklenemedi: {str(e)}", "model": model_registry.stats()}), 500
+        return jsonify({"changed": changed, "model": model_registry.stats()})
+
+    if not model_registry.reload_async(force=request.args.get("force") in ("1", "true")):
+        return jsonify({"message": "Yükleme zaten sürüyor", "model": model_registry.stats()}), 409
+    return jsonify({"message": "Yükleme başlatıldı", "model": model_registry.stats()}), 202
+
 @app.route("/test-predict", methods=["POST"])
 def test_predict():
     """Test için basit tahmin endpoint'i"""
-    if model is None:
+    bundle = model_registry.current
+    if bundle is None:
         return jsonify({"error": "Model yüklenmemiş"}), 500
     
     try:
@@ -481,14 +1174,7 @@ def test_predict():
             28.9784  # LONGITUDE
         ]
         
-        feature_names = [
-            "hour", "day_of_week", "is_weekend", "month",
-            "MINIMUM_SPEED", "MAXIMUM_SPEED", "NUMBER_OF_VEHICLES",
-            "LATITUDE", "LONGITUDE"
-        ]
-        
-        features_df = pd.DataFrame([test_features], columns=feature_names)
-        prediction = model.predict(features_df)[0]
+        prediction = bundle.model.predict(feature_row(test_features))[0]
         
         return jsonify({
             "test_features": test_features,
@@ -500,340 +1186,922 @@ def test_predict():
         return jsonify({"error": str(e)}), 500
 
 
+def predict_query(data):
+    """/predict gövdesinin kontrolü; hata (gövde, durum kodu) ya da None"""
+    if not isinstance(data, dict):
+        return {"error": "Veri tipi dict değil"}, 400
+    for field in ("origin", "datetime"):
+        if field not in data:
+            return {"error": f"Eksik alan: {field}"}, 400
+    return None
+
+
+def predict_payload(bundle, data, location, started):
+    """Çözülmüş başlangıç noktası için /predict yanıtı"""
+    features, feature_info = extract_features_from_request(data, location)
+
+    # Alanlar sadece DEBUG açıksa hazırlanır
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Gelen veri", extra={"fields": {"data": data, "features": features}})
+
+    # Aynı sürüm ve aynı model girdisi için sonuç önbellekten okunur
+    row = model_input(feature_row(features), bundle)
+    key = row.tobytes()
+    cached = prediction_cache.get(bundle.version, key)
+    if cached is not None:
+        prediction, traffic_info = cached
+        source = "cache"
+    else:
+        hit = lookup_prediction(feature_info, bundle)
+        if hit is not None:
+            prediction = hit[0]
+            source = "table"
+        else:
+            # Döküm log thread'inde ve örneklenerek üretilir
+            if dump_logger.isEnabledFor(logging.DEBUG):
+                dump_logger.debug("Özellik satırı", extra={"fields": {
+                    "features": dict(zip(FEATURE_NAMES, features))
+                }})
+
+            # Satır model_input'ta ölçeklendi (scaler varsa)
+            prediction = bundle.model.predict(row)[0]
+            source = "model" if bundle.scaler_params is not None else "model_unscaled"
+
+        # Model çıktısından trafik bilgisini dinamik olarak oluştur
+        prediction = int(prediction)
+        traffic_info = get_traffic_info_from_prediction(prediction, feature_info)
+        prediction_cache.put(bundle.version, key, (prediction, traffic_info))
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Tahmin yapıldı", extra={"fields": {
+            "traffic_level": int(prediction),
+            "source": source,
+            "model_version": bundle.version,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3)
+        }})
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Trafik info", extra={"fields": {"traffic_info": traffic_info}})
+
+    return {
+        "traffic_level": int(prediction),
+        "traffic_info": traffic_info,
+        "input_features": feature_info,
+        "model_version": bundle.version,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @app.route("/predict", methods=["POST"])
 def predict():
-    if model is None:
+    # İstek boyunca aynı sürüm kullanılır; yeniden yükleme bu isteği etkilemez
+    bundle = model_registry.current
+    if bundle is None:
         return jsonify({"error": "Model yüklenmemiş. Lütfen önce modeli eğitin."}), 500
 
     try:
+        started = time.perf_counter()
         data = request.get_json()
-        if not isinstance(data, dict):
-            return jsonify({"error": "Veri tipi dict değil"}), 400
+        error = predict_query(data)
+        if error is not None:
+            return respond(error)
 
-        required_fields = ["origin", "datetime"]
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"Eksik alan: {field}"}), 400
+        # Adresten koordinat al (Google Geocoding API)
+        return jsonify(predict_payload(bundle, data, resolve_origin(data["origin"]), started))
 
-        features, feature_info = extract_features_from_request(data)
+    except Exception as e:
+        logger.exception("Tahmin yapılırken hata oluştu")
+        return jsonify({"error": f"Tahmin yapılırken hata oluştu: {str(e)}"}), 500
 
-        feature_names = [
-            "hour", "day_of_week", "is_weekend", "month",
-            "MINIMUM_SPEED", "MAXIMUM_SPEED", "NUMBER_OF_VEHICLES",
-            "LATITUDE", "LONGITUDE"
-        ]
-        features_df = pd.DataFrame([features], columns=feature_names)
 
-        print("🔍 Gelen veri:", data)
-        print("🔍 Çıkarılan özellikler:", features)
-        print("🔍 Özellik DataFrame:")
-        print(features_df)
-        
-        # Ölçeklendirme varsa uygula
-        if scaler is not None:
-            features_scaled = scaler.transform(features_df)
-            prediction = model.predict(features_scaled)[0]
-            print("✅ Özellikler ölçeklendirildi")
+def batch_query(data):
+    """/predict/batch gövdesindeki kayıtlar; (kayıtlar, hata)"""
+    items = data.get("requests") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return None, ({"error": "Veri bir liste ya da 'requests' listesi içermeli"}, 400)
+    if len(items) > MAX_BATCH_SIZE:
+        return None, ({"error": f"En fazla {MAX_BATCH_SIZE} kayıt gönderilebilir"}, 413)
+    return items, None
+
+
+def batch_payload(bundle, items, locations):
+    """/predict/batch yanıtı; locations adres -> (lat, lng), eksik adresler burada çözülür"""
+    results = [None] * len(items)
+    rows, row_indices, row_infos = [], [], []
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {"index": index, "error": "Veri tipi dict değil"}
+            continue
+        missing = [field for field in ("origin", "datetime") if field not in item]
+        if missing:
+            results[index] = {"index": index, "error": f"Eksik alan: {missing[0]}"}
+            continue
+        try:
+            origin = item["origin"]
+            if origin not in locations:
+                locations[origin] = resolve_origin(origin)
+            features, feature_info = extract_features_from_request(item, locations[origin])
+        except Exception as e:
+            results[index] = {"index": index, "error": f"Özellik çıkarılamadı: {str(e)}"}
+            continue
+        rows.append(features)
+        row_indices.append(index)
+        row_infos.append(feature_info)
+
+    # Tabloda olanlar doğrudan okunur, kalanlar tek model çağrısıyla skorlanır
+    predictions = [lookup_prediction(feature_info, bundle) for feature_info in row_infos]
+    misses = [i for i, hit in enumerate(predictions) if hit is None]
+    if misses:
+        matrix = np.asarray([rows[i] for i in misses], dtype=np.float64)
+        probabilities = predict_proba_matrix(matrix, bundle)
+        levels = bundle.model.classes_.take(np.argmax(probabilities, axis=1))
+        for i, level, proba in zip(misses, levels, probabilities):
+            predictions[i] = (int(level), proba)
+
+    for index, (level, proba), feature_info in zip(row_indices, predictions, row_infos):
+        results[index] = {
+            "index": index,
+            "traffic_level": level,
+            "traffic_info": get_traffic_info_from_prediction(level, feature_info),
+            "probabilities": [round(float(p), 4) for p in proba],
+            "input_features": feature_info
+        }
+
+    return {
+        "results": results,
+        "count": len(results),
+        "error_count": len(results) - len(rows),
+        "model_version": bundle.version,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """Birden fazla (origin, datetime) çiftini tek model çağrısıyla tahmin et"""
+    bundle = model_registry.current
+    if bundle is None:
+        return jsonify({"error": "Model yüklenmemiş. Lütfen önce modeli eğitin."}), 500
+
+    try:
+        items, error = batch_query(request.get_json())
+        if error is not None:
+            return respond(error)
+        # Aynı adres batch içinde bir kez çözülür
+        return jsonify(batch_payload(bundle, items, {}))
+
+    except Exception as e:
+        logger.exception("Toplu tahmin yapılırken hata oluştu")
+        return jsonify({"error": f"Toplu tahmin yapılırken hata oluştu: {str(e)}"}), 500
+
+
+def profile_query(args):
+    """/predict/profile parametreleri; (origin, dilimler, saatler, günler, aylar, adım, süre) ve hata"""
+    origin = args.get("origin")
+    if not origin:
+        return None, ({"error": "Eksik alan: origin"}, 400)
+    try:
+        if "from" in args:
+            start = parse_datetime(args["from"])
         else:
-            prediction = model.predict(features_df)[0]
-            print("⚠️ Ölçeklendirme yapılmadı")
+            start = datetime.now().replace(second=0, microsecond=0)
+        if "to" in args:
+            end = parse_datetime(args["to"])
+        else:
+            end = start + timedelta(hours=PROFILE_DEFAULT_HOURS)
+        step = parse_step(args.get("step", PROFILE_DEFAULT_STEP))
+        duration = parse_step(args.get("duration", PROFILE_TRIP_MINUTES))
+    except ValueError as e:
+        return None, ({"error": str(e)}, 400)
 
-        # Model çıktısından trafik bilgisini dinamik olarak oluştur
-        traffic_info = get_traffic_info_from_prediction(int(prediction), feature_info)
+    if (end - start).total_seconds() / 60 / step > MAX_PROFILE_SLOTS:
+        return None, ({"error": f"En fazla {MAX_PROFILE_SLOTS} zaman dilimi istenebilir"}, 413)
+    slots, hours, days, months = time_slots(start, end, step)
+    if not len(slots):
+        return None, ({"error": "'to', 'from'dan sonra olmalı"}, 400)
+    return (origin, slots, hours, days, months, step, duration), None
 
-        print("🎯 Tahmin edilen trafik seviyesi:", prediction)
-        print("🎯 Trafik info:", traffic_info)
 
-        result = {
-            "traffic_level": int(prediction),
-            "traffic_info": traffic_info,
-            "input_features": feature_info,
-            "timestamp": datetime.now().isoformat()
+def profile_payload(bundle, query, location):
+    """Çözülmüş başlangıç noktası için /predict/profile yanıtı"""
+    origin, slots, hours, days, months, step, duration = query
+    lat, lng = location
+    levels, probabilities, source = predict_slots(bundle, hours, days, months, lat, lng)
+
+    first, window, expected_level = best_departure_window(probabilities, bundle.model.classes_,
+                                                          -(-duration // step))
+    window_probabilities = probabilities[first:first + window].mean(axis=0)
+    times = np.datetime_as_string(slots, unit="m").tolist()
+    window_end = np.datetime_as_string(slots[first + window - 1] + np.timedelta64(step, "m"), unit="m")
+
+    return {
+        "origin": origin,
+        "latitude": lat,
+        "longitude": lng,
+        "location_name": location_name(lat, lng),
+        "step_minutes": step,
+        "count": len(times),
+        "source": source,
+        "slots": [
+            {"time": time_text, "traffic_level": level, "probabilities": proba}
+            for time_text, level, proba in zip(
+                times, levels.tolist(), np.round(probabilities.astype(np.float64), 4).tolist()
+            )
+        ],
+        "best_window": {
+            "start": times[first],
+            "end": str(window_end),
+            "duration_minutes": window * step,
+            "traffic_level": int(bundle.model.classes_[np.argmax(window_probabilities)]),
+            "expected_level": round(expected_level, 4),
+            "probabilities": [round(float(p), 4) for p in window_probabilities]
+        },
+        "model_version": bundle.version,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.route("/predict/profile", methods=["GET"])
+def predict_profile():
+    """Bir zaman aralığındaki tüm dilimleri tek model çağrısıyla tahmin et, en iyi çıkış penceresini bul"""
+    bundle = model_registry.current
+    if bundle is None:
+        return jsonify({"error": "Model yüklenmemiş. Lütfen önce modeli eğitin."}), 500
+
+    try:
+        query, error = profile_query(request.args)
+        if error is not None:
+            return respond(error)
+        return jsonify(profile_payload(bundle, query, resolve_origin(query[0])))
+
+    except Exception as e:
+        logger.exception("Profil tahmini yapılırken hata oluştu")
+        return jsonify({"error": f"Profil tahmini yapılırken hata oluştu: {str(e)}"}), 500
+
+
+def route_query(data):
+    """/predict/route gövdesi; (tarih-saat, adres çözülmeli mi) ve hata"""
+    if not isinstance(data, dict):
+        return None, ({"error": "Veri tipi dict değil"}, 400)
+    if "datetime" not in data:
+        return None, ({"error": "Eksik alan: datetime"}, 400)
+    dt = parse_datetime(data["datetime"])
+
+    # Polyline verildiyse o kullanılır, yoksa başlangıç ve varış arasında doğrusal örnekleme
+    if data.get("polyline"):
+        return (dt, False), None
+    for field in ("origin", "destination"):
+        if field not in data:
+            return None, ({"error": f"Eksik alan: {field}"}, 400)
+    return (dt, True), None
+
+
+def route_payload(bundle, data, dt, origin=None, destination=None):
+    """/predict/route yanıtı; polyline yoksa çözülmüş başlangıç ve varış noktasıyla. (gövde, durum kodu)"""
+    if data.get("polyline"):
+        try:
+            points = route.decode_polyline(data["polyline"])
+        except (ValueError, TypeError) as e:
+            return {"error": f"Polyline çözülemedi: {str(e)}"}, 400
+        if len(points) < 2:
+            return {"error": "Polyline en az iki nokta içermeli"}, 400
+    else:
+        if destination[0] is None:
+            return {"error": "Varış noktası bulunamadı"}, 400
+        count = data.get("points") or route.default_point_count(origin, destination, ROUTE_MAX_SEGMENT_KM)
+        if not isinstance(count, int) or count < 2:
+            return {"error": "points en az 2 olan bir tam sayı olmalı"}, 400
+        points = route.interpolate(origin, destination, min(count, MAX_ROUTE_POINTS))
+
+    # Sınır ara noktalar üretilmeden kontrol edilir: çok uzun parçalar milyonlarca satır ayırtmasın
+    if len(points) > MAX_ROUTE_POINTS or route.densified_count(points, ROUTE_MAX_SEGMENT_KM) > MAX_ROUTE_POINTS:
+        return {"error": f"Rota en fazla {MAX_ROUTE_POINTS} noktaya bölünebilir"}, 413
+    points = route.densify(points, ROUTE_MAX_SEGMENT_KM)
+
+    cells, centers, segment_cells, lengths = route.route_cells(points, ROUTE_GEOHASH_PRECISION)
+    cell_probabilities, scored = predict_cells(bundle, centers, dt.hour, dt.weekday(), dt.month)
+    classes = bundle.model.classes_
+    cell_levels = classes.take(np.argmax(cell_probabilities, axis=1))
+
+    segments = []
+    for start, end in route.cell_runs(segment_cells):
+        cell = segment_cells[start]
+        segments.append({
+            "cell": cells[cell],
+            "start": points[start].tolist(),
+            "end": points[end].tolist(),
+            "distance_km": round(float(lengths[start:end].sum()), 3),
+            "traffic_level": int(cell_levels[cell]),
+            "probabilities": [round(p, 4) for p in cell_probabilities[cell].tolist()]
+        })
+
+    # Her parça uzunluğu kadar ağırlık alır (rota tek noktaysa eşit ağırlık)
+    distance = float(lengths.sum())
+    weights = lengths / distance if distance > 0 else np.full(len(lengths), 1 / len(lengths))
+    segment_probabilities = cell_probabilities[segment_cells]
+    aggregate = weights @ segment_probabilities
+    level_distances = np.bincount(np.searchsorted(classes, cell_levels[segment_cells]),
+                                  weights=lengths, minlength=len(classes))
+
+    return {
+        "distance_km": round(distance, 3),
+        "point_count": len(points),
+        "cell_count": len(cells),
+        "scored_cells": scored,
+        "segments": segments,
+        "aggregate": {
+            "traffic_level": int(classes[np.argmax(aggregate)]),
+            "expected_level": round(float(aggregate @ classes.astype(np.float64)), 4),
+            "probabilities": [round(p, 4) for p in aggregate.tolist()],
+            "distance_km_by_level": {
+                str(level): round(km, 3) for level, km in zip(classes.tolist(), level_distances.tolist())
+            }
+        },
+        "input_features": {
+            "hour": dt.hour,
+            "day_of_week": dt.weekday(),
+            "month": dt.month
+        },
+        "model_version": bundle.version,
+        "timestamp": datetime.now().isoformat()
+    }, 200
+
+
+@app.route("/predict/route", methods=["POST"])
+def predict_route():
+    """Rota boyunca hücre hücre trafik tahmini ve mesafe ağırlıklı toplam seviye"""
+    bundle = model_registry.current
+    if bundle is None:
+        return jsonify({"error": "Model yüklenmemiş. Lütfen önce modeli eğitin."}), 500
+
+    try:
+        data = request.get_json()
+        query, error = route_query(data)
+        if error is not None:
+            return respond(error)
+        dt, resolve = query
+        origin = destination = None
+        if resolve:
+            origin = resolve_origin(data["origin"])
+            destination = get_lat_lng_from_address(data["destination"])
+        return respond(route_payload(bundle, data, dt, origin, destination))
+
+    except Exception as e:
+        logger.exception("Rota tahmini yapılırken hata oluştu")
+        return jsonify({"error": f"Rota tahmini yapılırken hata oluştu: {str(e)}"}), 500
+
+
+def parse_grid_hour(value):
+    """/grid/<hour> değeri: şimdiki saate göre ofset (0, 1, ...) ya da ISO tarih-saat"""
+    if value.isdigit():
+        return grid_store.current_hour() + np.timedelta64(int(value), "h")
+    return np.datetime64(parse_datetime(value).replace(tzinfo=None), "h")
+
+
+def not_modified(etag, cache_control=GRID_CACHE_CONTROL):
+    """İstemcideki kopya güncelse (If-None-Match) 304 yanıtı, değilse None"""
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = cache_control
+        return response
+    return None
+
+
+def grid_request(hour):
+    """(etkin sürüm, saat) ya da hata yanıtı"""
+    bundle = model_registry.current
+    if bundle is None:
+        return None, (jsonify({"error": "Model yüklenmemiş. Lütfen önce modeli eğitin."}), 500)
+    try:
+        moment = parse_grid_hour(hour)
+    except ValueError as e:
+        return None, (jsonify({"error": f"Geçersiz saat: {str(e)}"}), 400)
+    if not grid_store.in_horizon(moment):
+        return None, (jsonify({"error": f"Izgara sadece önümüzdeki {GRID_HOURS_AHEAD} saat için hazırlanır"}), 404)
+    return (bundle, moment), None
+
+
+@app.route("/grid/<hour>", methods=["GET"])
+def traffic_grid(hour):
+    """Saatin tüm hücreleri: base64 uint8 seviyeler (ve istenirse float16 olasılıklar)"""
+    target, error = grid_request(hour)
+    if error:
+        return error
+    bundle, moment = target
+    with_probabilities = request.args.get("probabilities") in ("1", "true")
+    etag = f"{bundle.version}-{moment}-{GRID_PRECISION}{'-p' if with_probabilities else ''}"
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        grid = grid_store.get(moment)
+        payload = {
+            "hour": str(moment),
+            **grid_store.spec.describe(),
+            "classes": grid.classes.tolist(),
+            "encoding": {
+                "levels": "base64 uint8",
+                "probabilities": "base64 float16 (little-endian), hücre başına sınıf sayısı kadar",
+                "order": "satırlar güneyden kuzeye, sütunlar batıdan doğuya"
+            },
+            "levels": base64.b64encode(grid.levels.tobytes()).decode("ascii"),
+            "model_version": grid.model_version,
+            "generated_at": grid.generated_at,
+            "compute_seconds": grid.seconds
         }
+        if with_probabilities:
+            payload["probabilities"] = base64.b64encode(grid.probabilities.astype("<f2").tobytes()).decode("ascii")
+        response = jsonify(payload)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = GRID_CACHE_CONTROL
+        return response
+
+    except Exception as e:
+        logger.exception("Trafik ızgarası hazırlanırken hata oluştu")
+        return jsonify({"error": f"Trafik ızgarası hazırlanırken hata oluştu: {str(e)}"}), 500
 
-        return jsonify(result)
+
+@app.route("/grid/<hour>/<int:z>/<int:x>/<int:y>.png", methods=["GET"])
+def traffic_grid_tile(hour, z, x, y):
+    """Web Mercator (slippy map) karosu: seviyeye göre renklendirilmiş yarı saydam PNG"""
+    if not GRID_MIN_ZOOM <= z <= GRID_MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({"error": "Geçersiz karo"}), 404
+    target, error = grid_request(hour)
+    if error:
+        return error
+    bundle, moment = target
+    etag = f"{bundle.version}-{moment}-{GRID_PRECISION}-{z}-{x}-{y}"
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        grid = grid_store.get(moment)
+        key = (int(moment.astype(np.int64)), z, x, y)
+        png = tile_cache.get(grid.model_version, key)
+        if png is None:
+            png = render_tile(grid_store.spec, grid, z, x, y)
+            tile_cache.put(grid.model_version, key, png)
+        response = app.response_class(png, mimetype="image/png")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = GRID_CACHE_CONTROL
+        return response
 
     except Exception as e:
-        import traceback
-        print(traceback.format_exc())  # Hata detayını terminale yazdırır
-        return jsonify({"error": f"Tahmin yapılırken hata oluştu: {str(e)}"}), 500
+        logger.exception("Harita karosu hazırlanırken hata oluştu")
+        return jsonify({"error": f"Harita karosu hazırlanırken hata oluştu: {str(e)}"}), 500
 
 
 # Favoriler ve Geçmiş Aramalar için endpoint'ler (Database entegreli)
 
+def history_query(args):
+    """GET /search-history parametreleri; (alanlar, limit, before, after, mod) ve hata"""
+    try:
+        fields = history_pages.parse_fields(args.get("fields"))
+        limit = int(args.get("limit", HISTORY_PAGE_SIZE))
+        if not 1 <= limit <= MAX_HISTORY_PAGE_SIZE:
+            raise ValueError(f"limit 1 ile {MAX_HISTORY_PAGE_SIZE} arasında olmalı")
+        if "cursor" in args and "since" in args:
+            raise ValueError("cursor ve since birlikte kullanılamaz")
+        before = history_pages.decode_cursor(args["cursor"]) if "cursor" in args else None
+        after = history_pages.decode_cursor(args["since"]) if "since" in args else None
+    except ValueError as e:
+        return None, ({'error': str(e)}, 400)
+    mode = ("since", args["since"]) if after is not None else ("page", args.get("cursor"))
+    return (fields, limit, before, after, mode), None
+
+
+def history_page_keys(user_id, query, keys):
+    """Anahtar sorgusunun sonucu: (ETag, has_more, sayfanın anahtarları)"""
+    fields, limit, _, _, mode = query
+    # Fazladan satır da ETag'e girer: has_more değişirse yanıt da değişir
+    etag = history_pages.page_etag(user_id, fields, mode, limit, keys)
+    return etag, len(keys) > limit, keys[:limit]
+
+
+def history_payload(user_id, query, keys, rows, has_more):
+    fields, _, _, after, mode = query
+    history = [history_pages.serialize(row, fields) for row in rows]
+    if after is not None:
+        # Delta satırları eskiden yeniye okundu; liste her zaman yeniden eskiye döner
+        history.reverse()
+        newest = keys[-1] if keys else None
+        latest_cursor = mode[1] if newest is None else None
+        next_cursor = None
+    else:
+        newest = keys[0] if keys else None
+        latest_cursor = None
+        next_cursor = history_pages.encode_cursor(keys[-1][1], keys[-1][0]) if has_more else None
+    if newest is not None:
+        latest_cursor = history_pages.encode_cursor(newest[1], newest[0])
+
+    return {
+        "user_id": user_id,
+        "search_history": history,
+        "count": len(history),
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+        "latest_cursor": latest_cursor
+    }
+
+
 @app.route("/search-history", methods=["GET"])
 @token_required
 def get_search_history(current_user_id):
-    """Kullanıcının geçmiş aramalarını getir"""
+    """Kullanıcının geçmiş aramaları, yeniden eskiye sayfa sayfa
+
+    ?cursor=: önceki yanıtın next_cursor'ından eski satırlar
+    ?since=: önceki yanıtın latest_cursor'ından sonra eklenen satırlar (delta)
+    ?fields=: döndürülecek alanlar (id ve created_at her zaman döner)
+    ?limit=: sayfa boyutu
+    """
     try:
-        connection = get_db_connection()
-        if connection is None:
-            return jsonify({'error': 'Database bağlantı hatası'}), 500
+        query, error = history_query(request.args)
+        if error is not None:
+            return respond(error)
+        fields, limit, before, after, _ = query
+
+        with db_connection() as connection:
+            if connection is None:
+                return jsonify({'error': 'Database bağlantı hatası'}), 500
         
-        cursor = connection.cursor()
+            cursor = connection.cursor()
         
-        try:
-            cursor.execute("""
-                SELECT id, origin, destination, datetime, prediction_result, created_at
-                FROM search_history 
-                WHERE user_id = %s 
-                ORDER BY created_at DESC 
-                LIMIT 50
-            """, (current_user_id,))
-            
-            rows = cursor.fetchall()
-            
-            history = []
-            for row in rows:
-                history.append({
-                    "id": row[0],
-                    "origin": row[1],
-                    "destination": row[2],
-                    "datetime": row[3].isoformat() if row[3] else None,
-                    "prediction_result": row[4],
-                    "created_at": row[5].isoformat() if row[5] else None
-                })
-            
-            return jsonify({
-                "user_id": current_user_id,
-                "search_history": history,
-                "count": len(history)
-            })
+            try:
+                # 1. adım: sadece indeksten sayfanın anahtarları
+                cursor.execute(*history_pages.key_query(current_user_id, limit, before=before, after=after))
+                etag, has_more, keys = history_page_keys(current_user_id, query, cursor.fetchall())
+                cached = not_modified(etag, HISTORY_CACHE_CONTROL)
+                if cached is not None:
+                    return cached
+
+                # 2. adım: istenen sütunlar birincil anahtarla, anahtar sırasına göre
+                if keys and fields != history_pages.KEY_FIELDS:
+                    cursor.execute(*history_pages.rows_query(current_user_id, fields, [key[0] for key in keys]))
+                    rows = history_pages.in_key_order(keys, cursor.fetchall())
+                else:
+                    rows = keys
             
-        except Error as e:
-            return jsonify({'error': f'Geçmiş aramalar getirilemedi: {str(e)}'}), 500
-        finally:
-            cursor.close()
-            connection.close()
+            except Error as e:
+                return jsonify({'error': f'Geçmiş aramalar getirilemedi: {str(e)}'}), 500
+            finally:
+                cursor.close()
+
+        response = jsonify(history_payload(current_user_id, query, keys, rows, has_more))
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = HISTORY_CACHE_CONTROL
+        return response
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/search-history", methods=["POST"])
-@token_required
-def add_search_history(current_user_id):
-    """Yeni arama geçmişine ekle"""
-    try:
-        data = request.get_json()
-        required_fields = ["origin", "datetime"]
-        
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"Eksik alan: {field}"}), 400
-        
-        connection = get_db_connection()
+def insert_search_history_rows(rows):
+    """Kuyruktan gelen arama kayıtlarını tek executemany ile yaz"""
+    with db_connection() as connection:
         if connection is None:
-            return jsonify({'error': 'Database bağlantı hatası'}), 500
-        
+            raise ConnectionError("Database bağlantı hatası")
         cursor = connection.cursor()
-        
         try:
-            # Datetime'ı MySQL formatına çevir
-            from datetime import datetime
-            iso_datetime = data["datetime"]
-            # UTC'yi yerel saat olarak işle (kullanıcının seçtiği tarih/saat)
-            if iso_datetime.endswith('Z'):
-                iso_datetime = iso_datetime[:-1]  # Z'yi kaldır
-            mysql_datetime = datetime.fromisoformat(iso_datetime).strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Arama kaydını database'e ekle
-            cursor.execute("""
-                INSERT INTO search_history (user_id, origin, destination, datetime, prediction_result)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                current_user_id,
-                data["origin"],
-                data.get("destination", ""),
-                mysql_datetime,
-                json.dumps(data.get("prediction_result", None))
-            ))
-            
+            # created_at isteğin alındığı zamandır, diskten tekrar yazılan satırlar da korur;
+            # bu alan eklenmeden önce diske dökülmüş satırlarda yazma zamanı kullanılır
+            cursor.executemany("""
+                INSERT INTO search_history (user_id, origin, destination, datetime, prediction_result, created_at)
+                VALUES (%s, %s, %s, %s, %s, COALESCE(%s, CURRENT_TIMESTAMP))
+            """, [tuple(row) + (None,) * (6 - len(row)) for row in rows])
             connection.commit()
-            search_id = cursor.lastrowid
-            
-            return jsonify({
-                "message": "Arama geçmişe eklendi",
-                "search_id": search_id
-            })
-            
-        except Error as e:
-            return jsonify({'error': f'Arama geçmişe eklenemedi: {str(e)}'}), 500
         finally:
             cursor.close()
-            connection.close()
+
+
+history_writer = HistoryWriter(
+    insert_search_history_rows,
+    max_queue=HISTORY_QUEUE_SIZE,
+    batch_size=HISTORY_BATCH_SIZE,
+    flush_interval=HISTORY_FLUSH_INTERVAL,
+    spill_path=HISTORY_SPILL_PATH,
+    # Bağlantı hataları tekrar denenir; veri hataları (yabancı anahtar, sütun boyu) satır satır ayrılır
+    retry_errors=(ConnectionError, PoolTimeout, mysql.connector.errors.OperationalError,
+                  mysql.connector.errors.InterfaceError),
+    dead_letter_path=HISTORY_DEAD_LETTER_PATH
+)
+atexit.register(history_writer.stop)
+
+
+def history_entry(current_user_id, data):
+    """POST /search-history gövdesinden yazılacak satır; (satır, hata)"""
+    required_fields = ["origin", "datetime"]
+    
+    for field in required_fields:
+        if field not in data:
+            return None, ({"error": f"Eksik alan: {field}"}, 400)
+    
+    # Datetime'ı MySQL formatına çevir
+    iso_datetime = data["datetime"]
+    # UTC'yi yerel saat olarak işle (kullanıcının seçtiği tarih/saat)
+    if iso_datetime.endswith('Z'):
+        iso_datetime = iso_datetime[:-1]  # Z'yi kaldır
+    try:
+        mysql_datetime = datetime.fromisoformat(iso_datetime).strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return None, ({"error": "Geçersiz tarih formatı"}, 400)
+
+    # Satır kuyruğa girip 202 döndükten sonra reddedilmesin diye sütun sınırları burada kontrol edilir
+    destination = data.get("destination", "")
+    if not isinstance(data["origin"], str) or not data["origin"]:
+        return None, ({"error": "origin boş olmayan bir metin olmalı"}, 400)
+    if destination is not None and not isinstance(destination, str):
+        return None, ({"error": "destination metin olmalı"}, 400)
+    for field, value in (("origin", data["origin"]), ("destination", destination)):
+        if value is not None and len(value) > MAX_ADDRESS_LENGTH:
+            return None, ({"error": f"{field} en fazla {MAX_ADDRESS_LENGTH} karakter olabilir"}, 400)
+
+    return [
+        current_user_id,
+        data["origin"],
+        destination,
+        mysql_datetime,
+        json.dumps(data.get("prediction_result", None)),
+        datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    ], None
+
+
+HISTORY_QUEUED = ({
+    "message": "Arama geçmişe eklenmek üzere kuyruğa alındı",
+    "queued": True
+}, 202)
+HISTORY_QUEUE_FULL = ({"error": "Arama geçmişi kuyruğu dolu, lütfen tekrar deneyin"}, 503)
+
+
+@app.route("/search-history", methods=["POST"])
+@token_required
+def add_search_history(current_user_id):
+    """Yeni aramayı geçmişe eklenmek üzere kuyruğa al"""
+    try:
+        entry, error = history_entry(current_user_id, request.get_json())
+        if error is not None:
+            return respond(error)
+        
+        # Kayıt arka planda toplu olarak yazılır
+        try:
+            history_writer.submit(entry)
+        except queue.Full:
+            response, status = respond(HISTORY_QUEUE_FULL)
+            response.headers["Retry-After"] = "1"
+            return response, status
+        
+        return respond(HISTORY_QUEUED)
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+# Favori sorguları
+FAVORITES_SQL = """
+    SELECT id, origin, destination, route_name, prediction_result, search_datetime, created_at
+    FROM favorites 
+    WHERE user_id = %s 
+    ORDER BY created_at DESC
+"""
+FAVORITE_ROUTES_SQL = """
+    SELECT id, origin, destination, route_name, created_at
+    FROM favorites
+    WHERE user_id = %s
+    ORDER BY created_at DESC
+"""
+SEARCH_RECORD_SQL = """
+    SELECT origin, destination, datetime, prediction_result
+    FROM search_history 
+    WHERE id = %s AND user_id = %s
+"""
+# LAST_INSERT_ID(id): tekrar durumunda lastrowid mevcut favorinin id'si olur
+FAVORITE_INSERT_SQL = """
+    INSERT INTO favorites (user_id, origin, destination, route_name, prediction_result, search_datetime)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
+"""
+FAVORITE_DELETE_SQL = """
+    DELETE FROM favorites 
+    WHERE id = %s AND user_id = %s
+"""
+
+
+def favorite_item(row):
+    return {
+        "id": row[0],
+        "origin": row[1],
+        "destination": row[2],
+        "route_name": row[3],
+        "prediction_result": row[4],
+        "search_datetime": row[5].isoformat() if row[5] else None,
+        "created_at": row[6].isoformat() if row[6] else None
+    }
+
+
+def favorites_payload(current_user_id, rows):
+    favorites = [favorite_item(row) for row in rows]
+    return {
+        "user_id": current_user_id,
+        "favorites": favorites,
+        "count": len(favorites)
+    }
+
+
+def favorite_values(current_user_id, data, search_record=None):
+    """FAVORITE_INSERT_SQL parametreleri: geçmiş aramadan ya da gövdeden"""
+    # Varış yoksa '' (NULL olursa uq_user_route tekrarları yakalamaz)
+    if search_record is not None:
+        route_name = data.get("route_name", f"{search_record[0]} - {search_record[1]}")
+        return (
+            current_user_id,
+            search_record[0],
+            search_record[1] or "",
+            route_name,
+            json.dumps(search_record[3]),
+            search_record[2]  # datetime from search_history
+        )
+    route_name = data.get("route_name", f"{data['origin']} - {data['destination']}")
+    return (
+        current_user_id,
+        data["origin"],
+        data["destination"] or "",
+        route_name,
+        json.dumps(data.get("prediction_result", None)),
+        None  # No search datetime for direct add
+    )
+
+
+def favorite_query(data):
+    """POST /favorites gövdesinin kontrolü (geçmiş aramadan eklemede search_id yeterli); hata ya da None"""
+    if "search_id" in data:
+        return None
+    for field in ("origin", "destination"):
+        if field not in data:
+            return {"error": f"Eksik alan: {field}"}, 400
+    return None
+
+
+def favorite_inserted(rowcount, lastrowid):
+    """FAVORITE_INSERT_SQL sonucu: etkilenen satır 1 ise yeni, 0 ise zaten vardı"""
+    if rowcount == 0:
+        return {"error": "Bu rota zaten favorilerde", "favorite_id": lastrowid}, 400
+    return {
+        "message": "Favori eklendi",
+        "favorite_id": lastrowid
+    }, 200
+
+
+def favorite_deleted(rowcount, favorite_id):
+    if rowcount == 0:
+        return {"error": "Favori bulunamadı"}, 404
+    return {
+        "message": "Favori silindi",
+        "favorite_id": favorite_id
+    }, 200
+
+
 @app.route("/favorites", methods=["GET"])
 @token_required
 def get_favorites(current_user_id):
     """Kullanıcının favorilerini getir"""
     try:
-        connection = get_db_connection()
-        if connection is None:
-            return jsonify({'error': 'Database bağlantı hatası'}), 500
+        with db_connection() as connection:
+            if connection is None:
+                return jsonify({'error': 'Database bağlantı hatası'}), 500
         
-        cursor = connection.cursor()
+            cursor = connection.cursor()
         
-        try:
-            cursor.execute("""
-                SELECT id, origin, destination, route_name, prediction_result, search_datetime, created_at
-                FROM favorites 
-                WHERE user_id = %s 
-                ORDER BY created_at DESC
-            """, (current_user_id,))
-            
-            rows = cursor.fetchall()
-            
-            favorites = []
-            for row in rows:
-                favorites.append({
-                    "id": row[0],
-                    "origin": row[1],
-                    "destination": row[2],
-                    "route_name": row[3],
-                    "prediction_result": row[4],
-                    "search_datetime": row[5].isoformat() if row[5] else None,
-                    "created_at": row[6].isoformat() if row[6] else None
-                })
-            
-            return jsonify({
-                "user_id": current_user_id,
-                "favorites": favorites,
-                "count": len(favorites)
-            })
+            try:
+                cursor.execute(FAVORITES_SQL, (current_user_id,))
+                return jsonify(favorites_payload(current_user_id, cursor.fetchall()))
             
-        except Error as e:
-            return jsonify({'error': f'Favoriler getirilemedi: {str(e)}'}), 500
-        finally:
-            cursor.close()
-            connection.close()
+            except Error as e:
+                return jsonify({'error': f'Favoriler getirilemedi: {str(e)}'}), 500
+            finally:
+                cursor.close()
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/favorites", methods=["POST"])
+def favorites_forecast_payload(current_user_id, rows, snapshot):
+    """FAVORITE_ROUTES_SQL satırları ve hepsini içeren snapshot ile /favorites/forecast yanıtı"""
+    slots = snapshot.start + np.arange(snapshot.hours) * np.timedelta64(1, "h")
+    times = np.datetime_as_string(slots, unit="m").tolist()
+    first = snapshot.start.astype(datetime)
+    day_of_week = first.weekday()
+    feature_info = dict(
+        get_traffic_parameters(first.hour, day_of_week, day_of_week >= 5),
+        hour=first.hour,
+        is_weekend=day_of_week >= 5
+    )
+
+    favorites = []
+    for favorite_id, origin, destination, route_name, created_at in rows:
+        position = snapshot.index[origin]
+        levels = snapshot.levels[position].tolist()
+        lat, lng = snapshot.locations[position].tolist()
+        favorites.append({
+            "id": favorite_id,
+            "origin": origin,
+            "destination": destination,
+            "route_name": route_name,
+            "created_at": created_at.isoformat() if created_at else None,
+            "latitude": lat,
+            "longitude": lng,
+            "traffic_level": levels[0],
+            "prediction": get_traffic_info_from_prediction(levels[0], feature_info),
+            "forecast": [
+                {"time": time_text, "traffic_level": level, "probabilities": proba}
+                for time_text, level, proba in zip(
+                    times, levels, np.round(snapshot.probabilities[position].astype(np.float64), 4).tolist()
+                )
+            ]
+        })
+
+    return {
+        "user_id": current_user_id,
+        "favorites": favorites,
+        "count": len(favorites),
+        "step_minutes": 60,
+        "computed_at": snapshot.computed_at,
+        "model_version": snapshot.model_version,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.route("/favorites/forecast", methods=["GET"])
 @token_required
-def add_favorite(current_user_id):
-    """Favori ekle (geçmiş aramalardan veya direkt)"""
+def get_favorites_forecast(current_user_id):
+    """Kullanıcının tüm favorileri ve önceden hesaplanmış saatlik trafik seviyeleri"""
+    bundle = model_registry.current
+    if bundle is None:
+        return jsonify({"error": "Model yüklenmemiş. Lütfen önce modeli eğitin."}), 500
+
     try:
-        data = request.get_json()
-        
-        # Geçmiş aramalardan ekleme
-        if "search_id" in data:
-            search_id = data["search_id"]
-            
-            connection = get_db_connection()
+        with db_connection() as connection:
             if connection is None:
                 return jsonify({'error': 'Database bağlantı hatası'}), 500
-            
+
             cursor = connection.cursor()
-            
+
             try:
-                # Arama geçmişinden kaydı al
-                cursor.execute("""
-                    SELECT origin, destination, datetime, prediction_result
-                    FROM search_history 
-                    WHERE id = %s AND user_id = %s
-                """, (search_id, current_user_id))
-                
-                search_record = cursor.fetchone()
-                
-                if not search_record:
-                    return jsonify({"error": "Arama kaydı bulunamadı"}), 404
-                
-                # Zaten favorilerde var mı kontrol et
-                cursor.execute("""
-                    SELECT id FROM favorites 
-                    WHERE user_id = %s AND origin = %s AND destination = %s
-                """, (current_user_id, search_record[0], search_record[1]))
-                
-                if cursor.fetchone():
-                    return jsonify({"error": "Bu rota zaten favorilerde"}), 400
-                
-                # Favori ekle
-                route_name = data.get("route_name", f"{search_record[0]} - {search_record[1]}")
-                cursor.execute("""
-                    INSERT INTO favorites (user_id, origin, destination, route_name, prediction_result, search_datetime)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    current_user_id,
-                    search_record[0],
-                    search_record[1],
-                    route_name,
-                    json.dumps(search_record[3]),
-                    search_record[2]  # datetime from search_history
-                ))
-                
-                connection.commit()
-                favorite_id = cursor.lastrowid
-                
-                return jsonify({
-                    "message": "Favori eklendi",
-                    "favorite_id": favorite_id
-                })
-                
+                cursor.execute(FAVORITE_ROUTES_SQL, (current_user_id,))
+                rows = cursor.fetchall()
             except Error as e:
-                return jsonify({'error': f'Favori eklenemedi: {str(e)}'}), 500
+                return jsonify({'error': f'Favoriler getirilemedi: {str(e)}'}), 500
             finally:
                 cursor.close()
-                connection.close()
-        
-        # Direkt favori ekleme
-        else:
-            required_fields = ["origin", "destination"]
-            
-            for field in required_fields:
-                if field not in data:
-                    return jsonify({"error": f"Eksik alan: {field}"}), 400
-            
-            connection = get_db_connection()
+
+        snapshot = favorites_forecaster.forecast([row[1] for row in rows])
+        return jsonify(favorites_forecast_payload(current_user_id, rows, snapshot))
+
+    except Exception as e:
+        logger.exception("Favori tahminleri getirilirken hata oluştu")
+        return jsonify({"error": f"Favori tahminleri getirilemedi: {str(e)}"}), 500
+
+
+def insert_favorite(connection, cursor, values):
+    """Tek sorguda ekle ya da mevcut favoriyi bul"""
+    cursor.execute(FAVORITE_INSERT_SQL, values)
+    connection.commit()
+    return respond(favorite_inserted(cursor.rowcount, cursor.lastrowid))
+
+
+@app.route("/favorites", methods=["POST"])
+@token_required
+def add_favorite(current_user_id):
+    """Favori ekle (geçmiş aramalardan veya direkt)"""
+    try:
+        data = request.get_json()
+        error = favorite_query(data)
+        if error is not None:
+            return respond(error)
+
+        with db_connection() as connection:
             if connection is None:
                 return jsonify({'error': 'Database bağlantı hatası'}), 500
-            
+        
             cursor = connection.cursor()
-            
+        
             try:
-                # Zaten favorilerde var mı kontrol et
-                cursor.execute("""
-                    SELECT id FROM favorites 
-                    WHERE user_id = %s AND origin = %s AND destination = %s
-                """, (current_user_id, data["origin"], data["destination"]))
-                
-                if cursor.fetchone():
-                    return jsonify({"error": "Bu rota zaten favorilerde"}), 400
-                
-                # Favori ekle
-                route_name = data.get("route_name", f"{data['origin']} - {data['destination']}")
-                cursor.execute("""
-                    INSERT INTO favorites (user_id, origin, destination, route_name, prediction_result, search_datetime)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    current_user_id,
-                    data["origin"],
-                    data["destination"],
-                    route_name,
-                    json.dumps(data.get("prediction_result", None)),
-                    None  # No search datetime for direct add
-                ))
-                
-                connection.commit()
-                favorite_id = cursor.lastrowid
-                
-                return jsonify({
-                    "message": "Favori eklendi",
-                    "favorite_id": favorite_id
-                })
-                
+                search_record = None
+                # Geçmiş aramalardan ekleme: kaydı arama geçmişinden al
+                if "search_id" in data:
+                    cursor.execute(SEARCH_RECORD_SQL, (data["search_id"], current_user_id))
+                    search_record = cursor.fetchone()
+                    if not search_record:
+                        return jsonify({"error": "Arama kaydı bulunamadı"}), 404
+            
+                # Favori ekle (aynı rota varsa uq_user_route eklemeyi engeller)
+                return insert_favorite(connection, cursor, favorite_values(current_user_id, data, search_record))
+            
             except Error as e:
                 return jsonify({'error': f'Favori eklenemedi: {str(e)}'}), 500
             finally:
                 cursor.close()
-                connection.close()
                 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -844,47 +2112,46 @@ def add_favorite(current_user_id):
 def remove_favorite(current_user_id, favorite_id):
     """Favori sil"""
     try:
-        connection = get_db_connection()
-        if connection is None:
-            return jsonify({'error': 'Database bağlantı hatası'}), 500
+        with db_connection() as connection:
+            if connection is None:
+                return jsonify({'error': 'Database bağlantı hatası'}), 500
         
-        cursor = connection.cursor()
+            cursor = connection.cursor()
         
-        try:
-            # Favori var mı kontrol et ve sil
-            cursor.execute("""
-                DELETE FROM favorites 
-                WHERE id = %s AND user_id = %s
-            """, (favorite_id, current_user_id))
-            
-            if cursor.rowcount == 0:
-                return jsonify({"error": "Favori bulunamadı"}), 404
-            
-            connection.commit()
-            
-            return jsonify({
-                "message": "Favori silindi",
-                "favorite_id": favorite_id
-            })
+            try:
+                # Favori var mı kontrol et ve sil
+                cursor.execute(FAVORITE_DELETE_SQL, (favorite_id, current_user_id))
+                if cursor.rowcount:
+                    connection.commit()
+                return respond(favorite_deleted(cursor.rowcount, favorite_id))
             
-        except Error as e:
-            return jsonify({'error': f'Favori silinemedi: {str(e)}'}), 500
-        finally:
-            cursor.close()
-            connection.close()
+            except Error as e:
+                return jsonify({'error': f'Favori silinemedi: {str(e)}'}), 500
+            finally:
+                cursor.close()
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-if __name__ == "__main__":
+def start_services():
+    """Şema göçleri, model ve arka plan thread'leri; model yüklenemezse False"""
     # Database tablolarını oluştur
     if create_tables():
         print("✅ Database tabloları hazır")
     else:
         print("⚠️ Database tabloları oluşturulamadı, devam ediliyor...")
-    
-    if load_model():
+
+    if not load_model():
+        return False
+    model_registry.start_watching()
+    grid_store.start()
+    favorites_forecaster.start()
+    return True
+
+
+if __name__ == "__main__":
+    if start_services():
         print("🚀 API başlatılıyor...")
         app.run(host="0.0.0.0", port=5050, debug=True)
     else:
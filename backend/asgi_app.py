@@ -0,0 +1,774 @@
+# Asenkron (ASGI) sunum modu: Starlette + uvicorn
+#
+# app.py'deki Flask uçları senkrondur: yavaş bir Google geocode (5 s'ye kadar)
+# ya da MySQL beklemesi, bekleme boyunca bir worker'ı tamamen bağlar. Bu modül
+# aynı uç noktaları aynı JSON gövdeleriyle tek bir olay döngüsünde sunar;
+# doğrulama ve yanıt gövdeleri app.py'deki *_query / *_payload
+# fonksiyonlarından gelir, burada yalnızca G/Ç farklıdır:
+#
+# - MySQL: aiomysql havuzu (ilk kullanımda kurulur, kurulamazsa sonraki istek yeniden dener)
+# - Geocoding: keep-alive'lı httpx.AsyncClient'lar; aynı adres için eşzamanlı
+#   istekler tek API çağrısında birleşir, sonuç geocode_cache'e yazılır
+# - Model çağrıları ve büyük yanıtların JSON'a çevrilmesi: thread havuzu. Model
+#   süreç belleğinde (mmap) ve model_registry ile yerinde değiştiği için süreç
+#   havuzu yerine thread; numpy ağır işlerde GIL'i bırakır.
+# - bcrypt: mevcut süreç havuzu (password_pool); sonucu bekleyen thread'ler ayrı
+#   ve kabul sınırı kadar, böylece olay döngüsü beklemez
+#
+# G/Ç yapmayan uçlar (/, /model-info, /test-predict, /grid/..., /admin/...)
+# Flask uygulamasına a2wsgi üzerinden bırakılır. Arka plan işleri (model
+# izleme, ızgara, favori tahminleri, geçmiş yazıcı) app.py'deki gibi kendi
+# thread'lerinde senkron sürücüyle çalışır.
+#
+# Model dosyalarının olduğu dizinde:
+#   python /path/to/backend/asgi_app.py
+#   uvicorn asgi_app:app --app-dir /path/to/backend --port 5050
+#
+# Gecikme enjekte edilmiş yük testi:
+#   python /path/to/backend/benchmark.py asgi --geocode-ms 200 --db-ms 50
+
+import asyncio
+import contextlib
+import json
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import wraps
+
+import aiomysql
+import httpx
+import uvicorn
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_etags, quote_etag
+
+import app as backend
+import history_pages
+from geocode_cache import normalize_address
+from logging_setup import get_logger
+from password_pool import PasswordPoolBusy
+
+logger = get_logger("asgi")
+
+HOST = "0.0.0.0"
+PORT = 5050
+
+# Thread havuzları
+INFERENCE_WORKERS = 4  # Model çağrıları ve yanıt gövdeleri
+BLOCKING_WORKERS = backend.PASSWORD_WORKERS + backend.PASSWORD_MAX_PENDING  # password_pool'u bekleyenler
+FLASK_WORKERS = 8  # Flask'a bırakılan uçlar
+
+# aiomysql havuzu
+DB_POOL_MIN = 1
+DB_POOL_MAX = 20
+DB_POOL_RECYCLE = backend.DB_POOL_RECYCLE
+DB_ACQUIRE_TIMEOUT = backend.DB_POOL_TIMEOUT
+
+# Geocoding HTTP istemcisi
+GEOCODE_TIMEOUT = 5
+GEOCODE_MAX_CONNECTIONS = 50
+GEOCODE_CLIENT_CONNECTIONS = 10  # Bağlantılar bu büyüklükte istemcilere bölünür
+GEOCODE_KEEPALIVE = 30  # Boştaki bağlantının açık tutulacağı süre (saniye)
+
+MODEL_MISSING = "Model yüklenmemiş. Lütfen önce modeli eğitin."
+
+inference_executor = ThreadPoolExecutor(INFERENCE_WORKERS, thread_name_prefix="inference")
+blocking_executor = ThreadPoolExecutor(BLOCKING_WORKERS, thread_name_prefix="blocking")
+
+http_clients = []  # Açılışta kurulur
+_db_pool = None
+_db_pool_lock = asyncio.Lock()
+_geocoding = {}  # Adres anahtarı -> süren API çağrısı
+# httpcore havuzu her istek başında ve sonunda bağlantılarını ikili döngüyle
+# ve bağlantı başına sistem çağrısıyla tarar; 50 bağlantılı tek istemcide
+# olay döngüsü CPU'sunu bu tarama yiyordu. Bağlantılar küçük istemcilere
+# bölünür ve her boş bağlantı bu kuyrukta kendi istemcisiyle temsil edilir:
+# istek kuyruktan aldığı istemcide hiç beklemez, bağlantı yoksa burada bekler.
+_geocode_slots = asyncio.Queue()
+_stats = {
+    "geocode_calls": 0,
+    "geocode_coalesced": 0,
+    "db_errors": 0,
+    "offloaded": 0
+}
+
+
+def encode(payload):
+    """jsonify ile aynı bayt dizisi (sıralı anahtarlar, sıkışık ayırıcılar, sonda satır sonu)"""
+    return (backend.app.json.dumps(payload, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def json_response(payload, status=200, headers=None):
+    return Response(encode(payload), status, headers, media_type="application/json")
+
+
+def respond(result, headers=None):
+    """(gövde, durum kodu) ikilisini yanıta çevir"""
+    payload, status = result
+    return json_response(payload, status, headers)
+
+
+async def offload(function, *args):
+    """function(*args) gövdesini ya da (gövde, durum kodu) ikilisini thread havuzunda hesapla ve JSON'a çevir"""
+    def run():
+        result = function(*args)
+        payload, status = result if isinstance(result, tuple) else (result, 200)
+        return encode(payload), status
+
+    _stats["offloaded"] += 1
+    body, status = await asyncio.get_running_loop().run_in_executor(inference_executor, run)
+    return Response(body, status, media_type="application/json")
+
+
+def run_blocking(function, *args):
+    return asyncio.get_running_loop().run_in_executor(blocking_executor, function, *args)
+
+
+async def request_json(request):
+    """Gövdedeki JSON; çözülemezse None"""
+    try:
+        return json.loads(await request.body())
+    except ValueError:
+        return None
+
+
+def password_pool_busy(e, key="message"):
+    return json_response({key: "Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin"}, 503,
+                         {"Retry-After": str(e.retry_after)})
+
+
+def not_modified(request, etag, cache_control):
+    """İstemcideki kopya güncelse (If-None-Match) 304 yanıtı, değilse None"""
+    if parse_etags(request.headers.get("if-none-match")).contains(etag):
+        return Response(status_code=304, headers={"ETag": quote_etag(etag), "Cache-Control": cache_control})
+    return None
+
+
+def token_required(handler):
+    @wraps(handler)
+    async def decorated(request):
+        current_user_id, error = backend.authenticate(request.headers.get("Authorization"))
+        if error is not None:
+            return respond(error)
+        return await handler(request, current_user_id)
+    return decorated
+
+
+# Veritabanı
+
+async def database_pool():
+    global _db_pool
+    if _db_pool is None:
+        async with _db_pool_lock:
+            if _db_pool is None:
+                config = dict(backend.MYSQL_CONFIG)
+                config["db"] = config.pop("database")
+                _db_pool = await aiomysql.create_pool(
+                    minsize=DB_POOL_MIN, maxsize=DB_POOL_MAX, pool_recycle=DB_POOL_RECYCLE,
+                    connect_timeout=DB_ACQUIRE_TIMEOUT, **config
+                )
+    return _db_pool
+
+
+@contextlib.asynccontextmanager
+async def db_connection():
+    """Havuzdan bağlantı; alınamazsa None (app.db_connection gibi)"""
+    try:
+        pool = await database_pool()
+        connection = await asyncio.wait_for(pool.acquire(), DB_ACQUIRE_TIMEOUT)
+    except (aiomysql.Error, OSError, asyncio.TimeoutError) as e:
+        _stats["db_errors"] += 1
+        logger.error("Database bağlantı hatası", extra={"fields": {"error": str(e)}})
+        yield None
+        return
+
+    try:
+        yield connection
+    finally:
+        try:
+            # autocommit kapalı: SELECT de işlem açar ve aiomysql işlemi açık bağlantıyı
+            # havuza almayıp kapatır (her istekte yeni TCP + kimlik doğrulama). db_pool.release gibi
+            await connection.rollback()
+        except Exception:
+            connection.close()  # Durumu belirsiz bağlantı havuza dönmez
+        pool.release(connection)
+
+
+async def fetch(sql, params):
+    """Tek sorgunun satırları; bağlantı yoksa None, sorgu hatasında aiomysql.Error"""
+    async with db_connection() as connection:
+        if connection is None:
+            return None
+        cursor = await connection.cursor()
+        try:
+            await cursor.execute(sql, params)
+            return await cursor.fetchall()
+        finally:
+            await cursor.close()
+
+
+# Geocoding
+
+async def google_geocode(address):
+    """app.google_geocode'un asenkron karşılığı; sonuç yoksa None, ağ hatasında exception"""
+    try:
+        client = await _geocode_slots.get()
+        try:
+            response = await client.get(backend.GOOGLE_GEOCODE_URL,
+                                        params={"address": address, "key": backend.GOOGLE_API_KEY})
+        finally:
+            _geocode_slots.put_nowait(client)
+        response.raise_for_status()
+    except Exception as e:
+        logger.warning("Google API hatası", extra={"fields": {"address": address, "error": str(e)}})
+        raise
+    return backend.parse_geocode_response(response.json())
+
+
+# Testlerde yerel bir stub ile değiştirilebilir: asgi_app.geocoder = ...
+geocoder = google_geocode
+
+
+async def _geocode_miss(address):
+    _stats["geocode_calls"] += 1
+    try:
+        result = await geocoder(address)
+    except Exception:
+        backend.geocode_cache.failed()
+        return None, None
+    # SQLite yazımı (commit) olay döngüsünü bekletmesin
+    return await run_blocking(backend.geocode_cache.store, address, result)
+
+
+async def geocode(address):
+    """geocode_cache.get'in asenkron karşılığı; bulunamazsa (None, None)"""
+    cached = backend.geocode_cache.lookup(address)
+    if cached is not None:
+        return cached
+
+    key = normalize_address(address)
+    pending = _geocoding.get(key)
+    if pending is None:
+        pending = _geocoding[key] = asyncio.ensure_future(_geocode_miss(address))
+        pending.add_done_callback(lambda _: _geocoding.pop(key, None))
+    else:
+        _stats["geocode_coalesced"] += 1
+    # İstek iptal edilirse (istemci koptu) ortak çağrı diğerleri için sürer
+    return await asyncio.shield(pending)
+
+
+async def lat_lng_from_address(address):
+    """app.get_lat_lng_from_address: önce yer adı indeksi, sonra geocoding"""
+    match = backend.gazetteer.match(address)
+    if match is not None:
+        return match[1], match[2]
+    return await geocode(address)
+
+
+async def resolve_origin(address):
+    lat, lng = await lat_lng_from_address(address)
+    if lat is None or lng is None:
+        return backend.DEFAULT_LOCATION
+    return lat, lng
+
+
+async def resolve_all(addresses):
+    """Adres -> (lat, lng); çözülemeyenler sözlüğe girmez (senkron yol yeniden dener)"""
+    addresses = list(dict.fromkeys(addresses))
+    results = await asyncio.gather(*(resolve_origin(address) for address in addresses), return_exceptions=True)
+    return {address: result for address, result in zip(addresses, results) if not isinstance(result, Exception)}
+
+
+# Kullanıcı
+
+async def register(request):
+    try:
+        data = await request_json(request)
+        name = data.get('name')
+        email = data.get('email')
+        password = data.get('password')
+
+        if not all([name, email, password]):
+            return json_response({'message': 'Tüm alanlar gereklidir'}, 400)
+
+        try:
+            password_hash = await run_blocking(backend.password_pool.hash, password)
+        except PasswordPoolBusy as e:
+            return password_pool_busy(e)
+
+        async with db_connection() as connection:
+            if connection is None:
+                return json_response({'message': 'Database bağlantı hatası'}, 500)
+
+            cursor = await connection.cursor()
+
+            try:
+                await cursor.execute(backend.USER_INSERT_SQL, (name, email, password_hash))
+                await connection.commit()
+                return json_response({'message': 'Kullanıcı başarıyla kaydedildi'}, 201)
+
+            except aiomysql.IntegrityError:
+                return json_response({'message': 'Bu e-posta adresi zaten kullanılıyor'}, 409)
+            except aiomysql.Error as e:
+                return json_response({'message': f'Kayıt hatası: {str(e)}'}, 500)
+            finally:
+                await cursor.close()
+
+    except Exception as e:
+        return json_response({'message': f'Sunucu hatası: {str(e)}'}, 500)
+
+
+async def update_password_hash(user_id, new_hash):
+    """app.update_password_hash'in asenkron karşılığı"""
+    async with db_connection() as connection:
+        if connection is None:
+            return
+        cursor = await connection.cursor()
+        try:
+            await cursor.execute(backend.USER_REHASH_SQL, (new_hash, user_id))
+            await connection.commit()
+        except aiomysql.Error:
+            logger.exception("Şifre hash'i güncellenemedi", extra={"fields": {"user_id": user_id}})
+        finally:
+            await cursor.close()
+
+
+async def login(request):
+    try:
+        data = await request_json(request)
+        email = data.get('email')
+        password = data.get('password')
+
+        if not all([email, password]):
+            return json_response({'message': 'E-posta ve şifre gereklidir'}, 400)
+
+        try:
+            rows = await fetch(backend.USER_BY_EMAIL_SQL, (email,))
+        except aiomysql.Error as e:
+            return json_response({'message': f'Giriş hatası: {str(e)}'}, 500)
+        if rows is None:
+            return json_response({'message': 'Database bağlantı hatası'}, 500)
+        user = rows[0] if rows else None
+
+        # bcrypt beklenirken bağlantı havuzdadır
+        valid = False
+        if user:
+            try:
+                valid, new_hash = await run_blocking(backend.password_pool.check, password, user[2])
+            except PasswordPoolBusy as e:
+                return password_pool_busy(e)
+            if new_hash is not None:
+                await update_password_hash(user[0], new_hash)
+
+        if valid:
+            tokens, error = await start_session(user[0])
+            if error is not None:
+                return respond(error)
+            return json_response(backend.login_payload(user, email, tokens))
+        return json_response({'message': 'Geçersiz e-posta veya şifre'}, 401)
+
+    except Exception as e:
+        return json_response({'message': f'Sunucu hatası: {str(e)}'}, 500)
+
+
+async def start_session(user_id):
+    """app.start_session'ın asenkron karşılığı; (gövde, hata)"""
+    tokens, row = backend.issue_tokens(user_id)
+    async with db_connection() as connection:
+        if connection is None:
+            return None, ({'message': 'Database bağlantı hatası'}, 500)
+        cursor = await connection.cursor()
+        try:
+            await cursor.execute(backend.REFRESH_PURGE_SQL, (user_id, datetime.utcnow()))
+            await cursor.execute(backend.REFRESH_INSERT_SQL, row)
+            await connection.commit()
+        except aiomysql.Error as e:
+            return None, ({'message': f'Oturum hatası: {str(e)}'}, 500)
+        finally:
+            await cursor.close()
+    return tokens, None
+
+
+async def refresh_session(token):
+    """app.refresh_session'ın asenkron karşılığı"""
+    claims, error = backend.parse_refresh_token(token)
+    if error is not None:
+        return error
+
+    tokens, row = backend.issue_tokens(claims['user_id'])
+    async with db_connection() as connection:
+        if connection is None:
+            return {'message': 'Database bağlantı hatası'}, 500
+        cursor = await connection.cursor()
+        try:
+            await cursor.execute(backend.REFRESH_CONSUME_SQL, (claims['jti'], claims['user_id']))
+            if cursor.rowcount != 1:
+                return {'message': 'Geçersiz token'}, 401
+            await cursor.execute(backend.REFRESH_INSERT_SQL, row)
+            await connection.commit()
+        except aiomysql.Error as e:
+            return {'message': f'Yenileme hatası: {str(e)}'}, 500
+        finally:
+            await cursor.close()
+    return tokens, 200
+
+
+async def refresh_token(request):
+    data = await request_json(request) or {}
+    return respond(await refresh_session(data.get('refresh_token')))
+
+
+@token_required
+async def logout(request, current_user_id):
+    token, _ = backend.parse_bearer(request.headers.get("Authorization"))
+    data = await request_json(request) or {}
+    backend.revoke_access_token(token)
+    claims = backend.revoke_refresh_claims(data.get('refresh_token'), current_user_id)
+    if claims is not None:
+        async with db_connection() as connection:
+            if connection is None:
+                return json_response({'message': 'Database bağlantı hatası'}, 500)
+            cursor = await connection.cursor()
+            try:
+                await cursor.execute(backend.REFRESH_CONSUME_SQL, (claims['jti'], current_user_id))
+                await connection.commit()
+            except aiomysql.Error as e:
+                return json_response({'message': f'Çıkış hatası: {str(e)}'}, 500)
+            finally:
+                await cursor.close()
+    return json_response({'message': 'Çıkış yapıldı'})
+
+
+async def health_check(request):
+    return json_response(dict(backend.health_payload(), asgi=stats()))
+
+
+# Tahmin
+
+async def predict(request):
+    # İstek boyunca aynı sürüm kullanılır; yeniden yükleme bu isteği etkilemez
+    bundle = backend.model_registry.current
+    if bundle is None:
+        return json_response({"error": MODEL_MISSING}, 500)
+
+    try:
+        started = time.perf_counter()
+        data = await request_json(request)
+        error = backend.predict_query(data)
+        if error is not None:
+            return respond(error)
+        location = await resolve_origin(data["origin"])
+        return await offload(backend.predict_payload, bundle, data, location, started)
+
+    except Exception as e:
+        logger.exception("Tahmin yapılırken hata oluştu")
+        return json_response({"error": f"Tahmin yapılırken hata oluştu: {str(e)}"}, 500)
+
+
+async def predict_batch(request):
+    bundle = backend.model_registry.current
+    if bundle is None:
+        return json_response({"error": MODEL_MISSING}, 500)
+
+    try:
+        items, error = backend.batch_query(await request_json(request))
+        if error is not None:
+            return respond(error)
+        # Farklı adresler aynı anda çözülür; geçersiz kayıtların hatası batch_payload'da üretilir
+        locations = await resolve_all(
+            item["origin"] for item in items
+            if isinstance(item, dict) and "datetime" in item and isinstance(item.get("origin"), str)
+        )
+        return await offload(backend.batch_payload, bundle, items, locations)
+
+    except Exception as e:
+        logger.exception("Toplu tahmin yapılırken hata oluştu")
+        return json_response({"error": f"Toplu tahmin yapılırken hata oluştu: {str(e)}"}, 500)
+
+
+async def predict_profile(request):
+    bundle = backend.model_registry.current
+    if bundle is None:
+        return json_response({"error": MODEL_MISSING}, 500)
+
+    try:
+        query, error = backend.profile_query(request.query_params)
+        if error is not None:
+            return respond(error)
+        location = await resolve_origin(query[0])
+        return await offload(backend.profile_payload, bundle, query, location)
+
+    except Exception as e:
+        logger.exception("Profil tahmini yapılırken hata oluştu")
+        return json_response({"error": f"Profil tahmini yapılırken hata oluştu: {str(e)}"}, 500)
+
+
+async def predict_route(request):
+    bundle = backend.model_registry.current
+    if bundle is None:
+        return json_response({"error": MODEL_MISSING}, 500)
+
+    try:
+        data = await request_json(request)
+        query, error = backend.route_query(data)
+        if error is not None:
+            return respond(error)
+        dt, resolve = query
+        origin = destination = None
+        if resolve:
+            origin, destination = await asyncio.gather(resolve_origin(data["origin"]),
+                                                       lat_lng_from_address(data["destination"]))
+        return await offload(backend.route_payload, bundle, data, dt, origin, destination)
+
+    except Exception as e:
+        logger.exception("Rota tahmini yapılırken hata oluştu")
+        return json_response({"error": f"Rota tahmini yapılırken hata oluştu: {str(e)}"}, 500)
+
+
+# Geçmiş ve favoriler
+
+@token_required
+async def get_search_history(request, current_user_id):
+    try:
+        query, error = backend.history_query(request.query_params)
+        if error is not None:
+            return respond(error)
+        fields, limit, before, after, _ = query
+
+        async with db_connection() as connection:
+            if connection is None:
+                return json_response({'error': 'Database bağlantı hatası'}, 500)
+
+            cursor = await connection.cursor()
+
+            try:
+                # 1. adım: sadece indeksten sayfanın anahtarları
+                await cursor.execute(*history_pages.key_query(current_user_id, limit,
+                                                                      before=before, after=after))
+                etag, has_more, keys = backend.history_page_keys(current_user_id, query,
+                                                                 list(await cursor.fetchall()))
+                cached = not_modified(request, etag, backend.HISTORY_CACHE_CONTROL)
+                if cached is not None:
+                    return cached
+
+                # 2. adım: istenen sütunlar birincil anahtarla, anahtar sırasına göre
+                if keys and fields != history_pages.KEY_FIELDS:
+                    await cursor.execute(*history_pages.rows_query(current_user_id, fields,
+                                                                           [key[0] for key in keys]))
+                    rows = history_pages.in_key_order(keys, await cursor.fetchall())
+                else:
+                    rows = keys
+
+            except aiomysql.Error as e:
+                return json_response({'error': f'Geçmiş aramalar getirilemedi: {str(e)}'}, 500)
+            finally:
+                await cursor.close()
+
+        return json_response(backend.history_payload(current_user_id, query, keys, rows, has_more), 200,
+                             {"ETag": quote_etag(etag), "Cache-Control": backend.HISTORY_CACHE_CONTROL})
+
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+
+
+@token_required
+async def add_search_history(request, current_user_id):
+    try:
+        entry, error = backend.history_entry(current_user_id, await request_json(request))
+        if error is not None:
+            return respond(error)
+
+        # Kuyruk doluysa submit put_timeout kadar bekleyebilir
+        try:
+            await run_blocking(backend.history_writer.submit, entry)
+        except queue.Full:
+            return respond(backend.HISTORY_QUEUE_FULL, {"Retry-After": "1"})
+
+        return respond(backend.HISTORY_QUEUED)
+
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+
+
+@token_required
+async def get_favorites(request, current_user_id):
+    try:
+        try:
+            rows = await fetch(backend.FAVORITES_SQL, (current_user_id,))
+        except aiomysql.Error as e:
+            return json_response({'error': f'Favoriler getirilemedi: {str(e)}'}, 500)
+        if rows is None:
+            return json_response({'error': 'Database bağlantı hatası'}, 500)
+        return json_response(backend.favorites_payload(current_user_id, rows))
+
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+
+
+def favorites_forecast_body(current_user_id, rows, locations):
+    # Koordinatı önceden çözülmemiş nokta kaldıysa (snapshot arada eskidi) senkron yola düşülür
+    def locate(origin):
+        return locations[origin] if origin in locations else backend.resolve_origin(origin)
+
+    snapshot = backend.favorites_forecaster.forecast([row[1] for row in rows], locate)
+    return backend.favorites_forecast_payload(current_user_id, rows, snapshot)
+
+
+@token_required
+async def get_favorites_forecast(request, current_user_id):
+    bundle = backend.model_registry.current
+    if bundle is None:
+        return json_response({"error": MODEL_MISSING}, 500)
+
+    try:
+        try:
+            rows = await fetch(backend.FAVORITE_ROUTES_SQL, (current_user_id,))
+        except aiomysql.Error as e:
+            return json_response({'error': f'Favoriler getirilemedi: {str(e)}'}, 500)
+        if rows is None:
+            return json_response({'error': 'Database bağlantı hatası'}, 500)
+
+        # Snapshot'ta olmayan noktalar hesaplanmadan önce aynı anda çözülür
+        locations = await resolve_all(backend.favorites_forecaster.missing([row[1] for row in rows]))
+        return await offload(favorites_forecast_body, current_user_id, rows, locations)
+
+    except Exception as e:
+        logger.exception("Favori tahminleri getirilirken hata oluştu")
+        return json_response({"error": f"Favori tahminleri getirilemedi: {str(e)}"}, 500)
+
+
+@token_required
+async def add_favorite(request, current_user_id):
+    try:
+        data = await request_json(request)
+        error = backend.favorite_query(data)
+        if error is not None:
+            return respond(error)
+
+        async with db_connection() as connection:
+            if connection is None:
+                return json_response({'error': 'Database bağlantı hatası'}, 500)
+
+            cursor = await connection.cursor()
+
+            try:
+                search_record = None
+                if "search_id" in data:
+                    await cursor.execute(backend.SEARCH_RECORD_SQL, (data["search_id"], current_user_id))
+                    search_record = await cursor.fetchone()
+                    if not search_record:
+                        return json_response({"error": "Arama kaydı bulunamadı"}, 404)
+
+                await cursor.execute(backend.FAVORITE_INSERT_SQL,
+                                     backend.favorite_values(current_user_id, data, search_record))
+                await connection.commit()
+                return respond(backend.favorite_inserted(cursor.rowcount, cursor.lastrowid))
+
+            except aiomysql.Error as e:
+                return json_response({'error': f'Favori eklenemedi: {str(e)}'}, 500)
+            finally:
+                await cursor.close()
+
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+
+
+@token_required
+async def remove_favorite(request, current_user_id):
+    favorite_id = request.path_params["favorite_id"]
+    try:
+        async with db_connection() as connection:
+            if connection is None:
+                return json_response({'error': 'Database bağlantı hatası'}, 500)
+
+            cursor = await connection.cursor()
+
+            try:
+                await cursor.execute(backend.FAVORITE_DELETE_SQL, (favorite_id, current_user_id))
+                if cursor.rowcount:
+                    await connection.commit()
+                return respond(backend.favorite_deleted(cursor.rowcount, favorite_id))
+
+            except aiomysql.Error as e:
+                return json_response({'error': f'Favori silinemedi: {str(e)}'}, 500)
+            finally:
+                await cursor.close()
+
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+
+
+def stats():
+    pool = _db_pool
+    return dict(
+        _stats,
+        geocode_in_flight=len(_geocoding),
+        db_pool={"size": pool.size, "free": pool.freesize, "max": pool.maxsize} if pool is not None else None,
+        inference_workers=INFERENCE_WORKERS,
+        blocking_workers=BLOCKING_WORKERS
+    )
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_):
+    global _db_pool
+    if not backend.start_services():
+        raise RuntimeError("Model yüklenemedi. Önce modeli eğitin.")
+    limits = httpx.Limits(max_connections=GEOCODE_CLIENT_CONNECTIONS,
+                          max_keepalive_connections=GEOCODE_CLIENT_CONNECTIONS,
+                          keepalive_expiry=GEOCODE_KEEPALIVE)
+    for _ in range(-(-GEOCODE_MAX_CONNECTIONS // GEOCODE_CLIENT_CONNECTIONS)):
+        client = httpx.AsyncClient(timeout=GEOCODE_TIMEOUT, limits=limits)
+        http_clients.append(client)
+        for _ in range(GEOCODE_CLIENT_CONNECTIONS):
+            _geocode_slots.put_nowait(client)
+    try:
+        yield
+    finally:
+        for client in http_clients:
+            await client.aclose()
+        http_clients.clear()
+        while not _geocode_slots.empty():
+            _geocode_slots.get_nowait()
+        if _db_pool is not None:
+            _db_pool.close()
+            await _db_pool.wait_closed()
+            _db_pool = None
+        inference_executor.shutdown(wait=False, cancel_futures=True)
+        blocking_executor.shutdown(wait=False, cancel_futures=True)
+
+
+routes = [
+    Route("/register", register, methods=["POST"]),
+    Route("/login", login, methods=["POST"]),
+    Route("/token/refresh", refresh_token, methods=["POST"]),
+    Route("/logout", logout, methods=["POST"]),
+    Route("/health", health_check, methods=["GET"]),
+    Route("/predict", predict, methods=["POST"]),
+    Route("/predict/batch", predict_batch, methods=["POST"]),
+    Route("/predict/profile", predict_profile, methods=["GET"]),
+    Route("/predict/route", predict_route, methods=["POST"]),
+    Route("/search-history", get_search_history, methods=["GET"]),
+    Route("/search-history", add_search_history, methods=["POST"]),
+    Route("/favorites", get_favorites, methods=["GET"]),
+    Route("/favorites", add_favorite, methods=["POST"]),
+    Route("/favorites/forecast", get_favorites_forecast, methods=["GET"]),
+    Route("/favorites/{favorite_id:int}", remove_favorite, methods=["DELETE"]),
+    # Geri kalan uçlar (G/Ç yok) Flask'ta, thread havuzunda
+    Mount("/", app=WSGIMiddleware(backend.app, workers=FLASK_WORKERS))
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+    lifespan=lifespan
+)
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=HOST, port=PORT, log_config=None, access_log=False)
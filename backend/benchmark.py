@@ -0,0 +1,1660 @@
+# CrowdPredictor backend performans ölçümleri
+# Model dosyalarının (trafik_model.pkl, scaler.pkl) bulunduğu dizinden çalıştırın:
+#   python /path/to/backend/benchmark.py batch --rows 500
+
+import argparse
+import contextlib
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as backend  # noqa: E402
+
+# Geocoding API'ye gitmemek için sabit tablodaki lokasyonlar kullanılır
+ORIGINS = [
+    "Maltepe", "Kadıköy", "Üsküdar", "Beşiktaş", "Şişli", "Beyoğlu", "Fatih",
+    "Bakırköy", "Zeytinburnu", "Pendik", "Kartal", "Ataşehir", "Levent",
+    "Maslak", "Taksim", "Sultanahmet", "Eminönü"
+]
+
+
+def random_requests(count, seed=42):
+    """Rastgele (origin, datetime) istekleri üret"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "origin": f"{rng.choice(ORIGINS)}, İstanbul",
+            "destination": f"{rng.choice(ORIGINS)}, İstanbul",
+            "datetime": (start + timedelta(minutes=15 * rng.randrange(4 * 24 * 365))).isoformat()
+        }
+        for _ in range(count)
+    ]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(title, latencies, rows):
+    total = sum(latencies)
+    print(f"{title:<28} {rows / total:>12,.0f} satır/sn   "
+          f"p50 {percentile(latencies, 50) * 1000:8.2f} ms   "
+          f"p99 {percentile(latencies, 99) * 1000:8.2f} ms")
+
+
+def load_backend():
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        if not backend.load_model():
+            sys.exit("❌ Model yüklenemedi, komutu model dosyalarının olduğu dizinde çalıştırın")
+    return backend.app.test_client()
+
+
+def use_fake_database(fetchone=None, fetchall=()):
+    """db_connection'ı sabit satırlar döndüren bir bağlantıyla değiştir; çalıştırılan sorguları döndür
+
+    MySQL olmadan da endpoint'lerin veritabanı dışındaki maliyeti ölçülebilsin diye.
+    """
+    executed = []
+
+    class Cursor:
+        def execute(self, query, params=None):
+            executed.append((" ".join(query.split()), params))
+
+        def fetchone(self):
+            return fetchone
+
+        def fetchall(self):
+            return fetchall
+
+        def close(self):
+            pass
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            pass
+
+    backend.db_connection = contextlib.contextmanager(lambda: (yield Connection()))
+    return executed
+
+
+def use_memory_database(schema):
+    """db_connection'ı schema ile kurulan bellek içi bir SQLite veritabanına yönlendir
+
+    MySQL olmadan satır kilidine dayanan davranışlar (ör. tek kullanımlık yenileme token'ı) denenebilsin
+    diye; bağlantı thread'ler arasında paylaşılır ve her sorgu tek kilit altında çalışır.
+    """
+    import sqlite3
+
+    database = sqlite3.connect(":memory:", check_same_thread=False)
+    database.executescript(schema)
+    lock = threading.Lock()
+
+    class Cursor:
+        rowcount = -1
+
+        def __init__(self):
+            self._cursor = database.cursor()
+
+        def execute(self, query, params=()):
+            with lock:
+                self._cursor.execute(query.replace("%s", "?"), [
+                    value.isoformat(" ") if isinstance(value, datetime) else value for value in params])
+                self.rowcount = self._cursor.rowcount
+
+        def fetchone(self):
+            return self._cursor.fetchone()
+
+        def fetchall(self):
+            return self._cursor.fetchall()
+
+        def close(self):
+            self._cursor.close()
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            with lock:
+                database.commit()
+
+    backend.db_connection = contextlib.contextmanager(lambda: (yield Connection()))
+    return database
+
+
+def use_fake_async_database(fetchone=None, fetchall=(), delay=0):
+    """asgi_app'in aiomysql havuzunu her sorguda delay saniye bekleyen sahte bir havuzla değiştir"""
+    import asyncio
+
+    import asgi_app
+
+    class Cursor:
+        rowcount = 1
+        lastrowid = 1
+
+        def __init__(self, connection):
+            self.connection = connection
+
+        async def execute(self, query, params=None):
+            self.connection.in_transaction = True
+            await asyncio.sleep(delay)
+
+        async def fetchone(self):
+            return fetchone
+
+        async def fetchall(self):
+            return fetchall
+
+        async def close(self):
+            pass
+
+    class Connection:
+        in_transaction = False
+        closed = False
+
+        async def cursor(self):
+            return Cursor(self)
+
+        async def commit(self):
+            self.in_transaction = False
+
+        async def rollback(self):
+            self.in_transaction = False
+
+        def close(self):
+            self.closed = True
+
+    class Pool:
+        # aiomysql havuzu gibi en fazla DB_POOL_MAX bağlantı; işlemi açık iade edilen bağlantıyı
+        # aiomysql kapatıp sonraki istekte yenisini açar, burada hata olarak görünür
+        def __init__(self):
+            self.slots = asyncio.Semaphore(asgi_app.DB_POOL_MAX)
+
+        async def acquire(self):
+            await self.slots.acquire()
+            return Connection()
+
+        def release(self, connection):
+            self.slots.release()
+            if connection.in_transaction and not connection.closed:
+                raise RuntimeError("Bağlantı açık işlemle havuza iade edildi")
+
+    pool = Pool()
+
+    async def database_pool():
+        return pool
+
+    asgi_app.database_pool = database_pool
+
+
+def bench_batch(args):
+    """Tek satırlık /predict ile /predict/batch verimini karşılaştır"""
+    client = load_backend()
+    items = random_requests(args.rows)
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        client.post("/predict", json=items[0])  # ısınma
+
+        single = []
+        for item in items:
+            started = time.perf_counter()
+            response = client.post("/predict", json=item)
+            single.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.get_json()
+
+        batched = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            response = client.post("/predict/batch", json={"requests": items})
+            batched.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.get_json()
+
+    model = backend.model_registry.current.model
+    print(f"📊 {args.rows} istek, model: {type(model).__name__} "
+          f"({getattr(model, 'n_estimators', '?')} ağaç)")
+    report("/predict (tek satır)", single, len(single))
+    report(f"/predict/batch ({args.rows})", batched, args.rows * len(batched))
+
+
+def bench_geocode(args):
+    """Geocoding önbelleğini API gecikmesini taklit eden yerel bir stub ile ölç"""
+    from geocode_cache import GeocodeCache
+
+    def stub_geocoder(address):
+        time.sleep(args.api_latency / 1000)
+        if "bilinmeyen" in address.lower():
+            return None
+        return 41.0 + len(address) / 1000, 29.0
+
+    rng = random.Random(42)
+    streets = [f"{rng.choice(ORIGINS)} Cad. No:{n}" for n in range(args.unique)]
+    streets += [f"Bilinmeyen Sokak {n}" for n in range(args.unique // 10)]
+    # Aynı adresin farklı yazımları aynı anahtara düşmeli
+    spellings = [
+        lambda a: a,
+        lambda a: a.replace("i", "İ").replace("ı", "I").upper(),
+        lambda a: f"  {a}. ".replace(" ", "  ")
+    ]
+    queries = [rng.choice(spellings)(rng.choice(streets)) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "geocode.sqlite3")
+        for title, cache in (
+            ("Soğuk süreç (boş önbellek)", GeocodeCache(stub_geocoder, db_path=db_path)),
+            ("Yeniden başlatma (SQLite)", GeocodeCache(stub_geocoder, db_path=db_path)),
+        ):
+            latencies = []
+            for query in queries:
+                started = time.perf_counter()
+                cache.get(query)
+                latencies.append(time.perf_counter() - started)
+            report(title, latencies, len(latencies))
+            print(f"   {cache.stats()}")
+
+
+def bench_gazetteer(args):
+    """Sentetik bir gazetteer ile yer adı eşleştirme ve ters geohash araması"""
+    import tracemalloc
+    from gazetteer import Gazetteer
+
+    rng = random.Random(42)
+    syllables = ["ka", "dı", "köy", "be", "şik", "taş", "ü", "skü", "dar", "mal", "te", "pe",
+                 "fa", "tih", "ba", "ye", "zit", "lev", "ent", "gü", "ner", "çam", "lı", "ca"]
+    kinds = ["Mahallesi", "Caddesi", "Sokak", "Parkı", "Camii", "Durağı", ""]
+    names = set()
+    while len(names) < args.names:
+        word = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).capitalize()
+        names.add(f"{word} {rng.choice(kinds)}".strip())
+    names = sorted(names)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = Gazetteer.from_locations({
+        name: (rng.uniform(40.80, 41.30), rng.uniform(28.50, 29.40)) for name in names
+    })
+    build_seconds = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"📊 {len(index):,} yer adı, kurulum {build_seconds:.2f} sn, bellek {memory / 2**20:.0f} MB")
+
+    addresses = [
+        f"{rng.randint(1, 200)}. Sokak No:{rng.randint(1, 99)} {rng.choice(names)}, İstanbul"
+        if rng.random() < 0.8 else f"Bilinmeyen adres {rng.randint(1, 10**6)}"
+        for _ in range(args.queries)
+    ]
+    latencies = []
+    for address in addresses:
+        started = time.perf_counter()
+        index.match(address)
+        latencies.append(time.perf_counter() - started)
+    report("match (adres -> koordinat)", latencies, len(latencies))
+
+    points = [(rng.uniform(40.80, 41.30), rng.uniform(28.50, 29.40)) for _ in range(args.queries)]
+    latencies = []
+    for lat, lng in points:
+        started = time.perf_counter()
+        index.nearest(lat, lng)
+        latencies.append(time.perf_counter() - started)
+    report("nearest (koordinat -> ad)", latencies, len(latencies))
+
+
+def bench_logging(args):
+    """/predict gecikmesini INFO ve DEBUG log seviyelerinde karşılaştır"""
+    from logging_setup import setup_logging
+
+    client = load_backend()
+    # Tablo dışı koordinatlar: canlı model yolu ve DataFrame dökümü de ölçülsün
+    backend.geocode_cache.geocoder = lambda address: (41.0 + hash(address) % 1000 / 10000, 29.0)
+    table_items = random_requests(args.requests)
+    model_items = [dict(item, origin=f"Test adresi {i % 50}") for i, item in enumerate(table_items)]
+
+    with open(os.devnull, "w") as sink:
+        for path, items in (("tablo", table_items), ("model", model_items)):
+            for title, level, sample_rate in (
+                ("INFO", "INFO", 0.01),
+                ("DEBUG, döküm %1", "DEBUG", 0.01),
+                ("DEBUG, döküm %100", "DEBUG", 1.0),
+            ):
+                setup_logging(level, dump_sample_rate=sample_rate, stream=sink)
+                client.post("/predict", json=items[0])
+                latencies = []
+                for item in items:
+                    started = time.perf_counter()
+                    client.post("/predict", json=item)
+                    latencies.append(time.perf_counter() - started)
+                report(f"{path}: {title}", latencies, len(latencies))
+    setup_logging(backend.LOG_LEVEL, json_output=backend.LOG_JSON)
+
+
+def bench_parity(args):
+    """pandas'lı eski çıkarım yolu ile yeni NumPy yolunu bit düzeyinde karşılaştır"""
+    import numpy as np
+    import pandas as pd
+    from inference import ScalerParams, feature_row, parse_datetime
+
+    import joblib
+
+    load_backend()
+    model = backend.model_registry.current.model
+    if not os.path.exists(backend.SCALER_PATH):
+        sys.exit("❌ Karşılaştırma için scaler.pkl gerekli")
+    scaler = joblib.load(backend.SCALER_PATH)
+    params = ScalerParams.from_scaler(scaler)
+    rng = random.Random(args.seed)
+    formats = [
+        lambda dt: dt.isoformat(),
+        lambda dt: dt.isoformat(timespec="milliseconds") + "Z",  # JS toISOString()
+        lambda dt: dt.isoformat(timespec="minutes") + "+03:00",
+        lambda dt: dt.strftime("%Y-%m-%d %H:%M"),
+    ]
+
+    started = time.perf_counter()
+    mismatches = 0
+    for _ in range(args.samples):
+        moment = datetime(2020, 1, 1) + timedelta(seconds=rng.randrange(10 * 365 * 24 * 3600))
+        text = rng.choice(formats)(moment)
+        lat, lng = rng.uniform(40.8, 41.3), rng.uniform(28.5, 29.4)
+
+        old_dt = pd.to_datetime(text)
+        new_dt = parse_datetime(text)
+        old = backend.build_feature_row(old_dt.hour, old_dt.dayofweek, old_dt.month, lat, lng)
+        new = backend.build_feature_row(new_dt.hour, new_dt.weekday(), new_dt.month, lat, lng)
+
+        old_scaled = scaler.transform(pd.DataFrame([old], columns=backend.FEATURE_NAMES))
+        new_scaled = params.transform(feature_row(new))
+        same = (old == new and old_scaled.tobytes() == new_scaled.tobytes()
+                and model.predict(old_scaled)[0] == model.predict(new_scaled)[0])
+        if not same:
+            mismatches += 1
+            print(f"❌ Fark: {text} {old} {new}")
+
+    print(f"📊 {args.samples} rastgele girdi, {mismatches} fark "
+          f"({time.perf_counter() - started:.1f} sn)")
+    if mismatches:
+        sys.exit(1)
+
+
+def bench_forest(args):
+    """sklearn RandomForest ile düz dizi değerlendiricisinin eşitliği ve gecikmesi"""
+    import joblib
+    import numpy as np
+    from flat_forest import FlatForest
+
+    sk_model = joblib.load(backend.MODEL_PATH)
+    sk_model.n_jobs = 1  # Toplama sırası aynı olsun diye (tek çekirdekte de en hızlısı)
+    started = time.perf_counter()
+    flat = FlatForest.from_sklearn(sk_model)
+    print(f"⚙️  Derleme: {flat.n_estimators} ağaç, {flat.node_count:,} düğüm "
+          f"({time.perf_counter() - started:.2f} sn)")
+
+    rng = np.random.default_rng(args.seed)
+    X = rng.normal(size=(args.samples, sk_model.n_features_in_))
+    # Tek adımlık küçük batch, tek grupta tüm ağaçlar ve ağaç grupları yolları denenir
+    expected = sk_model.predict_proba(X)
+    tiny = np.vstack([flat.predict_proba(X[i:i + 3]) for i in range(0, 300, 3)])
+    small = np.vstack([flat.predict_proba(X[i:i + 64]) for i in range(0, len(X), 64)])
+    proba_equal = (np.array_equal(expected, flat.predict_proba(X)) and np.array_equal(expected, small)
+                   and np.array_equal(expected[:300], tiny))
+    labels_equal = np.array_equal(sk_model.predict(X), flat.predict(X))
+    print(f"📊 {args.samples} rastgele satır: predict_proba bit düzeyinde "
+          f"{'aynı' if proba_equal else 'FARKLI'}, predict {'aynı' if labels_equal else 'FARKLI'}")
+
+    for rows in args.sizes:
+        batch = X[:rows] if rows <= len(X) else rng.normal(size=(rows, X.shape[1]))
+        repeat = max(3, min(args.repeat, 20000 // rows))
+        for title, predictor in (("sklearn", sk_model), ("flat", flat)):
+            latencies = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                predictor.predict_proba(batch)
+                latencies.append(time.perf_counter() - t0)
+            report(f"{title} n={rows}", latencies, rows * repeat)
+
+    if not (proba_equal and labels_equal):
+        sys.exit(1)
+
+
+def _memory_stats():
+    """/proc/self/smaps_rollup'dan RSS, PSS ve özel (USS) bellek, MB"""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": values.get("Rss", 0.0),
+        "pss_mb": values.get("Pss", 0.0),
+        "uss_mb": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0)
+    }
+
+
+def artifact_worker(args):
+    """Tek bir worker: modeli yükle, tahmin yap, bellek ölçümü için sinyal bekle"""
+    import json
+    import numpy as np
+
+    import model_artifact
+
+    # Sadece model yüklemesi ölçülür (tahmin tablosu ikisinde de aynıdır)
+    backend.USE_FLAT_FOREST = args.mode != "pkl"
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        if args.mode == "artifact":
+            model, scaler_params, _ = model_artifact.load_artifact(backend.MODEL_ARTIFACT_DIR)
+            bundle = backend.ModelBundle(model, scaler_params)
+        else:
+            bundle = backend.load_pickled_bundle()
+    load_seconds = time.perf_counter() - started
+
+    rng = np.random.default_rng(os.getpid())
+    for _ in range(args.predictions // 64):
+        backend.predict_proba_matrix(rng.normal(size=(64, len(backend.FEATURE_NAMES))), bundle)
+    print("RESULT " + json.dumps({"load_seconds": load_seconds}), flush=True)
+
+    # Tüm worker'lar yüklenince ölçülür; PSS paylaşılan sayfaları worker sayısına böler
+    sys.stdin.readline()
+    print("RESULT " + json.dumps(_memory_stats()), flush=True)
+    sys.stdin.read()
+
+
+def bench_artifact(args):
+    """pkl ve mmap paketiyle yüklenen worker'ların açılış süresi ve bellek kullanımı"""
+    import json
+    import subprocess
+
+    load_backend()  # Paket yoksa ya da bayatsa burada üretilir
+    if backend.model_registry.current.manifest is None:
+        sys.exit("❌ Model paketi üretilemedi")
+
+    def read_result(process):
+        for line in process.stdout:
+            if line.startswith("RESULT "):
+                return json.loads(line[len("RESULT "):])
+        raise RuntimeError("Worker sonuç vermeden kapandı")
+
+    print(f"📊 {args.workers} worker, worker başına {args.predictions} tahmin")
+    for mode, title in (("pkl", "joblib (sklearn)"), ("flat", "joblib + düz dizi"), ("artifact", "mmap paketi")):
+        workers = [
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "artifact-worker",
+                 "--mode", mode, "--predictions", str(args.predictions)],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+            )
+            for _ in range(args.workers)
+        ]
+        loads = [read_result(worker)["load_seconds"] for worker in workers]
+        for worker in workers:
+            worker.stdin.write("go\n")
+            worker.stdin.flush()
+        memory = [read_result(worker) for worker in workers]
+        for worker in workers:
+            worker.stdin.close()
+            worker.wait()
+
+        def avg(key):
+            return sum(m[key] for m in memory) / len(memory)
+
+        print(f"{title:<20} yükleme p50 {percentile(loads, 50) * 1000:8.1f} ms   "
+              f"RSS {avg('rss_mb'):7.1f} MB   PSS {avg('pss_mb'):7.1f} MB   "
+              f"USS {avg('uss_mb'):7.1f} MB   toplam PSS {avg('pss_mb') * len(memory):7.1f} MB")
+
+
+def bench_reload(args):
+    """/predict yükü altında modeli tekrar tekrar yeniden yükle: hata, gecikme ve yükleme süresi"""
+    import threading
+
+    client = load_backend()
+    backend.geocode_cache.geocoder = lambda address: (41.0 + hash(address) % 1000 / 10000, 29.0)
+    table_items = random_requests(200)
+    # Yarısı tablo dışı: canlı model yolu da yeniden yükleme sırasında çalışsın
+    items = [item if i % 2 else dict(item, origin=f"Test adresi {i % 50}") for i, item in enumerate(table_items)]
+    headers = {"X-Admin-Key": backend.ADMIN_API_KEY}
+
+    def hammer(stop, latencies, errors, versions):
+        local = backend.app.test_client()
+        i = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = local.post("/predict", json=items[i % len(items)])
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+            else:
+                versions.add(response.get_json()["model_version"])
+            i += 1
+
+    def run_phase(reloads):
+        stop, latencies, errors, versions = threading.Event(), [], [], set()
+        threads = [threading.Thread(target=hammer, args=(stop, latencies, errors, versions))
+                   for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        results = []
+        for _ in range(reloads):
+            time.sleep(args.duration / max(reloads, 1))
+            response = client.post("/admin/reload-model?wait=1&force=1", headers=headers)
+            assert response.status_code == 200, response.get_json()
+            results.append(response.get_json()["model"])
+        if not reloads:
+            time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return latencies, errors, versions, results
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        baseline = run_phase(0)
+        during = run_phase(args.reloads)
+
+    print(f"📊 {args.clients} istemci, {args.duration:.0f} sn, {args.reloads} yeniden yükleme, "
+          f"sürüm {backend.model_registry.current.version}")
+    for title, (latencies, errors, versions, _) in (("yeniden yükleme yok", baseline),
+                                                    ("yeniden yükleme sırasında", during)):
+        report(title, latencies, len(latencies))
+        print(f"   {len(latencies)} istek, {len(errors)} hata, görülen sürümler {sorted(versions)}")
+    stats = during[3]
+    print(f"yükleme p50 {percentile([s['load_seconds'] for s in stats], 50) * 1000:8.1f} ms   "
+          f"ısınma (soğuk) p50 {percentile([s['warmup_first_ms'] for s in stats], 50):6.2f} ms   "
+          f"ısınma p50 {percentile([s['warmup_ms'] for s in stats], 50):6.2f} ms")
+
+    # Dosya izleyici: pkl'in değişmesi (yeni eğitim) algılanıp arka planda yüklenmeli
+    registry = backend.model_registry
+
+    def attempts():
+        stats = registry.stats()
+        return stats["reloads"] + stats["skipped_reloads"] + stats["failed_reloads"]
+
+    before = attempts()
+    os.utime(backend.MODEL_PATH)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        while attempts() == before or registry.reloading:
+            registry.check()
+            time.sleep(0.05)
+    after = registry.stats()
+    print(f"izleyici: pkl değişikliği {time.perf_counter() - started:.2f} sn içinde yüklendi "
+          f"(etkin sürüm {after['version']}, aynı sürüm atlanan {after['skipped_reloads']}, "
+          f"hata {after['failed_reloads']})")
+    if baseline[1] or during[1]:
+        sys.exit(1)
+
+
+def repeated_requests(count, seed=42, addresses=300, zipf=1.2):
+    """Gerçekçi tekrar eden istek karışımı: adres popülerliği Zipf, saatler işe gidiş-dönüşte yoğun"""
+    rng = random.Random(seed)
+    # Bilinen ilçeler tablodan, serbest adresler canlı modelden cevaplanır
+    pool = [f"{origin}, İstanbul" for origin in ORIGINS] + [f"Test adresi {n}" for n in range(addresses)]
+    rng.shuffle(pool)
+    weights = [1 / (rank + 1) ** zipf for rank in range(len(pool))]
+    hours = list(range(24))
+    hour_weights = [4 if hour in (7, 8, 9, 17, 18, 19) else 2 if 10 <= hour <= 16 else 1 for hour in hours]
+    start = datetime(2025, 3, 3)
+    return [
+        {
+            "origin": rng.choices(pool, weights)[0],
+            "datetime": (start + timedelta(days=rng.randrange(7), hours=rng.choices(hours, hour_weights)[0],
+                                           minutes=15 * rng.randrange(4))).isoformat()
+        }
+        for _ in range(count)
+    ]
+
+
+def bench_cache(args):
+    """/predict gecikmesi: tahmin önbelleği kapalı ve açıkken, tekrar eden istek karışımıyla"""
+    client = load_backend()
+    backend.geocode_cache.geocoder = lambda address: (41.0 + hash(address) % 1000 / 10000, 29.0)
+    items = repeated_requests(args.requests, addresses=args.addresses)
+    size = backend.prediction_cache.max_size
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for item in items:  # Geocoding önbelleği iki ölçümde de dolu olsun
+            client.post("/predict", json=item)
+
+        results = {}
+        for title, max_size in (("önbellek kapalı", 0), (f"önbellek açık ({size})", size)):
+            backend.prediction_cache.max_size = max_size
+            backend.prediction_cache.clear()
+            before = backend.prediction_cache.stats()
+            latencies, responses = [], []
+            for item in items:
+                started = time.perf_counter()
+                response = client.post("/predict", json=item)
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.get_json()
+                body = response.get_json()
+                responses.append((body["traffic_level"], body["traffic_info"]))
+            stats = backend.prediction_cache.stats()
+            hits = stats["hits"] - before["hits"]
+            results[title] = (latencies, responses, hits)
+
+    print(f"📊 {args.requests} istek, {len(set((i['origin'], i['datetime']) for i in items))} farklı "
+          f"(adres, zaman), {args.addresses} serbest adres + {len(ORIGINS)} ilçe")
+    for title, (latencies, _, hits) in results.items():
+        report(title, latencies, len(latencies))
+        print(f"   isabet oranı {hits / len(latencies):.1%}")
+    (_, off, _), (_, on, _) = results.values()
+    same = off == on
+    print(f"{'✅' if same else '❌'} Önbellekli ve önbelleksiz cevaplar {'aynı' if same else 'FARKLI'}")
+    if not same:
+        sys.exit(1)
+
+
+def bench_profile(args):
+    """/predict/profile gecikmesi ve tek tek /predict çağrılarıyla eşitliği"""
+    client = load_backend()
+    backend.geocode_cache.geocoder = lambda address: (41.0 + hash(address) % 1000 / 10000, 29.0)
+    start = datetime(2025, 3, 3, 6, 0)
+    end = start + timedelta(days=args.days)
+    query = {"from": start.isoformat(), "to": end.isoformat(), "step": f"{args.step}m"}
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for title, origin in (("bilinen ilçe (tablo)", "Kadıköy, İstanbul"), ("serbest adres (model)", "Test adresi 7")):
+            url = "/predict/profile"
+            client.get(url, query_string=dict(query, origin=origin))  # ısınma
+            latencies = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = client.get(url, query_string=dict(query, origin=origin))
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.get_json()
+            body = response.get_json()
+
+            # Her dilim tek başına /predict'e sorulduğunda aynı seviye dönmeli
+            backend.prediction_cache.clear()
+            single = []
+            mismatches = 0
+            for slot in body["slots"]:
+                started = time.perf_counter()
+                level = client.post("/predict", json={"origin": origin, "datetime": slot["time"]}).get_json()["traffic_level"]
+                single.append(time.perf_counter() - started)
+                mismatches += level != slot["traffic_level"]
+
+            with contextlib.redirect_stdout(sys.__stdout__):
+                report(f"{title}: profil", latencies, len(latencies))
+                print(f"   {body['count']} dilim, kaynak {body['source']}, en iyi pencere "
+                      f"{body['best_window']['start']} - {body['best_window']['end']}, "
+                      f"tek tek /predict toplamı {sum(single) * 1000:.0f} ms, {mismatches} fark")
+            if mismatches:
+                sys.exit(1)
+
+
+def bench_route(args):
+    """/predict/route gecikmesi rota uzunluğuyla nasıl artıyor: soğuk ve sıcak hücre önbelleği"""
+    import route
+
+    client = load_backend()
+    origin = (40.9917, 29.0270)
+    when = "2025-03-03T08:30:00"
+    print(f"📊 Parça en fazla {backend.ROUTE_MAX_SEGMENT_KM} km, geohash hassasiyeti "
+          f"{backend.ROUTE_GEOHASH_PRECISION}, {args.repeat} tekrar")
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        client.post("/predict/route", json={"polyline": route.encode_polyline([origin, (41.0, 29.05)]),
+                                            "datetime": when})
+        for length in args.lengths:
+            # Kuzeydoğuya doğru, çapraz (boğaz geçişli) bir rota
+            step = length / 111.0 / 2 ** 0.5
+            polyline = route.encode_polyline([origin, (origin[0] + step, origin[1] + step)])
+            body = {"polyline": polyline, "datetime": when}
+            cold, warm = [], []
+            for _ in range(args.repeat):
+                backend.route_cache.clear()
+                started = time.perf_counter()
+                response = client.post("/predict/route", json=body)
+                cold.append(time.perf_counter() - started)
+                result = response.get_json()
+                assert response.status_code == 200, result
+                started = time.perf_counter()
+                client.post("/predict/route", json=body)
+                warm.append(time.perf_counter() - started)
+            with contextlib.redirect_stdout(sys.__stdout__):
+                print(f"{length:>5.0f} km  {result['point_count']:>5} nokta  {result['cell_count']:>4} hücre   "
+                      f"soğuk p50 {percentile(cold, 50) * 1000:7.2f} ms   "
+                      f"sıcak p50 {percentile(warm, 50) * 1000:7.2f} ms   "
+                      f"seviye {result['aggregate']['traffic_level']}")
+
+
+def bench_grid(args):
+    """Trafik ızgarası: hassasiyete göre üretim süresi, yanıt boyutu ve karo üretimi"""
+    from traffic_grid import GridSpec, GridStore
+
+    client = load_backend()
+    print(f"📊 Sınır kutusu {backend.GRID_BOUNDS}, {args.hours} saat ortalaması")
+    for precision in args.precisions:
+        backend.GRID_PRECISION = precision
+        backend.grid_store = GridStore(GridSpec(backend.GRID_BOUNDS, precision), backend.score_grid_cells,
+                                       version=lambda: backend.model_registry.current.version,
+                                       hours_ahead=backend.GRID_HOURS_AHEAD)
+        backend.tile_cache.clear()
+        store = backend.grid_store
+        start = store.current_hour()
+        seconds = []
+        for offset in range(args.hours):
+            seconds.append(store.get(start + offset).seconds)
+
+        levels = client.get("/grid/0")
+        full = client.get("/grid/0?probabilities=1")
+        assert levels.status_code == 200 and full.status_code == 200
+        revalidated = client.get("/grid/0", headers={"If-None-Match": levels.headers["ETag"]})
+
+        # Merkezdeki karolar (Beşiktaş civarı), önce üretim sonra önbellekten
+        n = 2 ** args.zoom
+        x = int((29.0 + 180) / 360 * n)
+        y = int((1 - math.asinh(math.tan(math.radians(41.04))) / math.pi) / 2 * n)
+        tiles = [(x + dx, y + dy) for dx in range(-2, 2) for dy in range(-2, 2)]
+        render, sizes = [], []
+        for tx, ty in tiles:
+            started = time.perf_counter()
+            response = client.get(f"/grid/0/{args.zoom}/{tx}/{ty}.png")
+            render.append(time.perf_counter() - started)
+            assert response.status_code == 200 and response.data[:4] == b"\x89PNG"
+            sizes.append(len(response.data))
+        cached = []
+        for tx, ty in tiles:
+            started = time.perf_counter()
+            client.get(f"/grid/0/{args.zoom}/{tx}/{ty}.png")
+            cached.append(time.perf_counter() - started)
+
+        spec = store.spec
+        print(f"hassasiyet {precision}: {spec.rows} x {spec.cols} = {spec.size:,} hücre   "
+              f"üretim {sum(seconds) / len(seconds) * 1000:8.1f} ms/saat")
+        print(f"   /grid yanıtı: seviyeler {len(levels.data) / 1024:7.1f} KB, olasılıklarla "
+              f"{len(full.data) / 1024:7.1f} KB, If-None-Match -> {revalidated.status_code}")
+        print(f"   z{args.zoom} karo: üretim p50 {percentile(render, 50) * 1000:6.2f} ms, önbellekten p50 "
+              f"{percentile(cached, 50) * 1000:6.2f} ms, PNG ortalama {sum(sizes) / len(sizes) / 1024:5.1f} KB")
+
+
+def bench_favorites(args):
+    """/favorites/forecast ile favori başına /predict: yenileme süresi, yanıt gecikmesi ve eşitlik"""
+    import jwt
+    from favorites_forecast import FavoritesForecaster
+
+    client = load_backend()
+    backend.geocode_cache.geocoder = lambda address: (40.85 + hash(address) % 4000 / 10000,
+                                                      28.6 + hash(address) % 7000 / 10000)
+    origins = [f"Favori adresi {i}" for i in range(args.origins)]
+    rng = random.Random(42)
+    favorites = [(i + 1, origin, "Levent, İstanbul", f"Rota {i + 1}", datetime(2025, 1, 1))
+                 for i, origin in enumerate(rng.sample(origins, args.favorites))]
+
+    use_fake_database(fetchall=favorites)
+    forecaster = backend.favorites_forecaster = FavoritesForecaster(
+        lambda: origins, backend.resolve_origin, backend.score_favorite_slots,
+        version=lambda: backend.model_registry.current.version,
+        hours_ahead=backend.FAVORITES_FORECAST_HOURS
+    )
+    token = jwt.encode({"user_id": 1}, backend.JWT_SECRET_KEY, algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for origin in origins:
+            backend.resolve_origin(origin)  # Geocoding önbelleği ısınsın, ölçülen kısım skorlama
+        refresh = [forecaster.refresh().seconds for _ in range(args.repeat)]
+
+        precomputed = []
+        for _ in range(args.repeat * 10):
+            started = time.perf_counter()
+            response = client.get("/favorites/forecast", headers=headers)
+            precomputed.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+
+        on_demand = []
+        for _ in range(args.repeat * 10):
+            forecaster.clear()
+            started = time.perf_counter()
+            client.get("/favorites/forecast", headers=headers)
+            on_demand.append(time.perf_counter() - started)
+
+        # Eski yol: her favori için ayrı /predict (önbellek kapalıyken, o anki saat)
+        when = datetime.now().replace(minute=0, second=0, microsecond=0).isoformat()
+        backend.prediction_cache.max_size = 0
+        single, mismatches = [], 0
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for favorite in body["favorites"]:
+                level = client.post("/predict", json={"origin": favorite["origin"], "datetime": when}
+                                    ).get_json()["traffic_level"]
+                mismatches += level != favorite["traffic_level"]
+            single.append(time.perf_counter() - started)
+
+    print(f"📊 {args.origins} farklı favori başlangıcı x {backend.FAVORITES_FORECAST_HOURS} saat, "
+          f"kullanıcı başına {args.favorites} favori")
+    print(f"Yenileme (tek batch, {args.origins * backend.FAVORITES_FORECAST_HOURS:,} satır): "
+          f"p50 {percentile(refresh, 50) * 1000:8.1f} ms")
+    report("forecast (önceden hesaplı)", precomputed, len(precomputed))
+    report("forecast (istek anında)", on_demand, len(on_demand))
+    report(f"{args.favorites} x /predict", single, len(single))
+    print(f"   yanıt {len(response.data) / 1024:.1f} KB, {mismatches} fark")
+    if mismatches:
+        sys.exit(1)
+
+
+def bench_passwords(args):
+    """Giriş yükü altında /predict gecikmesi: bcrypt istek thread'inde ve süreç havuzunda"""
+    import threading
+
+    import bcrypt
+    from password_pool import PasswordPool
+
+    client = load_backend()
+    password = "gizli-sifre-123"
+    stored = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(backend.BCRYPT_ROUNDS)).decode("utf-8")
+    use_fake_database(fetchone=(1, "Test", stored))
+    login = {"email": "test@example.com", "password": password}
+    predict = {"origin": "Kadıköy, İstanbul", "datetime": "2025-03-03T08:30:00"}
+    backend.prediction_cache.max_size = 0
+
+    def measure(pool, logins):
+        backend.password_pool = pool
+        pool.start()
+        stop = threading.Event()
+        statuses = []
+
+        def login_loop():
+            while not stop.is_set():
+                statuses.append(client.post("/login", json=login).status_code)
+
+        threads = [threading.Thread(target=login_loop) for _ in range(logins)]
+        for thread in threads:
+            thread.start()
+        latencies = []
+        deadline = time.perf_counter() + args.duration
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            client.post("/predict", json=predict)
+            latencies.append(time.perf_counter() - started)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        pool.shutdown()
+        # Sayaçlar eşzamanlı girişlerde kaybolmamalı: her başarılı giriş bir check, iş kalmamalı
+        stats = pool.stats()
+        if stats["in_flight"] != 0 or stats["checks"] != statuses.count(200):
+            sys.exit(f"❌ Havuz sayaçları tutarsız: {stats}, {statuses.count(200)} başarılı giriş")
+        return latencies, statuses
+
+    print(f"📊 bcrypt maliyeti {backend.BCRYPT_ROUNDS}, {args.logins} eşzamanlı giriş döngüsü, "
+          f"{args.duration:.0f} sn, {os.cpu_count()} çekirdek")
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        scenarios = [
+            ("giriş yükü yok", PasswordPool(0, rounds=backend.BCRYPT_ROUNDS), 0),
+            ("bcrypt istek thread'inde", PasswordPool(0, args.logins, rounds=backend.BCRYPT_ROUNDS), args.logins),
+            (f"süreç havuzu ({args.workers} worker)",
+             PasswordPool(args.workers, args.logins, rounds=backend.BCRYPT_ROUNDS,
+                          nice=backend.PASSWORD_WORKER_NICE), args.logins)
+        ]
+        for title, pool, logins in scenarios:
+            latencies, statuses = measure(pool, logins)
+            with contextlib.redirect_stdout(sys.__stdout__):
+                report(title, latencies, len(latencies))
+                if logins:
+                    print(f"   {len(statuses) / args.duration:.1f} giriş/sn, "
+                          f"{statuses.count(200)} başarılı, {statuses.count(503)} x 503")
+
+        # Kapasiteyi aşan ani giriş dalgası: fazlası beklemeden 503 + Retry-After almalı
+        backend.password_pool = pool = PasswordPool(args.workers, 2, rounds=backend.BCRYPT_ROUNDS)
+        pool.start()
+        results = []
+
+        def burst_login():
+            response = client.post("/login", json=login)
+            results.append((response.status_code, response.headers.get("Retry-After")))
+
+        threads = [threading.Thread(target=burst_login) for _ in range(args.burst)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pool.shutdown()
+
+        # Eski maliyetli hash başarılı girişte yeniden hash'lenmeli
+        old = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(backend.BCRYPT_ROUNDS - 2)).decode("utf-8")
+        executed = use_fake_database(fetchone=(1, "Test", old))
+        backend.password_pool = pool = PasswordPool(args.workers, rounds=backend.BCRYPT_ROUNDS)
+        response = client.post("/login", json=login)
+        pool.shutdown()
+        updates = [params for query, params in executed if query.startswith("UPDATE users")]
+
+    codes = [code for code, _ in results]
+    retry_after = sorted({value for code, value in results if code == 503})
+    print(f"{args.burst} eşzamanlı giriş (kapasite {args.workers} + 2): {codes.count(200)} başarılı, "
+          f"{codes.count(503)} x 503, Retry-After {retry_after}")
+    rehashed = bool(updates) and updates[0][0].split("$")[2] == str(backend.BCRYPT_ROUNDS)
+    print(f"Maliyet {backend.BCRYPT_ROUNDS - 2} hash ile giriş: {response.status_code}, "
+          f"yeniden hash'lendi: {rehashed}")
+    if not rehashed:
+        sys.exit(1)
+
+
+def bench_auth(args):
+    """token_required maliyeti: her istekte jwt.decode ve doğrulanmış token önbelleği"""
+    import jwt
+    from token_cache import TokenCache
+
+    client = load_backend()
+    database = use_memory_database("""
+        CREATE TABLE favorites (
+            id INTEGER PRIMARY KEY, user_id INT, origin TEXT, destination TEXT, route_name TEXT,
+            prediction_result TEXT, search_datetime TEXT, created_at TEXT
+        );
+        CREATE TABLE refresh_tokens (
+            jti CHAR(32) PRIMARY KEY, user_id INT NOT NULL, expires_at DATETIME NOT NULL,
+            used TINYINT NOT NULL DEFAULT 0
+        );
+    """)
+    tokens, _ = backend.start_session(1)
+    headers = {"Authorization": f"Bearer {tokens['token']}"}
+    protected = backend.token_required(lambda user_id: user_id)
+
+    print(f"📊 {args.requests} doğrulama, aynı token")
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for title, size in (("jwt.decode her istekte", 0), ("token önbelleği", backend.TOKEN_CACHE_SIZE)):
+            backend.token_cache = TokenCache(backend.decode_access_token, size)
+            with backend.app.test_request_context(headers=headers):
+                latencies = []
+                for _ in range(args.requests):
+                    started = time.perf_counter()
+                    assert protected() == 1
+                    latencies.append(time.perf_counter() - started)
+            requests_ = []
+            for _ in range(args.requests // 10):
+                started = time.perf_counter()
+                response = client.get("/favorites", headers=headers)
+                requests_.append(time.perf_counter() - started)
+                assert response.status_code == 200
+            with contextlib.redirect_stdout(sys.__stdout__):
+                print(f"{title:<28} decorator p50 {percentile(latencies, 50) * 1e6:7.1f} µs   "
+                      f"p99 {percentile(latencies, 99) * 1e6:7.1f} µs   "
+                      f"GET /favorites p50 {percentile(requests_, 50) * 1000:6.3f} ms")
+
+        # Davranış: yenileme token'ı erişimde reddedilir, döndürülen token tekrar kullanılamaz, logout iptal eder
+        checks = {
+            "yenileme token'ı erişim için reddedildi": client.get(
+                "/favorites", headers={"Authorization": f"Bearer {tokens['refresh_token']}"}).status_code == 401,
+        }
+        refreshed = client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+        checks["yenileme yeni token çifti döndü"] = refreshed.status_code == 200
+        checks["kullanılmış yenileme token'ı reddedildi"] = client.post(
+            "/token/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+        fresh = refreshed.get_json()
+        fresh_headers = {"Authorization": f"Bearer {fresh['token']}"}
+        checks["yeni erişim token'ı geçerli"] = client.get("/favorites", headers=fresh_headers).status_code == 200
+        client.post("/logout", headers=fresh_headers, json={"refresh_token": fresh["refresh_token"]})
+        checks["logout sonrası erişim token'ı reddedildi"] = client.get(
+            "/favorites", headers=fresh_headers).status_code == 401
+        checks["logout sonrası yenileme token'ı reddedildi"] = client.post(
+            "/token/refresh", json={"refresh_token": fresh["refresh_token"]}).status_code == 401
+
+        # Aynı yenileme token'ıyla eşzamanlı yenilemelerden yalnızca biri yeni çift almalı
+        from concurrent.futures import ThreadPoolExecutor
+
+        token = backend.start_session(1)[0]["refresh_token"]
+        barrier = threading.Barrier(8)
+
+        def refresh(_):
+            barrier.wait()
+            return backend.refresh_session(token)[1]
+
+        with ThreadPoolExecutor(8) as executor:
+            statuses = list(executor.map(refresh, range(8)))
+        checks[f"eşzamanlı 8 yenilemeden biri kabul edildi ({statuses.count(200)})"] = statuses.count(200) == 1
+
+        # Tek kullanım süreç belleğinde değil: token önbelleği sıfırlansa da (yeniden başlatma,
+        # başka bir worker) kullanılmış yenileme token'ı reddedilir
+        backend.token_cache = TokenCache(backend.decode_access_token, backend.TOKEN_CACHE_SIZE)
+        checks["yeniden başlatma sonrası kullanılmış yenileme token'ı reddedildi"] = client.post(
+            "/token/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+        legacy = jwt.encode({"user_id": 1, "type": "refresh", "exp": datetime.utcnow() + timedelta(days=1)},
+                            backend.JWT_SECRET_KEY, algorithm="HS256")
+        checks["jti'siz eski yenileme token'ı reddedildi"] = client.post(
+            "/token/refresh", json={"refresh_token": legacy}).status_code == 401
+        rows = database.execute("SELECT COUNT(*), SUM(used) FROM refresh_tokens").fetchone()
+
+        # Erişim token'ı iptal listesi sınırlı; süresi dolanlar iptal sırasında atılır
+        now = [1000.0]
+        revoked = TokenCache(backend.decode_access_token, max_revoked=100, clock=lambda: now[0])
+        for i in range(150):
+            revoked.revoke(f"token-{i}", now[0] + 60 + i)
+        checks["iptal listesi max_revoked ile sınırlı"] = (
+            revoked.stats()["revoked"] == 100 and revoked.stats()["revocation_evictions"] == 50
+            and not revoked.is_revoked("token-0") and revoked.is_revoked("token-149"))
+        now[0] += 200
+        revoked.revoke("son", now[0] + 900)
+        checks["süresi dolan iptaller atıldı"] = revoked.stats()["revoked"] == 10
+
+    for title, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {title}")
+    print(f"   refresh_tokens: {rows[0]} satır, {rows[1]} kullanılmış")
+    print(f"   önbellek: {backend.token_cache.stats()}")
+    if not all(checks.values()):
+        sys.exit(1)
+
+
+def use_sqlite_database(path, rows, users, heavy_rows, seed=42):
+    """db_connection'ı search_history şemasını ve idx_user_datetime indeksini taşıyan bir SQLite dosyasına yönlendir
+
+    Burada MySQL olmadığı için kullanılır; dosya yoksa rows satırla doldurulur. 1 numaralı
+    kullanıcı heavy_rows satırlık yoğun kullanıcıdır.
+    """
+    import sqlite3
+
+    exists = os.path.exists(path)
+    database = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+    if not exists:
+        database.executescript("""
+            CREATE TABLE search_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INT NOT NULL,
+                origin VARCHAR(255) NOT NULL,
+                destination VARCHAR(255),
+                datetime TIMESTAMP NOT NULL,
+                prediction_result JSON,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX idx_user_datetime ON search_history (user_id, created_at);
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+        """)
+        rng = random.Random(seed)
+        start = datetime(2024, 1, 1)
+        blob = json.dumps({"traffic_level": 1, "traffic_info": {
+            "level": "orta", "color": "yellow", "avg_speed": 42.5, "vehicle_count": 400,
+            "description": "Orta yoğunlukta trafik - Ortalama hız 42 km/h, 400 araç",
+            "speed_range": "25-55 km/h"}, "features": {"hour": 8, "day_of_week": 0, "latitude": 40.99,
+                                                        "longitude": 29.03, "location_name": "Kadıköy"}})
+
+        def generate():
+            for i in range(rows):
+                user_id = 1 if i % (rows // heavy_rows) == 0 else rng.randrange(2, users + 1)
+                # Satırlar iki yıla yayılır; toplu yazma yüzünden aynı saniyede çok satır olur
+                created = start + timedelta(seconds=i * 63072000 // rows)
+                yield (user_id, f"{rng.choice(ORIGINS)}, İstanbul", f"{rng.choice(ORIGINS)}, İstanbul",
+                       created, blob, created)
+
+        print(f"⏳ {path} içine {rows:,} satır yazılıyor...")
+        generator = generate()
+        while True:
+            batch = list(itertools.islice(generator, 100000))
+            if not batch:
+                break
+            database.executemany("""
+                INSERT INTO search_history (user_id, origin, destination, datetime, prediction_result, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, batch)
+            database.commit()
+        database.execute("ANALYZE")
+
+    class Cursor:
+        def __init__(self):
+            self._cursor = database.cursor()
+
+        def execute(self, query, params=()):
+            self._cursor.execute(query.replace("%s", "?"), params)
+
+        def fetchone(self):
+            return self._cursor.fetchone()
+
+        def fetchall(self):
+            return self._cursor.fetchall()
+
+        def close(self):
+            self._cursor.close()
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            database.commit()
+
+    backend.db_connection = contextlib.contextmanager(lambda: (yield Connection()))
+    return Connection()
+
+
+def bench_history(args):
+    """GET /search-history: OFFSET ve imleçle derin sayfalar, alan seçimi, delta ve ETag"""
+    import history_pages
+
+    client = load_backend()
+    if args.mysql:
+        connection_context = backend.db_connection()
+        connection = connection_context.__enter__()
+        if connection is None:
+            sys.exit("❌ MySQL'e bağlanılamadı")
+    else:
+        connection = use_sqlite_database(args.path, args.rows, args.users, args.heavy_rows)
+    headers = {"Authorization": f"Bearer {backend.issue_tokens(1)[0]['token']}"}
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM search_history WHERE user_id = 1")
+    heavy = cursor.fetchone()[0]
+
+    def timed(function, repeat=args.repeat):
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = function()
+            latencies.append(time.perf_counter() - started)
+        return percentile(latencies, 50) * 1000, result
+
+    def get(query="", extra_headers=None):
+        return client.get(f"/search-history{query}", headers=dict(headers, **(extra_headers or {})))
+
+    print(f"📊 {'MySQL' if args.mysql else 'SQLite (' + args.path + ')'}; yoğun kullanıcının {heavy:,} satırı")
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        old_ms, _ = timed(lambda: (cursor.execute("""
+            SELECT id, origin, destination, datetime, prediction_result, created_at
+            FROM search_history WHERE user_id = %s ORDER BY created_at DESC LIMIT 50
+        """, (1,)), cursor.fetchall()))
+        first_ms, first = timed(lambda: get())
+        slim_ms, slim = timed(lambda: get("?fields=origin,destination"))
+        etag = first.headers["ETag"]
+        cached_ms, cached = timed(lambda: get(extra_headers={"If-None-Match": etag}))
+        since = first.get_json()["latest_cursor"]
+        delta_ms, delta = timed(lambda: get(f"?since={since}"))
+
+        depths = []
+        for depth in args.depths:
+            if depth >= heavy:
+                continue
+            offset_ms, _ = timed(lambda: (cursor.execute("""
+                SELECT id, origin, destination, datetime, prediction_result, created_at
+                FROM search_history WHERE user_id = %s ORDER BY created_at DESC, id DESC LIMIT 50 OFFSET %s
+            """, (1, depth)), cursor.fetchall()))
+            cursor.execute("SELECT id, created_at FROM search_history WHERE user_id = %s "
+                           "ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET %s", (1, depth - 1))
+            row_id, created_at = cursor.fetchone()
+            page = history_pages.encode_cursor(created_at, row_id)
+            keyset_ms, response = timed(lambda: get(f"?cursor={page}"))
+            assert response.status_code == 200 and response.get_json()["count"] == 50
+            depths.append((depth, offset_ms, keyset_ms))
+
+        # Yeni satırlar eklenince delta sadece onları döner
+        now = datetime(2030, 1, 1)
+        for i in range(5):
+            cursor.execute("""
+                INSERT INTO search_history (user_id, origin, destination, datetime, prediction_result, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (1, "Yeni arama", "Levent, İstanbul", now, "{}", now))
+        connection.commit()
+        fresh = get(f"?since={since}").get_json()
+        stale = get(extra_headers={"If-None-Match": etag})
+        cursor.execute("DELETE FROM search_history WHERE origin = %s", ("Yeni arama",))
+        connection.commit()
+
+        cursor.execute("SELECT id, created_at FROM search_history WHERE user_id = 1 "
+                       "ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET 1000")
+        sql, params = history_pages.key_query(1, 50, before=cursor.fetchone()[::-1])
+        cursor.execute(("EXPLAIN " if args.mysql else "EXPLAIN QUERY PLAN ") + sql, params)
+        plan = cursor.fetchall()
+
+    print(f"Eski sorgu (LIMIT 50, tüm alanlar)   {old_ms:7.2f} ms")
+    print(f"İlk sayfa                            {first_ms:7.2f} ms   {len(first.data) / 1024:6.1f} KB")
+    print(f"İlk sayfa, fields=origin,destination {slim_ms:7.2f} ms   {len(slim.data) / 1024:6.1f} KB")
+    print(f"If-None-Match -> {cached.status_code}                   {cached_ms:7.2f} ms   "
+          f"{len(cached.data) / 1024:6.1f} KB")
+    print(f"since= (yeni satır yok)              {delta_ms:7.2f} ms   {len(delta.data) / 1024:6.1f} KB")
+    print(f"since= 5 yeni satırdan sonra: {fresh['count']} satır; eski ETag ile ilk sayfa -> {stale.status_code}")
+    print("Derinlik      OFFSET (SQL)    imleç (endpoint)")
+    for depth, offset_ms, keyset_ms in depths:
+        print(f"{depth:>9,}   {offset_ms:9.2f} ms   {keyset_ms:9.2f} ms")
+    print("İmleçli anahtar sorgusunun planı:")
+    for row in plan:
+        print("   ", row)
+    if fresh["count"] != 5 or cached.status_code != 304 or stale.status_code != 200:
+        sys.exit(1)
+
+
+def fake_favorite_rows(count):
+    created = datetime(2025, 1, 1)
+    return [
+        (i + 1, f"{ORIGINS[i % len(ORIGINS)]}, İstanbul", f"{ORIGINS[(i + 3) % len(ORIGINS)]}, İstanbul",
+         f"Rota {i + 1}", None, None, created + timedelta(minutes=i))
+        for i in range(count)
+    ]
+
+
+def _process_stats(pid):
+    """/proc/<pid>/status'tan thread sayısı ve RSS (MB)"""
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            values[name] = value.split()
+    return int(values["Threads"][0]), int(values["VmRSS"][0]) / 1024
+
+
+def asgi_worker(args):
+    """Yük testi sunucusu: gecikmeli sahte Google Geocoding, ya da gecikmeli sahte MySQL ile Flask / ASGI"""
+    import asyncio
+    import logging
+    import zlib
+
+    import uvicorn
+
+    if args.server == "geocoder":
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse
+        from starlette.routing import Route
+
+        async def geocode(request):
+            await asyncio.sleep(args.geocode_ms / 1000)
+            digest = zlib.crc32(request.query_params.get("address", "").encode("utf-8"))
+            location = {"lat": 40.85 + digest % 4000 / 10000, "lng": 28.6 + digest // 4000 % 8000 / 10000}
+            return JSONResponse({"results": [{"geometry": {"location": location}}], "status": "OK"})
+
+        uvicorn.run(Starlette(routes=[Route("/geocode", geocode)]), host="127.0.0.1", port=args.port,
+                    log_level="warning", access_log=False, backlog=4096)
+        return
+
+    delay = args.db_ms / 1000
+    rows = fake_favorite_rows(10)
+    backend.GOOGLE_GEOCODE_URL = args.geocode_url
+    backend.geocode_cache.db_path = os.path.join(tempfile.mkdtemp(), "geocode_cache.sqlite3")
+    load_backend()
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    if args.server == "asgi":
+        import asgi_app
+
+        use_fake_async_database(rows[0], rows, delay)
+        backend.start_services = lambda: True  # Model yüklendi, MySQL ve arka plan işleri gerekmiyor
+        uvicorn.run(asgi_app.app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False,
+                    backlog=4096)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    from werkzeug.serving import BaseWSGIServer, make_server
+
+    class Cursor:
+        rowcount = 1
+        lastrowid = 1
+
+        def execute(self, query, params=None):
+            time.sleep(delay)
+
+        def fetchall(self):
+            return rows
+
+        def fetchone(self):
+            return rows[0]
+
+        def close(self):
+            pass
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            pass
+
+        def ping(self, reconnect=False):
+            pass
+
+        def is_connected(self):
+            return True
+
+        def close(self):
+            pass
+
+    # Havuzun kendisi (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW bağlantı) gerçek, sadece bağlantılar sahte
+    backend.db_pool.connect = Connection
+
+    class PooledWSGIServer(BaseWSGIServer):
+        """Sabit sayıda worker thread'i (gunicorn --threads benzeri); fazla bağlantılar kuyrukta bekler"""
+
+        request_queue_size = 4096
+
+        def __init__(self, host, port, app, threads):
+            super().__init__(host, port, app)
+            self.pool = ThreadPoolExecutor(threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self.handle_pooled, request, client_address)
+
+        def handle_pooled(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    if args.threads:
+        server = PooledWSGIServer("127.0.0.1", args.port, backend.app, args.threads)
+    else:
+        # app.run(...) ile aynı: her bağlantıya yeni thread
+        server = make_server("127.0.0.1", args.port, backend.app, threaded=True)
+        server.socket.listen(4096)
+    server.serve_forever()
+
+
+def bench_asgi(args):
+    """Enjekte edilmiş G/Ç gecikmesi altında tek sürecin taşıdığı eşzamanlılık: Flask ve ASGI"""
+    import asyncio
+    import socket
+    import subprocess
+
+    import httpx
+    from starlette.testclient import TestClient
+
+    import asgi_app
+
+    def free_port():
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    def start(server, *extra):
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "asgi-worker", "--server", server, "--port", str(port),
+             "--geocode-ms", str(args.geocode_ms), "--db-ms", str(args.db_ms), "--geocode-url", geocode_url,
+             *extra],
+            stdout=subprocess.DEVNULL
+        )
+        url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 120
+        while time.monotonic() < deadline:
+            try:
+                httpx.get(url + ("/geocode" if server == "geocoder" else "/"), timeout=1)
+                return process, url
+            except httpx.HTTPError:
+                if process.poll() is not None:
+                    break
+                time.sleep(0.2)
+        process.kill()
+        sys.exit(f"❌ {server} sunucusu başlamadı")
+
+    # Aynı istekler iki uygulamada aynı gövdeyi döndürmeli (zaman damgası hariç)
+    client = load_backend()
+    backend.geocode_cache.geocoder = lambda address: (41.0 + hash(address) % 1000 / 10000, 29.0)
+
+    async def stub_geocoder(address):
+        return backend.geocode_cache.geocoder(address)
+
+    asgi_app.geocoder = stub_geocoder
+    use_fake_database(fetchall=fake_favorite_rows(3))
+    use_fake_async_database(fetchall=fake_favorite_rows(3))
+    token = backend.issue_tokens(1)[0]["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    checks = [
+        ("post", "/predict", {"json": {"origin": "Uzak Sokak 1", "datetime": "2025-03-03T08:30:00"}}),
+        ("post", "/predict", {"json": {"origin": "Kadıköy"}}),
+        ("post", "/predict/batch", {"json": random_requests(20) + [{"origin": "x"}, 3]}),
+        ("get", "/predict/profile?origin=Levent&from=2025-03-03T06:00&to=2025-03-03T12:00", {}),
+        ("post", "/predict/route", {"json": {"origin": "Kadıköy", "destination": "Maslak",
+                                             "datetime": "2025-03-03T08:30:00"}}),
+        ("get", "/favorites", {"headers": headers}),
+        ("get", "/favorites", {}),
+        ("post", "/search-history", {"headers": headers, "json": {"origin": "Kadıköy", "datetime": "yarın"}}),
+        ("get", "/search-history?limit=0", {"headers": headers}),
+        ("post", "/token/refresh", {"json": {"refresh_token": "bozuk"}}),
+        ("get", "/model-info", {}),
+        ("get", "/grid/1", {})
+    ]
+
+    def comparable(response):
+        body = response.json()
+        if isinstance(body, dict):
+            body.pop("timestamp", None)
+            body.pop("scored_cells", None)  # Rota önbelleği ilk istekte dolar
+        return response.status_code, body
+
+    asgi_client = TestClient(asgi_app.app)  # Açılış (lifespan) çalışmaz: model yüklü, MySQL yok
+    mismatches = []
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for method, path, kwargs in checks:
+            flask_response = getattr(client, method)(path, **kwargs)
+            flask_result = flask_response.status_code, flask_response.get_json()
+            if isinstance(flask_result[1], dict):
+                flask_result[1].pop("timestamp", None)
+                flask_result[1].pop("scored_cells", None)
+            if comparable(getattr(asgi_client, method)(path, **kwargs)) != flask_result:
+                mismatches.append(f"{method.upper()} {path}")
+    print(f"Sözleşme kontrolü: {len(checks)} istek, {len(mismatches)} farklı yanıt {mismatches or ''}")
+
+    async def run_load(url, make_request, concurrency, pid):
+        """Her sanal kullanıcı tek bağlantıdan sırayla istek gönderir (kapanırsa yeniden bağlanır)
+
+        httpx'in bağlantı havuzu yüzlerce bağlantıda yük üreticisini CPU'ya bağladığı için
+        asyncio akışlarıyla yalın bir HTTP/1.1 istemcisi kullanılır.
+        """
+        host, port = url.split("//")[1].split(":")
+        latencies, errors = [], []
+        started = time.perf_counter()
+        deadline = started + args.seconds
+
+        async def user(n):
+            reader = writer = None
+            i = 0
+            while time.perf_counter() < deadline:
+                method, path, kwargs = make_request(n, i)
+                i += 1
+                body = json.dumps(kwargs["json"]).encode("utf-8") if "json" in kwargs else b""
+                head = "".join(f"{name}: {value}\r\n" for name, value in kwargs.get("headers", {}).items())
+                request = (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                           f"Content-Length: {len(body)}\r\n{head}\r\n").encode("utf-8") + body
+                begin = time.perf_counter()
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(host, int(port))
+                    writer.write(request)
+                    response = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").lower()
+                    length = int(response.split("content-length:")[1].split("\r\n")[0])
+                    await reader.readexactly(length)
+                    if response.startswith("http/1.0") or "connection: close" in response:
+                        writer.close()
+                        writer = None
+                    status = int(response.split(" ", 2)[1])
+                except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, IndexError) as e:
+                    errors.append(type(e).__name__)
+                    if writer is not None:
+                        writer.close()
+                        writer = None
+                    continue
+                if status == 200:
+                    latencies.append(time.perf_counter() - begin)
+                else:
+                    errors.append(status)
+            if writer is not None:
+                writer.close()
+
+        async def sample():
+            await asyncio.sleep(args.seconds / 2)
+            return _process_stats(pid)
+
+        *_, peak = await asyncio.gather(*(user(n) for n in range(concurrency)), sample())
+        return latencies, errors, time.perf_counter() - started, peak
+
+    def geocode_errors(url):
+        return httpx.get(url + "/health", timeout=30).json()["geocode_cache"]["errors"]
+
+    run_id = os.getpid()
+    sequence = itertools.count()  # Her istekte önbellekte olmayan yeni adres
+    scenarios = [
+        ("geocode", f"POST /predict, her istekte önbellekte olmayan adres ({args.geocode_ms:.0f} ms geocoding)",
+         lambda n, i: ("POST", "/predict", {"json": {"origin": f"Yük testi adresi {run_id}-{next(sequence)}",
+                                                       "datetime": "2025-03-03T08:30:00"}})),
+        ("db", f"GET /favorites ({args.db_ms:.0f} ms sorgu)",
+         lambda n, i: ("GET", "/favorites", {"headers": headers}))
+    ]
+    servers = [("asgi", "ASGI (uvicorn, 1 süreç)", ())]
+    if args.flask_threads:
+        servers.append(("flask", f"Flask, {args.flask_threads} worker thread", ("--threads", str(args.flask_threads))))
+    servers.append(("flask", "Flask, bağlantı başına thread (app.run)", ()))
+
+    geocode_url = ""
+    geocoder, geocode_url = start("geocoder")
+    geocode_url += "/geocode"
+    print(f"📊 {args.seconds:.0f} sn / seviye, {os.cpu_count()} çekirdek (yük üreticisi aynı makinede), "
+          f"MySQL havuzu: Flask {backend.DB_POOL_SIZE}+{backend.DB_POOL_MAX_OVERFLOW}, ASGI {asgi_app.DB_POOL_MAX}")
+    try:
+        for scenario, description, make_request in scenarios:
+            if scenario not in args.scenarios:
+                continue
+            print(description)
+            print(f"{'sunucu':<40} {'eşzamanlı':>9} {'istek/sn':>9} {'p50 ms':>8} {'p99 ms':>8} "
+                  f"{'hata':>6} {'thread':>7} {'RSS MB':>7}")
+            for server, title, extra in servers:
+                process, url = start(server, *extra)
+                try:
+                    for concurrency in args.concurrency:
+                        failed = geocode_errors(url)
+                        latencies, errors, elapsed, (threads, rss) = asyncio.run(
+                            run_load(url, make_request, concurrency, process.pid))
+                        # Geocoding hatası yanıtı bozmaz (varsayılan konum), hata sütununa ayrıca eklenir
+                        errors += ["geocode"] * (geocode_errors(url) - failed)
+                        p50 = percentile(latencies, 50) * 1000 if latencies else float("nan")
+                        p99 = percentile(latencies, 99) * 1000 if latencies else float("nan")
+                        print(f"{title:<40} {concurrency:>9} {len(latencies) / elapsed:>9.0f} {p50:>8.0f} "
+                              f"{p99:>8.0f} {len(errors):>6} {threads:>7} {rss:>7.0f}")
+                finally:
+                    process.terminate()
+                    process.wait()
+    finally:
+        geocoder.terminate()
+        geocoder.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CrowdPredictor performans ölçümleri")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="/predict ile /predict/batch verim karşılaştırması")
+    batch.add_argument("--rows", type=int, default=500)
+    batch.add_argument("--repeat", type=int, default=5)
+    batch.set_defaults(func=bench_batch)
+
+    geocode = subparsers.add_parser("geocode", help="Geocoding önbelleği isabet oranı ve gecikmesi")
+    geocode.add_argument("--queries", type=int, default=2000)
+    geocode.add_argument("--unique", type=int, default=200)
+    geocode.add_argument("--api-latency", type=float, default=50, help="Stub API gecikmesi (ms)")
+    geocode.set_defaults(func=bench_geocode)
+
+    gazetteer = subparsers.add_parser("gazetteer", help="Yer adı indeksi eşleştirme gecikmesi")
+    gazetteer.add_argument("--names", type=int, default=50000)
+    gazetteer.add_argument("--queries", type=int, default=10000)
+    gazetteer.set_defaults(func=bench_gazetteer)
+
+    logs = subparsers.add_parser("logging", help="/predict gecikmesi: INFO ve DEBUG log seviyeleri")
+    logs.add_argument("--requests", type=int, default=500)
+    logs.set_defaults(func=bench_logging)
+
+    parity = subparsers.add_parser("parity", help="pandas'lı ve pandas'sız çıkarım yollarının eşitliği")
+    parity.add_argument("--samples", type=int, default=2000)
+    parity.add_argument("--seed", type=int, default=42)
+    parity.set_defaults(func=bench_parity)
+
+    forest = subparsers.add_parser("forest", help="sklearn ve düz dizi orman değerlendiricisi karşılaştırması")
+    forest.add_argument("--samples", type=int, default=5000)
+    forest.add_argument("--sizes", type=int, nargs="+", default=[1, 64, 10000])
+    forest.add_argument("--repeat", type=int, default=200)
+    forest.add_argument("--seed", type=int, default=42)
+    forest.set_defaults(func=bench_forest)
+
+    artifact = subparsers.add_parser("artifact", help="pkl ve mmap model paketi: açılış süresi ve worker belleği")
+    artifact.add_argument("--workers", type=int, default=4)
+    artifact.add_argument("--predictions", type=int, default=2000)
+    artifact.set_defaults(func=bench_artifact)
+
+    reload = subparsers.add_parser("reload", help="/predict yükü altında modeli yeniden yükleme")
+    reload.add_argument("--clients", type=int, default=4)
+    reload.add_argument("--duration", type=float, default=10)
+    reload.add_argument("--reloads", type=int, default=5)
+    reload.set_defaults(func=bench_reload)
+
+    cache = subparsers.add_parser("cache", help="/predict gecikmesi: tahmin önbelleği kapalı ve açık")
+    cache.add_argument("--requests", type=int, default=5000)
+    cache.add_argument("--addresses", type=int, default=300)
+    cache.set_defaults(func=bench_cache)
+
+    profile = subparsers.add_parser("profile", help="/predict/profile gecikmesi ve /predict ile eşitliği")
+    profile.add_argument("--days", type=int, default=7)
+    profile.add_argument("--step", type=int, default=15, help="Dakika")
+    profile.add_argument("--repeat", type=int, default=50)
+    profile.set_defaults(func=bench_profile)
+
+    routes = subparsers.add_parser("route", help="/predict/route gecikmesi ve rota uzunluğu")
+    routes.add_argument("--lengths", type=float, nargs="+", default=[1, 5, 10, 20, 40])
+    routes.add_argument("--repeat", type=int, default=20)
+    routes.set_defaults(func=bench_route)
+
+    grid = subparsers.add_parser("grid", help="Trafik ızgarası üretim süresi ve yanıt boyutu")
+    grid.add_argument("--precisions", type=int, nargs="+", default=[5, 6, 7])
+    grid.add_argument("--hours", type=int, default=3)
+    grid.add_argument("--zoom", type=int, default=12)
+    grid.set_defaults(func=bench_grid)
+
+    favorites = subparsers.add_parser("favorites", help="/favorites/forecast ile favori başına /predict")
+    favorites.add_argument("--origins", type=int, default=2000)
+    favorites.add_argument("--favorites", type=int, default=10)
+    favorites.add_argument("--repeat", type=int, default=10)
+    favorites.set_defaults(func=bench_favorites)
+
+    passwords = subparsers.add_parser("passwords", help="Giriş yükü altında /predict gecikmesi")
+    passwords.add_argument("--logins", type=int, default=4)
+    passwords.add_argument("--workers", type=int, default=2)
+    passwords.add_argument("--duration", type=float, default=10)
+    passwords.add_argument("--burst", type=int, default=20)
+    passwords.set_defaults(func=bench_passwords)
+
+    auth = subparsers.add_parser("auth", help="token_required maliyeti: jwt.decode ve token önbelleği")
+    auth.add_argument("--requests", type=int, default=5000)
+    auth.set_defaults(func=bench_auth)
+
+    history = subparsers.add_parser("history", help="GET /search-history: OFFSET ve imleçle sayfalama, delta, ETag")
+    history.add_argument("--rows", type=int, default=10_000_000)
+    history.add_argument("--users", type=int, default=10000)
+    history.add_argument("--heavy-rows", type=int, default=200000, help="Yoğun kullanıcının satır sayısı")
+    history.add_argument("--depths", type=int, nargs="+", default=[1000, 10000, 100000, 190000])
+    history.add_argument("--repeat", type=int, default=20)
+    history.add_argument("--path", default=os.path.join(tempfile.gettempdir(), "search_history_bench.sqlite3"))
+    history.add_argument("--mysql", action="store_true", help="SQLite yerine uygulamanın MySQL bağlantısı")
+    history.set_defaults(func=bench_history)
+
+    asgi = subparsers.add_parser("asgi", help="Gecikmeli G/Ç altında eşzamanlılık: Flask ve ASGI sunucusu")
+    asgi.add_argument("--geocode-ms", type=float, default=200, help="Sahte Geocoding API gecikmesi")
+    asgi.add_argument("--db-ms", type=float, default=50, help="Sahte MySQL sorgu gecikmesi")
+    asgi.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200, 500])
+    asgi.add_argument("--seconds", type=float, default=5)
+    asgi.add_argument("--flask-threads", type=int, default=8, help="Sabit thread'li Flask sunucusu (0: yok)")
+    asgi.add_argument("--scenarios", nargs="+", choices=["geocode", "db"], default=["geocode", "db"])
+    asgi.set_defaults(func=bench_asgi)
+
+    server = subparsers.add_parser("asgi-worker")
+    server.add_argument("--server", choices=["geocoder", "flask", "asgi"], required=True)
+    server.add_argument("--port", type=int, required=True)
+    server.add_argument("--geocode-ms", type=float, default=200)
+    server.add_argument("--db-ms", type=float, default=50)
+    server.add_argument("--geocode-url", default="")
+    server.add_argument("--threads", type=int, default=0)
+    server.set_defaults(func=asgi_worker)
+
+    worker = subparsers.add_parser("artifact-worker")
+    worker.add_argument("--mode", choices=["pkl", "flat", "artifact"], required=True)
+    worker.add_argument("--predictions", type=int, default=2000)
+    worker.set_defaults(func=artifact_worker)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# Veritabanı bağlantı havuzu
+#
+# Her istekte yeni bir MySQL bağlantısı (TCP + kimlik doğrulama) açmak yerine
+# bağlantılar havuzda tutulur ve tekrar kullanılır. Bağlantı fabrikası bir
+# fonksiyondur; MySQL yerine sqlite3 ile de çalışır.
+#
+#   pool = ConnectionPool(lambda: mysql.connector.connect(**config), size=5)
+#   with pool.connection() as connection:
+#       ...
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """Havuzda belirtilen süre içinde boş bağlantı bulunamadı"""
+
+
+def default_ping(connection):
+    """Bağlantının hâlâ canlı olduğunu kontrol et; ölüyse exception fırlatır"""
+    if hasattr(connection, "ping"):
+        connection.ping(reconnect=False)  # mysql.connector
+    else:
+        connection.execute("SELECT 1")  # sqlite3
+
+
+class ConnectionPool:
+    """Boyut, taşma, yenileme ve checkout sağlık kontrolü olan bağlantı havuzu"""
+
+    def __init__(self, connect, size=5, max_overflow=10, recycle=3600, timeout=10,
+                 pre_ping=True, ping=default_ping, clock=time.monotonic):
+        self.connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.recycle = recycle
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self.ping = ping
+        self.clock = clock
+
+        self._idle = []  # (connection, created_at), LIFO
+        self._created_at = {}
+        self._total = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "connections_created": 0,
+            "connections_recycled": 0,
+            "ping_failures": 0,
+            "invalidated": 0,
+            "timeouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0
+        }
+
+    def _close(self, connection):
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _new_connection(self):
+        connection = self.connect()
+        self._created_at[id(connection)] = self.clock()
+        with self._condition:
+            self._stats["connections_created"] += 1
+        return connection
+
+    def _healthy(self, connection):
+        """Havuzdan alınan bağlantı süresi dolmuş ya da kopmuşsa False döndür"""
+        if self.recycle is not None and self.clock() - self._created_at.get(id(connection), 0) > self.recycle:
+            self._stats["connections_recycled"] += 1
+            return False
+        if self.pre_ping:
+            try:
+                self.ping(connection)
+            except Exception:
+                self._stats["ping_failures"] += 1
+                return False
+        return True
+
+    def acquire(self):
+        started = self.clock()
+        deadline = started + self.timeout
+        with self._condition:
+            while not self._idle and self._total >= self.size + self.max_overflow:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"{self.timeout} sn içinde boş bağlantı bulunamadı")
+                self._condition.wait(remaining)
+
+            waited = self.clock() - started
+            self._stats["checkouts"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+
+            connection = self._idle.pop() if self._idle else None
+            self._total += 1 if connection is None else 0
+
+        # Ağ işlemleri (ping, bağlantı açma) kilit dışında yapılır
+        try:
+            if connection is not None and not self._healthy(connection):
+                self._close(connection)
+                connection = None
+            if connection is None:
+                connection = self._new_connection()
+        except Exception:
+            self._release_slot()
+            raise
+        return connection
+
+    def _release_slot(self):
+        with self._condition:
+            self._total -= 1
+            self._condition.notify()
+
+    def release(self, connection, invalidate=False):
+        """Bağlantıyı havuza iade et; taşma bağlantıları ve bozuk bağlantılar kapatılır"""
+        if not invalidate:
+            try:
+                # Açık kalan işlem (ve REPEATABLE READ anlık görüntüsü) bir sonraki isteğe taşınmasın
+                connection.rollback()
+            except Exception:
+                invalidate = True
+
+        with self._condition:
+            if invalidate or len(self._idle) >= self.size:
+                self._total -= 1
+                self._stats["invalidated"] += 1 if invalidate else 0
+                close = True
+            else:
+                self._idle.append(connection)
+                close = False
+            self._condition.notify()
+        if close:
+            self._close(connection)
+
+    @contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        except Exception:
+            self.release(connection, invalidate=not _is_alive(connection))
+            raise
+        else:
+            self.release(connection)
+
+    def dispose(self):
+        """Boştaki tüm bağlantıları kapat"""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        with self._condition:
+            in_use = self._total - len(self._idle)
+            return dict(
+                self._stats,
+                size=self.size,
+                max_overflow=self.max_overflow,
+                idle=len(self._idle),
+                in_use=in_use,
+                overflow_in_use=max(0, self._total - self.size),
+                wait_seconds_avg=round(self._stats["wait_seconds_total"] / self._stats["checkouts"], 6)
+                if self._stats["checkouts"] else 0.0
+            )
+
+
+def _is_alive(connection):
+    is_connected = getattr(connection, "is_connected", None)
+    if is_connected is None:
+        return True
+    try:
+        return is_connected()
+    except Exception:
+        return False
@@ -0,0 +1,210 @@
+# Favori başlangıç noktaları için önceden hesaplanmış saatlik tahminler
+#
+# Favoriler sayfası her tıklamada /predict'e gidiyordu. Oysa favoriler tablosu
+# hangi noktaların sorulacağını önceden söylüyor: tüm kullanıcıların farklı
+# favori başlangıç noktaları periyodik olarak okunur, koordinata çevrilir ve
+# (nokta x önümüzdeki saatler) satırları tek bir model çağrısıyla skorlanır.
+# Sonuç değişmez bir ForecastSnapshot olarak bellekte tutulur ve tek atama ile
+# değiştirilir; istekler snapshot'ı bir kez okur.
+#
+# Model yalnızca saate bakar (dakika özelliklerde yok), bu yüzden dilimler
+# saatliktir ve ilk dilim içinde bulunulan saattir. Snapshot eskidiyse (saat
+# döndü ya da model sürümü değişti) ya da istenen nokta snapshot'ta yoksa, o
+# noktalar istek sırasında yine tek çağrıyla hesaplanır.
+#
+# Ölçüm için model dizininde:
+#   python /path/to/backend/benchmark.py favorites --origins 2000 --favorites 10
+
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from inference import time_slots
+from logging_setup import get_logger
+
+logger = get_logger("favorites")
+
+ForecastSnapshot = namedtuple("ForecastSnapshot", [
+    "start", "hours", "model_version", "classes", "index", "locations", "levels", "probabilities",
+    "computed_at", "seconds"
+])
+
+
+def compute_forecast(origins, locate, score, start, hours_ahead):
+    """origins x saatler satırlarını tek çağrıda skorla; locate(origin) -> (lat, lng)
+
+    score(hours, days, months, lats, lngs) -> (sürüm, sınıflar, olasılıklar)
+    """
+    started = time.perf_counter()
+    origins = list(dict.fromkeys(origins))
+    locations = np.array([locate(origin) for origin in origins], dtype=np.float64).reshape(-1, 2)
+    first = start.astype(datetime)
+    _, hours, days, months = time_slots(first, first + timedelta(hours=hours_ahead), 60)
+
+    count = len(origins)
+    if count:
+        version, classes, probabilities = score(
+            np.tile(hours, count), np.tile(days, count), np.tile(months, count),
+            np.repeat(locations[:, 0], hours_ahead), np.repeat(locations[:, 1], hours_ahead)
+        )
+        classes = np.asarray(classes)
+        probabilities = np.asarray(probabilities, dtype=np.float32).reshape(count, hours_ahead, -1)
+        levels = classes.take(np.argmax(probabilities, axis=2)).astype(np.uint8)
+    else:
+        version, classes = None, np.empty(0, dtype=np.int64)
+        levels = np.empty((0, hours_ahead), dtype=np.uint8)
+        probabilities = np.empty((0, hours_ahead, 0), dtype=np.float32)
+
+    return ForecastSnapshot(
+        start, hours_ahead, version, classes,
+        {origin: row for row, origin in enumerate(origins)},
+        locations, levels, probabilities,
+        datetime.now().isoformat(timespec="seconds"),
+        round(time.perf_counter() - started, 3)
+    )
+
+
+def merge_snapshots(base, extra):
+    """Aynı saat ve sürüme ait iki snapshot'ı birleştir (extra'daki noktalar sona eklenir)"""
+    offset = len(base.index)
+    index = dict(base.index)
+    index.update((origin, offset + row) for origin, row in extra.index.items())
+    return base._replace(
+        index=index,
+        locations=np.concatenate([base.locations, extra.locations]),
+        levels=np.concatenate([base.levels, extra.levels]),
+        probabilities=np.concatenate([base.probabilities, extra.probabilities])
+    )
+
+
+class FavoritesForecaster:
+    """load_origins() tüm farklı favori başlangıçlarını döndürür; sonuçlar saatlik yenilenir"""
+
+    def __init__(self, load_origins, locate, score, version, hours_ahead=6, refresh_interval=300,
+                 clock=datetime.now):
+        self.load_origins = load_origins
+        self.locate = locate
+        self.score = score
+        self.version = version  # Etkin model sürümünü döndüren fonksiyon
+        self.hours_ahead = hours_ahead
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {
+            "refreshes": 0,
+            "refresh_seconds_last": None,
+            "refresh_seconds_max": 0.0,
+            "served": 0,
+            "served_precomputed": 0,
+            "computed_on_demand": 0,
+            "errors": 0
+        }
+
+    def current_hour(self):
+        return np.datetime64(self.clock().replace(tzinfo=None), "h")
+
+    def is_fresh(self, snapshot):
+        return (snapshot is not None and snapshot.start == self.current_hour()
+                and snapshot.model_version == self.version())
+
+    def refresh(self):
+        """Tüm favori başlangıçlarını yeniden skorla ve snapshot'ı değiştir"""
+        origins = self.load_origins()
+        snapshot = compute_forecast(origins, self.locate, self.score, self.current_hour(), self.hours_ahead)
+        with self._lock:
+            self._snapshot = snapshot
+        self._stats["refreshes"] += 1
+        self._stats["refresh_seconds_last"] = snapshot.seconds
+        self._stats["refresh_seconds_max"] = max(self._stats["refresh_seconds_max"], snapshot.seconds)
+        logger.info("Favori tahminleri yenilendi", extra={"fields": {
+            "origins": len(snapshot.index),
+            "hours": snapshot.hours,
+            "model_version": snapshot.model_version,
+            "seconds": snapshot.seconds
+        }})
+        return snapshot
+
+    def missing(self, origins):
+        """forecast(origins) çağrısında yeniden hesaplanacak (koordinatı gerekecek) noktalar"""
+        snapshot = self._snapshot
+        if not self.is_fresh(snapshot):
+            return list(dict.fromkeys(origins))
+        return [origin for origin in dict.fromkeys(origins) if origin not in snapshot.index]
+
+    def forecast(self, origins, locate=None):
+        """İstenen tüm noktaları içeren snapshot; eksik ya da eski olanlar tek çağrıda hesaplanır
+
+        locate verilirse eksik noktalar self.locate yerine onunla koordinata çevrilir.
+        """
+        locate = locate or self.locate
+        origins = list(dict.fromkeys(origins))
+        self._stats["served"] += len(origins)
+        snapshot = self._snapshot
+        if not self.is_fresh(snapshot):
+            # Eski snapshot saklanmaz; arka plan yenilemesi tüm noktaları yeniden hesaplar
+            self._stats["computed_on_demand"] += len(origins)
+            return compute_forecast(origins, locate, self.score, self.current_hour(), self.hours_ahead)
+
+        missing = [origin for origin in origins if origin not in snapshot.index]
+        self._stats["served_precomputed"] += len(origins) - len(missing)
+        if not missing:
+            return snapshot
+        self._stats["computed_on_demand"] += len(missing)
+        extra = compute_forecast(missing, locate, self.score, snapshot.start, self.hours_ahead)
+        if extra.model_version != snapshot.model_version:
+            return extra if len(missing) == len(origins) else self.forecast(origins, locate)
+        with self._lock:
+            # Yeni eklenen favoriler bir sonraki yenilemeye kadar da hazır kalsın
+            if self._snapshot is snapshot:
+                self._snapshot = snapshot = merge_snapshots(snapshot, extra)
+            else:
+                snapshot = merge_snapshots(snapshot, extra)
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="favorites-forecaster", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _seconds_to_next_hour(self):
+        now = self.clock()
+        return 3600 - (now.minute * 60 + now.second) + 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                self._stats["errors"] += 1
+                logger.exception("Favori tahminleri hesaplanamadı")
+            # Saat dönünce ilk dilim değişir: beklemeden yenilenir
+            self._stop.wait(min(self.refresh_interval, self._seconds_to_next_hour()))
+
+    def stats(self):
+        snapshot = self._snapshot
+        return dict(
+            self._stats,
+            origins=len(snapshot.index) if snapshot is not None else 0,
+            start=str(snapshot.start) if snapshot is not None else None,
+            model_version=snapshot.model_version if snapshot is not None else None,
+            computed_at=snapshot.computed_at if snapshot is not None else None,
+            fresh=self.is_fresh(snapshot),
+            hours_ahead=self.hours_ahead
+        )
@@ -0,0 +1,211 @@
+# RandomForest'ın düz dizilere derlenmiş hali
+#
+# sklearn'ün tek satırlık predict_proba maliyetinin çoğu girdi doğrulama ve
+# ağaçlar arası thread dağıtımıdır. Burada tüm ağaçların tree_ dizileri (feature,
+# threshold, children, value) uç uca eklenip tek bir yapı olarak tutulur ve bir
+# batch'teki tüm satırlar tüm ağaçlarda NumPy ile birlikte ilerletilir.
+#
+# Çocuklar tek dizide tutulur: children[2 * i] sol, children[2 * i + 1] sağ
+# çocuktur; bir adım children[2 * node + (x > threshold)] ile atılır. Yaprak
+# düğümler kendilerine işaret eder, böylece tüm düğümler aynı işlemle
+# ilerletilebilir. Ağaç olasılıkları sklearn ile aynı sırayla (ağaç sırasına
+# göre) toplanır; n_jobs=1 ile sklearn sonucu bit düzeyinde aynıdır.
+
+import json
+import os
+
+import numpy as np
+
+ARRAY_NAMES = ("feature", "threshold", "children", "value", "roots", "depths")
+
+# Bu satır sayısına kadar ara diziler her adımda yeniden ayrılır: tek /predict
+# gibi küçük çağrılarda tampon hazırlığı adımların kendisinden pahalıdır
+SMALL_BATCH_ROWS = 4
+
+# Daha büyük batch'lerde ağaçlar gruplar halinde ilerletilir; bir grup yaklaşık
+# bu kadar (satır, ağaç) çifti taşır. Az satırda tüm ağaçlar tek grupta, çok
+# satırda birkaç ağaç birlikte ilerler. NumPy çağrısı sayısı ağaç x derinlik
+# değil grup x derinlik olur, ara diziler de önbellekte kalır.
+PAIRS_PER_GROUP = 65536
+
+
+def round_down_float32(values):
+    """Her değerden küçük ya da eşit en büyük float32
+
+    float32 x için x > t ile x > round_down_float32(t) aynı sonucu verir: t float32 ise
+    aynı sayıdır, değilse aradaki float32 yoktur. Eşikler yarı boyutta, karşılaştırma float32'de.
+    """
+    rounded = values.astype(np.float32)
+    over = rounded.astype(np.float64) > values
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+class FlatForest:
+    """RandomForestClassifier yerine kullanılabilen predict/predict_proba değerlendiricisi"""
+
+    source_type = "RandomForestClassifier"
+
+    def __init__(self, feature, threshold, children, value, roots, depths, classes, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.depths = depths
+        self.classes_ = np.asarray(classes)
+        self.max_depth = int(depths.max()) if len(depths) else 0
+        self.n_features_in_ = int(n_features)
+        self.threshold32 = round_down_float32(threshold)
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Eğitilmiş bir RandomForestClassifier'ın ağaçlarını düz dizilere aktar"""
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Sadece tek çıktılı sınıflandırıcılar desteklenir")
+
+        features, thresholds, children, values, roots, depths = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count) + offset
+            is_leaf = tree.children_left < 0
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            pairs = np.empty((tree.node_count, 2), dtype=np.int32)
+            pairs[:, 0] = np.where(is_leaf, node_ids, tree.children_left + offset)
+            pairs[:, 1] = np.where(is_leaf, node_ids, tree.children_right + offset)
+            children.append(pairs.ravel())
+
+            # scikit-learn >= 1.4 yapraklarda sınıf oranlarını saklar; eski sürümler
+            # ağırlıklı sayıları saklayıp predict_proba'da normalize eder
+            value = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+            totals = value.sum(axis=1)
+            if not np.allclose(totals, 1.0):
+                totals[totals == 0.0] = 1.0
+                value = value / totals[:, np.newaxis]
+            values.append(value)
+
+            roots.append(offset)
+            depths.append(tree.max_depth)
+            offset += tree.node_count
+
+        return cls(
+            np.concatenate(features),
+            np.concatenate(thresholds),
+            np.concatenate(children),
+            np.concatenate(values),
+            np.asarray(roots, dtype=np.int32),
+            np.asarray(depths, dtype=np.int32),
+            model.classes_,
+            model.n_features_in_
+        )
+
+    def apply(self, X):
+        """Her satırın her ağaçta düştüğü yaprağı (n_samples, n_estimators) döndür"""
+        # sklearn ağaçları girdiyi float32'ye çevirip float64 eşikle karşılaştırır
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_samples, n_features = X.shape
+        if n_samples > SMALL_BATCH_ROWS:
+            return self._leaves(X).T
+
+        # Tüm (satır, ağaç) çiftleri tek dizide birlikte ilerler
+        flat_X = X.ravel()
+        feature, threshold, children = self.feature, self.threshold32, self.children
+        row_offsets = np.repeat(np.arange(n_samples, dtype=np.int32) * n_features, len(self.roots))
+        nodes = np.tile(self.roots, n_samples)
+        for _ in range(self.max_depth):
+            go_right = flat_X[row_offsets + feature[nodes]] > threshold[nodes]
+            nodes = children[2 * nodes + go_right]
+        return nodes.reshape(n_samples, len(self.roots))
+
+    def _leaves(self, X):
+        """Ağaç grupları halinde yapraklar; (n_estimators, n_samples)
+
+        Adım başına dört gather ve iki aritmetik işlem. Ara diziler grup başına bir kez
+        ayrılıp out= ile yeniden kullanılır; mode="clip" out'u ara kopyadan geçirmez
+        (indeksler zaten geçerlidir).
+        """
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        feature, threshold, children = self.feature, self.threshold32, self.children
+        n_trees = len(self.roots)
+        group = max(1, min(n_trees, PAIRS_PER_GROUP // n_samples))
+        offsets = np.tile(np.arange(n_samples, dtype=np.int32) * n_features, group)
+        leaves = np.empty((n_trees, n_samples), dtype=children.dtype)
+
+        for start in range(0, n_trees, group):
+            roots = self.roots[start:start + group]
+            size = len(roots) * n_samples
+            row_offsets = offsets[:size]
+            nodes = np.repeat(roots, n_samples)
+            following = np.empty_like(nodes)
+            positions = np.empty(size, dtype=np.int32)
+            values = np.empty(size, dtype=np.float32)
+            thresholds = np.empty(size, dtype=np.float32)
+            go_right = np.empty(size, dtype=bool)
+            for _ in range(int(self.depths[start:start + group].max())):
+                np.take(feature, nodes, out=positions, mode="clip")
+                positions += row_offsets
+                np.take(flat_X, positions, out=values, mode="clip")
+                np.take(threshold, nodes, out=thresholds, mode="clip")
+                np.greater(values, thresholds, out=go_right)
+                nodes *= 2
+                nodes += go_right
+                np.take(children, nodes, out=following, mode="clip")
+                nodes, following = following, nodes
+            leaves[start:start + len(roots)] = nodes.reshape(len(roots), n_samples)
+        return leaves
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        # RandomForestClassifier gibi ağaç sırasıyla topla, sonra ağaç sayısına böl.
+        # np.sum ikili (pairwise) topladığı için sonuç bitleri değişir; accumulate sıralıdır.
+        n_samples, n_trees = leaves.shape
+        if n_samples * n_trees <= PAIRS_PER_GROUP:
+            proba = np.add.accumulate(self.value[leaves], axis=1)[:, -1]
+        else:
+            proba = np.zeros((n_samples, self.value.shape[1]), dtype=np.float64)
+            tree_proba = np.empty_like(proba)
+            for tree_leaves in leaves.T:
+                np.take(self.value, tree_leaves, axis=0, out=tree_proba, mode="clip")
+                proba += tree_proba
+        proba /= n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def save(self, directory):
+        """Dizileri ayrı .npy dosyaları olarak yaz (np.load(mmap_mode='r') ile açılabilir)"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(directory, "forest.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "classes": self.classes_.tolist(),
+                "n_features": self.n_features_in_,
+                "n_estimators": self.n_estimators,
+                "node_count": self.node_count
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        with open(os.path.join(directory, "forest.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        # np.memmap alt sınıfı her indekslemede ek iş yapar; np.asarray aynı belleği
+        # gösteren düz bir ndarray döndürür
+        arrays = {
+            name: np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode))
+            for name in ARRAY_NAMES
+        }
+        return cls(classes=meta["classes"], n_features=meta["n_features"], **arrays)
@@ -0,0 +1,164 @@
+# Yer adı -> koordinat indeksi
+#
+# Adres içindeki yer adları Aho-Corasick otomatı ile tek geçişte bulunur; birden
+# fazla eşleşme varsa en uzun isim seçilir (eşitlikte adreste önce geçen). İsim
+# bir kelimenin başında başlamalıdır, sonundaki ekler serbesttir ("kadıköyde").
+# Koordinattan en yakın yer adını bulmak için geohash hücrelerine göre
+# gruplanmış bir ters indeks tutulur.
+#
+# Gazetteer dosyası UTF-8 CSV'dir: name,lat,lng (başlık satırı isteğe bağlı)
+
+import csv
+import math
+
+import geohash  # pip install python-geohash
+
+from geocode_cache import normalize_address
+
+# Ters indeksteki hücre hassasiyeti (6 karakter ~ 1.2 km x 0.6 km); komşu hücre
+# halkası en az ~600 m yarıçapı kapsar
+REVERSE_PRECISION = 6
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+class Gazetteer:
+    """Normalize edilmiş yer adları üzerinde en uzun eşleşme ve ters geohash indeksi"""
+
+    def __init__(self):
+        self.names = []
+        self.coords = []
+        self._keys = {}
+        # Aho-Corasick düğümleri: geçişler, derinlik, hata bağlantısı, biten isim, çıktı bağlantısı
+        self._goto = [{}]
+        self._depth = [0]
+        self._fail = [0]
+        self._output = [-1]
+        self._output_link = [0]
+        self._built = True
+        self._cells = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, lat, lng):
+        """İsim ekle; aynı normalize isim tekrar eklenirse ilk kayıt korunur"""
+        key = normalize_address(name)
+        if not key or key in self._keys:
+            return
+        entry = len(self.names)
+        self._keys[key] = entry
+        self.names.append(name)
+        self.coords.append((float(lat), float(lng)))
+
+        node = 0
+        for char in key:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._depth.append(self._depth[node] + 1)
+                self._fail.append(0)
+                self._output.append(-1)
+                self._output_link.append(0)
+            node = next_node
+        self._output[node] = entry
+        self._built = False
+
+        cell = geohash.encode(float(lat), float(lng), REVERSE_PRECISION)
+        self._cells.setdefault(cell, []).append(entry)
+
+    def build(self):
+        """Hata ve çıktı bağlantılarını genişlik öncelikli olarak hesapla"""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+            self._output_link[node] = 0
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                # Bu düğümden sonra sonek zincirindeki ilk isim biten düğüm
+                target = self._fail[child]
+                self._output_link[child] = target if self._output[target] >= 0 else self._output_link[target]
+                queue.append(child)
+        self._built = True
+        return self
+
+    @classmethod
+    def from_locations(cls, locations):
+        gazetteer = cls()
+        for name, (lat, lng) in locations.items():
+            gazetteer.add(name, lat, lng)
+        return gazetteer.build()
+
+    def load_csv(self, path):
+        """name,lat,lng satırlarını ekle; eklenen kayıt sayısını döndür"""
+        before = len(self.names)
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if len(row) < 3 or row[0].startswith("#"):
+                    continue
+                try:
+                    lat, lng = float(row[1]), float(row[2])
+                except ValueError:
+                    continue  # Başlık satırı
+                self.add(row[0], lat, lng)
+        self.build()
+        return len(self.names) - before
+
+    def match(self, address):
+        """Adresteki en uzun yer adını (name, lat, lng) olarak döndür, yoksa None"""
+        if not self._built:
+            self.build()
+        text = normalize_address(address)
+        goto, depth, fail = self._goto, self._depth, self._fail
+        output, output_link = self._output, self._output_link
+
+        best, best_length = -1, 0
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            found = node if output[node] >= 0 else output_link[node]
+            while found:
+                length = depth[found]
+                start = position - length + 1
+                # İsim bir kelimenin başında başlamalı ("pendik" -> "endik" eşleşmesin)
+                if length > best_length and (start == 0 or text[start - 1] == " "):
+                    best, best_length = output[found], length
+                found = output_link[found]
+
+        if best < 0:
+            return None
+        lat, lng = self.coords[best]
+        return self.names[best], lat, lng
+
+    def nearest(self, lat, lng, max_km=0.5):
+        """Koordinata en yakın yer adını (name, mesafe_km) olarak döndür, yoksa None"""
+        cell = geohash.encode(float(lat), float(lng), REVERSE_PRECISION)
+        candidates = []
+        for neighbour in [cell] + geohash.neighbors(cell):
+            candidates.extend(self._cells.get(neighbour, ()))
+
+        best, best_distance = None, max_km
+        for entry in candidates:
+            distance = haversine_km(lat, lng, *self.coords[entry])
+            if distance <= best_distance:
+                best, best_distance = entry, distance
+        if best is None:
+            return None
+        return self.names[best], round(best_distance, 3)
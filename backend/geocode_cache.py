@@ -0,0 +1,166 @@
+# Geocoding sonuçları için iki katmanlı önbellek
+#
+# 1. katman: süreç içi LRU (OrderedDict)
+# 2. katman: SQLite dosyası (yeniden başlatmalarda korunur)
+#
+# Bulunamayan adresler de (negatif kayıt) ayrı bir TTL ile saklanır, böylece
+# aynı hatalı adres için API'ye tekrar tekrar gidilmez. Asıl geocoder bir
+# fonksiyon olarak verilir; testlerde yerel bir stub ile değiştirilebilir.
+# Geocoder'ı kendisi çağıran (ör. asenkron) kullanıcılar get yerine
+# lookup / store / failed üçlüsünü kullanır.
+
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+_PUNCTUATION = re.compile(r"[^\w]+")
+
+
+def normalize_address(address):
+    """Adresi önbellek anahtarına çevir (Türkçe küçük harf, noktalama ve boşluk sadeleştirme)"""
+    # str.lower() 'I' -> 'i' ve 'İ' -> 'i̇' yapar; Türkçe için önce elle dönüştürülür
+    text = address.replace("I", "ı").replace("İ", "i")
+    text = unicodedata.normalize("NFC", text.lower())
+    text = _PUNCTUATION.sub(" ", text.replace("_", " "))
+    return " ".join(text.split())
+
+
+class GeocodeCache:
+    """Adres -> (lat, lng) önbelleği; geocoder(address) (lat, lng) ya da None döndürmeli"""
+
+    def __init__(self, geocoder, db_path=None, memory_size=1024,
+                 ttl=30 * 24 * 3600, negative_ttl=24 * 3600, clock=time.time):
+        self.geocoder = geocoder
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "errors": 0
+        }
+
+    def _connection(self):
+        # Bağlantı ilk kullanımda açılır; çağıran _lock'u tutar
+        if self._db is None and self.db_path:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS geocode_cache (
+                    address_key TEXT PRIMARY KEY,
+                    lat REAL,
+                    lng REAL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _read(self, key, now):
+        """Önbellekteki kaydı (lat, lng, expires_at) olarak döndür, yoksa None"""
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[2] > now:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry
+            del self._memory[key]
+
+        db = self._connection()
+        if db is not None:
+            row = db.execute(
+                "SELECT lat, lng, expires_at FROM geocode_cache WHERE address_key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[2] > now:
+                self._remember(key, row)
+                self._stats["disk_hits"] += 1
+                return row
+        return None
+
+    def _write(self, key, entry):
+        self._remember(key, entry)
+        db = self._connection()
+        if db is not None:
+            db.execute(
+                "INSERT OR REPLACE INTO geocode_cache (address_key, lat, lng, expires_at) VALUES (?, ?, ?, ?)",
+                (key,) + tuple(entry)
+            )
+            db.commit()
+
+    def lookup(self, address):
+        """Önbellekteki koordinat; negatif kayıtta (None, None), kayıt yoksa None (geocoder'a gidilmeli)"""
+        key = normalize_address(address)
+        now = self.clock()
+
+        with self._lock:
+            entry = self._read(key, now)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        if entry[0] is None:
+            self._stats["negative_hits"] += 1
+            return None, None
+        return entry[0], entry[1]
+
+    def store(self, address, result):
+        """Geocoder sonucunu ((lat, lng) ya da None) yaz ve (lat, lng) / (None, None) döndür"""
+        now = self.clock()
+        if result is None:
+            entry = (None, None, now + self.negative_ttl)
+        else:
+            entry = (float(result[0]), float(result[1]), now + self.ttl)
+        with self._lock:
+            self._write(normalize_address(address), entry)
+        return entry[0], entry[1]
+
+    def failed(self):
+        """Geçici hatalar (timeout, ağ) önbelleğe yazılmaz, sadece sayılır"""
+        self._stats["errors"] += 1
+
+    def get(self, address):
+        """Adresin koordinatını döndür; bulunamazsa (None, None)"""
+        cached = self.lookup(address)
+        if cached is not None:
+            return cached
+
+        # API çağrısı kilit dışında yapılır, diğer istekler beklemez
+        try:
+            result = self.geocoder(address)
+        except Exception:
+            self.failed()
+            return None, None
+        return self.store(address, result)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM geocode_cache")
+                db.commit()
+
+    def stats(self):
+        lookups = sum(self._stats[name] for name in ("memory_hits", "disk_hits", "misses"))
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+        return dict(
+            self._stats,
+            lookups=lookups,
+            hit_rate=round(hits / lookups, 4) if lookups else None,
+            memory_entries=len(self._memory)
+        )
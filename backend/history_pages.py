@@ -0,0 +1,101 @@
+# Arama geçmişi için keyset (imleç) sayfalama
+#
+# Sayfalar (created_at, id) sırasıyla ilerler. İmleç, sayfadaki son satırın bu
+# ikilisidir; sonraki sayfa "bu ikiliden küçük" satırlarla başlar. OFFSET gibi
+# önceki satırları sayıp atmak gerekmez, sayfa ne kadar geride olursa olsun
+# maliyet aynıdır. created_at aynı saniyede toplu yazılan satırlarda çakışır
+# (HistoryWriter), sıralamayı id tamamlar.
+#
+# Sorgu iki adımdır:
+# 1. idx_user_datetime (user_id, created_at) üzerinden sayfanın (id, created_at)
+#    anahtarları okunur. InnoDB ikincil indeksleri birincil anahtarı (id)
+#    içerdiği için bu adım tabloya hiç gitmez.
+# 2. Sayfanın ETag'i bu anahtarlardan hesaplanır; geçmiş kayıtları
+#    değişmediği için aynı anahtarlar aynı içerik demektir. İstemcinin
+#    ETag'i eşleşirse satırlar (ve JSON sütunu) hiç okunmadan 304 döner.
+#    Eşleşmezse yalnızca istenen sütunlar birincil anahtarla okunur.
+
+import base64
+import hashlib
+from datetime import datetime
+
+HISTORY_FIELDS = ("id", "origin", "destination", "datetime", "prediction_result", "created_at")
+KEY_FIELDS = ("id", "created_at")  # İmleç için her zaman döner
+
+
+def parse_fields(value):
+    """fields= parametresini HISTORY_FIELDS sırasına göre demet haline getir"""
+    if not value:
+        return HISTORY_FIELDS
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested.difference(HISTORY_FIELDS)
+    if unknown:
+        raise ValueError(f"Bilinmeyen alan: {', '.join(sorted(unknown))}")
+    requested.update(KEY_FIELDS)
+    return tuple(name for name in HISTORY_FIELDS if name in requested)
+
+
+def encode_cursor(created_at, row_id):
+    text = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value):
+    """encode_cursor'ın tersi: (created_at, id); bozuk imleçte ValueError"""
+    try:
+        text = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode("utf-8")
+        created_at, row_id = text.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Geçersiz imleç") from e
+
+
+def key_query(user_id, limit, before=None, after=None):
+    """Sayfanın (id, created_at) anahtarları: before'dan eskiler (yeniden eskiye) ya da after'dan yeniler (eskiden yeniye)
+
+    limit + 1 satır istenir; fazladan satır sonraki sayfanın varlığını gösterir.
+    """
+    sql = "SELECT id, created_at FROM search_history WHERE user_id = %s"
+    params = [user_id]
+    # Baştaki tek sütunlu koşul gereksiz görünür ama indeksin aralık taraması için gereklidir:
+    # planlayıcı OR'lu koşulu tek başına aralığa çeviremeyip kullanıcının tüm satırlarını tarayabilir
+    if after is not None:
+        sql += (" AND created_at >= %s AND (created_at > %s OR (created_at = %s AND id > %s))"
+                " ORDER BY created_at ASC, id ASC")
+        params += [after[0], after[0], after[0], after[1]]
+    else:
+        if before is not None:
+            sql += " AND created_at <= %s AND (created_at < %s OR (created_at = %s AND id < %s))"
+            params += [before[0], before[0], before[0], before[1]]
+        sql += " ORDER BY created_at DESC, id DESC"
+    sql += " LIMIT %s"
+    params.append(limit + 1)
+    return sql, tuple(params)
+
+
+def rows_query(user_id, fields, ids):
+    """Sayfa satırlarının istenen sütunları (birincil anahtarla)"""
+    placeholders = ", ".join(["%s"] * len(ids))
+    sql = (f"SELECT {', '.join(fields)} FROM search_history "
+           f"WHERE user_id = %s AND id IN ({placeholders})")
+    return sql, (user_id,) + tuple(ids)
+
+
+def in_key_order(keys, rows):
+    """rows_query sonucunu anahtar sırasına diz (arada silinen satırlar atlanır)"""
+    by_id = {row[0]: row for row in rows}
+    return [by_id[key[0]] for key in keys if key[0] in by_id]
+
+
+def page_etag(user_id, fields, mode, limit, keys):
+    """Sayfa içeriğinin doğrulayıcısı: aynı anahtarlar ve alanlar aynı yanıtı üretir"""
+    digest = hashlib.sha1(repr((user_id, fields, mode, limit, keys)).encode("utf-8")).hexdigest()
+    return f"h-{digest[:20]}"
+
+
+def serialize(row, fields):
+    item = dict(zip(fields, row))
+    for name in ("datetime", "created_at"):
+        if item.get(name) is not None:
+            item[name] = item[name].isoformat()
+    return item
@@ -0,0 +1,248 @@
+# Arama geçmişi için arka planda toplu yazma (write-behind) kuyruğu
+#
+# İstek sadece satırı kuyruğa koyar; arka plandaki işçi satırları boyut ya da
+# süre dolunca tek bir executemany ile veritabanına yazar. Kuyruk sınırlıdır,
+# doluysa submit() queue.Full fırlatır. Veritabanı erişilemezse ya da uygulama
+# kapanırken yazılamayan satırlar JSON Lines olarak diske dökülür ve daha sonra
+# tekrar denenir.
+#
+# Yalnızca geçici hatalar (retry_errors: bağlantı kopması, havuz zaman aşımı)
+# tekrar denenir. Parti başka bir hatayla reddedilirse (yabancı anahtar, sütun
+# boyu) satırlar tek tek yazılır; yazılamayanlar dead-letter dosyasına ayrılır,
+# böylece tek bir bozuk satır partideki diğer satırları bekletmez.
+#
+# Sayaçlar hem istek thread'lerinden (submit) hem işçiden güncellenir; tüm
+# güncellemeler ve stats() okuması kuyruğun kendi kilidi (queue.mutex) altında
+# yapılır. Bu kilit tekrar girilemez, altındayken kuyruk metodları çağrılmaz.
+
+import json
+import os
+import queue
+import threading
+import time
+
+from logging_setup import get_logger
+
+logger = get_logger("history")
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """flush_rows(rows) satırları tek seferde yazan fonksiyon; hata durumunda exception fırlatmalı"""
+
+    def __init__(self, flush_rows, max_queue=10000, batch_size=200, flush_interval=0.5,
+                 put_timeout=0.05, spill_path=None, retry_interval=30, retry_errors=(Exception,),
+                 dead_letter_path=None):
+        self.flush_rows = flush_rows
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.spill_path = spill_path
+        self.retry_interval = retry_interval
+        self.retry_errors = retry_errors
+        self.dead_letter_path = dead_letter_path
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._next_retry = 0.0
+        self._stats_lock = self._queue.mutex  # _stats; kuyruk kilidiyle aynı
+        self._stats = {
+            "enqueued": 0,
+            "rejected": 0,
+            "flushed_rows": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "spilled_rows": 0,
+            "replayed_rows": 0,
+            "rejected_batches": 0,
+            "dead_lettered_rows": 0,
+            "flush_seconds_total": 0.0,
+            "flush_seconds_max": 0.0
+        }
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=10):
+        """Kuyruğu boşalt, yazılamayan satırları diske dök"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        # İşçi zamanında bitmediyse kalan satırlar kaybolmasın
+        leftover = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not _STOP:
+                leftover.append(row)
+        if leftover:
+            self._spill(leftover)
+
+    def submit(self, row):
+        """Satırı kuyruğa ekle; kuyruk doluysa queue.Full fırlatır (backpressure)"""
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            self._count("rejected")
+            raise
+        self._count("enqueued")
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            if time.monotonic() >= self._next_retry:
+                self._replay_spill()
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if first is _STOP:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            self._flush(batch)
+
+        # Kapanışta kuyrukta kalanlar da yazılır
+        remaining = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not _STOP:
+                remaining.append(row)
+        for start in range(0, len(remaining), self.batch_size):
+            self._flush(remaining[start:start + self.batch_size])
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        try:
+            self.flush_rows(batch)
+        except self.retry_errors as e:
+            self._retry_later(batch, e)
+            return False
+        except Exception as e:
+            self._count("rejected_batches")
+            logger.warning("Arama geçmişi partisi reddedildi, satırlar tek tek yazılıyor",
+                           extra={"fields": {"rows": len(batch), "error": str(e)}})
+            return self._flush_each(batch)
+
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self._stats["flushes"] += 1
+            self._stats["flushed_rows"] += len(batch)
+            self._stats["flush_seconds_total"] += elapsed
+            self._stats["flush_seconds_max"] = max(self._stats["flush_seconds_max"], elapsed)
+        return True
+
+    def _flush_each(self, batch):
+        """Partiyi satır satır yaz; geçici hatada kalan satırlar diske alınır (False döner)"""
+        for index, row in enumerate(batch):
+            try:
+                self.flush_rows([row])
+            except self.retry_errors as e:
+                self._retry_later(batch[index:], e)
+                return False
+            except Exception as e:
+                self._dead_letter(row, e)
+            else:
+                self._count("flushed_rows")
+        return True
+
+    def _retry_later(self, rows, error):
+        self._count("failed_flushes")
+        self._next_retry = time.monotonic() + self.retry_interval
+        logger.warning("Arama geçmişi yazılamadı, satırlar diske alınıyor",
+                       extra={"fields": {"rows": len(rows), "error": str(error)}})
+        self._spill(rows)
+
+    def _dead_letter(self, row, error):
+        """Kalıcı olarak reddedilen satır tekrar denenmez; incelenmek üzere ayrı dosyaya yazılır"""
+        self._count("dead_lettered_rows")
+        logger.error("Arama kaydı reddedildi, dead-letter dosyasına ayrıldı",
+                     extra={"fields": {"error": str(error), "path": self.dead_letter_path}})
+        if not self.dead_letter_path:
+            return
+        with self._spill_lock:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"row": row, "error": str(error)}, ensure_ascii=False, default=str) + "\n")
+
+    def _spill(self, rows):
+        if not self.spill_path:
+            logger.error("Spill dosyası tanımlı değil, arama kayıtları kaybedildi",
+                         extra={"fields": {"rows": len(rows)}})
+            return
+        with self._spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        self._count("spilled_rows", len(rows))
+
+    def _replay_spill(self):
+        """Diske dökülmüş satırları tekrar yazmayı dene"""
+        if not self.spill_path:
+            return
+        replay_path = f"{self.spill_path}.replay"
+        with self._spill_lock:
+            if os.path.exists(self.spill_path) and not os.path.exists(replay_path):
+                os.replace(self.spill_path, replay_path)
+        if not os.path.exists(replay_path):
+            return
+
+        with open(replay_path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+        # Dosya ancak satırlar yazıldıktan ya da tekrar döküldükten sonra silinir;
+        # arada çökülürse satırlar kaybolmaz (en az bir kez yazılır)
+        for start in range(0, len(rows), self.batch_size):
+            chunk = rows[start:start + self.batch_size]
+            if not self._flush(chunk):
+                # _flush bu parçayı geri döktü; kalanlar da beklemeye alınır
+                rest = rows[start + self.batch_size:]
+                if rest:
+                    self._spill(rest)
+                break
+            self._count("replayed_rows", len(chunk))
+        os.remove(replay_path)
+
+    def stats(self):
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+            queue_depth = len(self._queue.queue)  # qsize() aynı kilidi alır
+        flushes = snapshot["flushes"]
+        return dict(
+            snapshot,
+            queue_depth=queue_depth,
+            queue_capacity=self._queue.maxsize,
+            flush_seconds_avg=round(snapshot["flush_seconds_total"] / flushes, 6) if flushes else 0.0,
+            spill_pending=bool(self.spill_path) and os.path.exists(self.spill_path)
+        )
@@ -0,0 +1,95 @@
+# pandas'sız çıkarım yardımcıları
+#
+# Tek satırlık tahminde pd.DataFrame ve pd.to_datetime maliyeti modelin kendisini
+# geçiyordu. Tarih standart kütüphane ile ayrıştırılır, özellikler doğrudan
+# float64 NumPy satırına yazılır ve StandardScaler dönüşümü yüklemede çıkarılan
+# parametrelerle (x - mean_) / scale_ olarak uygulanır. Sonuç sklearn'ün
+# transform() çıktısıyla bit düzeyinde aynıdır (aynı işlemler, aynı sıra).
+
+import threading
+from datetime import datetime
+
+import numpy as np
+
+FEATURE_COUNT = 9
+
+_buffers = threading.local()
+
+
+def parse_datetime(value):
+    """ISO 8601 tarihini ayrıştır ('Z' son eki ve milisaniye dahil)"""
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str):
+        raise ValueError(f"Geçersiz tarih: {value!r}")
+    text = value.strip()
+    if text.endswith(("Z", "z")):
+        # Python 3.11 öncesi fromisoformat 'Z' kabul etmez
+        text = text[:-1] + "+00:00"
+    return datetime.fromisoformat(text)
+
+
+def parse_step(value):
+    """'15m', '30min', '1h' gibi adım değerini dakika cinsinden döndür"""
+    text = str(value).strip().lower()
+    for suffix, minutes in (("min", 1), ("m", 1), ("h", 60)):
+        if text.endswith(suffix):
+            text, unit = text[:-len(suffix)], minutes
+            break
+    else:
+        unit = 1
+    try:
+        step = int(text) * unit
+    except ValueError:
+        raise ValueError(f"Geçersiz adım: {value!r}")
+    if step <= 0:
+        raise ValueError(f"Adım pozitif olmalı: {value!r}")
+    return step
+
+
+def time_slots(start, end, step_minutes):
+    """[start, end) aralığındaki dilimler (datetime64[m]) ve saat, haftanın günü, ay dizileri"""
+    # Saat dilimi bilgisi /predict'teki gibi yok sayılır: yerel duvar saati kullanılır
+    start = np.datetime64(start.replace(tzinfo=None), "m")
+    end = np.datetime64(end.replace(tzinfo=None), "m")
+    slots = np.arange(start, end, np.timedelta64(step_minutes, "m"))
+    days = slots.astype("datetime64[D]")
+    hours = ((slots - days) // np.timedelta64(1, "h")).astype(np.int64)
+    # 1970-01-01 Perşembe (weekday() == 3)
+    day_of_week = (days.astype(np.int64) + 3) % 7
+    months = slots.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    return slots, hours, day_of_week, months
+
+
+def feature_row(features):
+    """Özellikleri thread'e özel, önceden ayrılmış (1, 9) float64 satıra yaz"""
+    row = getattr(_buffers, "row", None)
+    if row is None:
+        row = _buffers.row = np.empty((1, FEATURE_COUNT), dtype=np.float64)
+    row[0] = features
+    return row
+
+
+class ScalerParams:
+    """StandardScaler'ın mean_/scale_ dizileri; transform her çağrıda yeni dizi döndürür"""
+
+    def __init__(self, mean, scale):
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+
+    @classmethod
+    def from_scaler(cls, scaler):
+        if scaler is None:
+            return None
+        mean = scaler.mean_ if getattr(scaler, "with_mean", True) else None
+        scale = scaler.scale_ if getattr(scaler, "with_std", True) else None
+        return cls(mean, scale)
+
+    def transform(self, matrix):
+        # sklearn ile aynı sıra: önce ortalama çıkarılır, sonra ölçeğe bölünür
+        scaled = np.array(matrix, dtype=np.float64, copy=True)
+        if self.mean is not None:
+            scaled -= self.mean
+        if self.scale is not None:
+            scaled /= self.scale
+        return scaled
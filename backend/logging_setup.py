@@ -0,0 +1,122 @@
+# Düşük maliyetli yapılandırılmış loglama
+#
+# İstek thread'i sadece LogRecord oluşturup kuyruğa koyar; biçimlendirme (JSON,
+# DataFrame repr vb.) ve stdout'a yazma QueueListener thread'inde yapılır.
+# Ek alanlar extra={"fields": {...}} ile verilir. Pahalı debug dökümleri
+# "crowdpredictor.dump" logger'ı üzerinden örneklenerek yazılır.
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+LOGGER_NAME = "crowdpredictor"
+DUMP_LOGGER_NAME = f"{LOGGER_NAME}.dump"
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Her kaydı tek satırlık JSON olarak yaz"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Geliştirme için okunabilir tek satır: mesaj + key=value alanlar"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Kaydı biçimlendirmeden kuyruğa koy; biçimlendirme dinleyici thread'inde yapılır"""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Varsayılan prepare() mesajı çağıran thread'de biçimlendirir. Alanlar her
+        # çağrıda yeni oluşturulduğu için kaydı olduğu gibi aktarmak güvenlidir.
+        return record
+
+    def enqueue(self, record):
+        # Kuyruk doluysa istek bekletilmez, kayıt düşürülür
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Kayıtların sadece belirli bir oranını geçir"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return self.rate >= 1 or random.random() < self.rate
+
+
+def setup_logging(level="INFO", json_output=True, dump_sample_rate=0.01,
+                  stream=None, queue_size=10000):
+    """Uygulama logger'ını kuyruk tabanlı bir sink'e bağla ve dinleyiciyi başlat"""
+    global _listener
+    stop_logging()
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JsonFormatter() if json_output else TextFormatter())
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+
+    logger = logging.getLogger(LOGGER_NAME)
+    for old_handler in list(logger.handlers):
+        logger.removeHandler(old_handler)
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+
+    dump_logger = logging.getLogger(DUMP_LOGGER_NAME)
+    dump_logger.filters.clear()
+    dump_logger.addFilter(SamplingFilter(dump_sample_rate))
+
+    listener.start()
+    _listener = listener
+    return listener
+
+
+@atexit.register
+def stop_logging():
+    """Kuyrukta bekleyen kayıtları yazıp dinleyiciyi durdur"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name=None):
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
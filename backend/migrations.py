@@ -0,0 +1,291 @@
+# Sürümlü şema göçleri (migrations)
+#
+# create_tables() her açılışta CREATE TABLE IF NOT EXISTS ve hatası yakalanan
+# bir ALTER TABLE çalıştırıyordu; daha eski sürümlerin kurduğu search_history
+# tablosunda idx_user_datetime indeksi de yoktu. Göçler artık
+# numaralıdır ve schema_migrations tablosuna yazılır: her biri bir kez
+# uygulanır. Aynı anda açılan birden fazla süreç GET_LOCK ile sıraya girer.
+#
+# Göçler mevcut nesneleri information_schema'dan kontrol eder; böylece
+# setup_database.sql ile kurulmuş (indeksleri zaten olan) bir veritabanında da
+# hatasız çalışır ve sadece kaydı ekler.
+#
+# Okuma yollarının planları EXPLAIN ile kontrol edilir:
+#   python migrations.py           # Bekleyen göçleri uygula
+#   python migrations.py --check   # Göçlerden sonra planları kontrol et (hata varsa çıkış kodu 1)
+
+import time
+from datetime import datetime
+
+import history_pages
+from logging_setup import get_logger
+
+logger = get_logger("migrations")
+
+MIGRATION_LOCK = "crowdpredictor_schema_migrations"
+
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def column_nullable(cursor, table, column):
+    cursor.execute("""
+        SELECT IS_NULLABLE FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, column))
+    return cursor.fetchone()[0] == "YES"
+
+
+def index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+
+def add_index(cursor, table, index, definition):
+    if not index_exists(cursor, table, index):
+        cursor.execute(f"ALTER TABLE {table} ADD {definition}")
+
+
+def _base_tables(cursor):
+    """İlk şema (create_tables'ın son kurduğu haliyle); 2 ve 3 daha eski kurulumları tamamlar"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        email VARCHAR(100) UNIQUE NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS search_history (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        origin VARCHAR(255) NOT NULL,
+        destination VARCHAR(255),
+        datetime TIMESTAMP NOT NULL,
+        prediction_result JSON,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+        INDEX idx_user_datetime (user_id, created_at)
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS favorites (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        origin VARCHAR(255) NOT NULL,
+        destination VARCHAR(255),
+        route_name VARCHAR(100),
+        prediction_result JSON,
+        search_datetime DATETIME,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+        INDEX idx_user_id (user_id)
+    )
+    """)
+
+
+def _favorites_search_datetime(cursor):
+    if not column_exists(cursor, "favorites", "search_datetime"):
+        cursor.execute("ALTER TABLE favorites ADD COLUMN search_datetime DATETIME")
+
+
+def _history_user_datetime(cursor):
+    """Geçmiş sayfaları: WHERE user_id ORDER BY created_at, id (InnoDB'de id indekse dahil)"""
+    add_index(cursor, "search_history", "idx_user_datetime", "INDEX idx_user_datetime (user_id, created_at)")
+
+
+def _favorites_unique_route(cursor):
+    """Aynı rota bir kullanıcıda bir kez: eski kopyaların en eskisi kalır"""
+    if index_exists(cursor, "favorites", "uq_user_route"):
+        return
+    cursor.execute("""
+        DELETE newer FROM favorites AS newer
+        JOIN favorites AS older
+          ON older.user_id = newer.user_id
+         AND older.origin = newer.origin
+         AND older.destination <=> newer.destination
+         AND older.id < newer.id
+    """)
+    if cursor.rowcount:
+        logger.info("Tekrarlanan favoriler silindi", extra={"fields": {"rows": cursor.rowcount}})
+    cursor.execute("ALTER TABLE favorites ADD UNIQUE KEY uq_user_route (user_id, origin, destination)")
+
+
+def _favorites_covering_indexes(cursor):
+    """Favori listesi ve /favorites/forecast tablodan okumadan, sıralama yapmadan; DISTINCT origin indeksten"""
+    add_index(cursor, "favorites", "idx_user_created_route",
+              "INDEX idx_user_created_route (user_id, created_at, origin, destination, route_name)")
+    add_index(cursor, "favorites", "idx_origin", "INDEX idx_origin (origin)")
+    # user_id ile başlayan başka indeksler olduğu için yabancı anahtar bu indekse ihtiyaç duymuyor
+    if index_exists(cursor, "favorites", "idx_user_id"):
+        cursor.execute("ALTER TABLE favorites DROP INDEX idx_user_id")
+
+
+def _favorites_destination_not_null(cursor):
+    """UNIQUE anahtar NULL'ları eşit saymaz: varışsız favoriler '' ile saklanır, tekrarları silinir"""
+    if not column_nullable(cursor, "favorites", "destination"):
+        return
+    cursor.execute("""
+        DELETE newer FROM favorites AS newer
+        JOIN favorites AS older
+          ON older.user_id = newer.user_id
+         AND older.origin = newer.origin
+         AND COALESCE(older.destination, '') = COALESCE(newer.destination, '')
+         AND older.id < newer.id
+        WHERE newer.destination IS NULL OR newer.destination = ''
+    """)
+    if cursor.rowcount:
+        logger.info("Tekrarlanan varışsız favoriler silindi", extra={"fields": {"rows": cursor.rowcount}})
+    cursor.execute("UPDATE favorites SET destination = '' WHERE destination IS NULL")
+    cursor.execute("ALTER TABLE favorites MODIFY destination VARCHAR(255) NOT NULL DEFAULT ''")
+
+
+def _refresh_tokens(cursor):
+    """Yenileme token'larının tek kullanımı ve logout: süreç belleğinde değil, veritabanında"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS refresh_tokens (
+        jti CHAR(32) PRIMARY KEY,
+        user_id INT NOT NULL,
+        expires_at DATETIME NOT NULL,
+        used TINYINT(1) NOT NULL DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+        INDEX idx_user_expires (user_id, expires_at)
+    )
+    """)
+
+
+MIGRATIONS = (
+    (1, "base_tables", _base_tables),
+    (2, "favorites_search_datetime", _favorites_search_datetime),
+    (3, "search_history_user_datetime_index", _history_user_datetime),
+    (4, "favorites_unique_route", _favorites_unique_route),
+    (5, "favorites_covering_indexes", _favorites_covering_indexes),
+    (6, "favorites_destination_not_null", _favorites_destination_not_null),
+    (7, "refresh_tokens", _refresh_tokens),
+)
+
+
+def migrate(connection, lock_timeout=30):
+    """Bekleyen göçleri sırayla uygula; uygulanan sürümlerin listesini döndür"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, lock_timeout))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Göç kilidi alınamadı, başka bir süreç göç uyguluyor olabilir")
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    seconds FLOAT
+                )
+            """)
+            cursor.execute("SELECT version FROM schema_migrations")
+            done = {row[0] for row in cursor.fetchall()}
+
+            applied = []
+            for version, name, apply in MIGRATIONS:
+                if version in done:
+                    continue
+                started = time.perf_counter()
+                # DDL MySQL'de otomatik commit edilir; kayıt göç bittikten sonra yazılır
+                apply(cursor)
+                seconds = time.perf_counter() - started
+                cursor.execute("INSERT INTO schema_migrations (version, name, seconds) VALUES (%s, %s, %s)",
+                               (version, name, seconds))
+                connection.commit()
+                applied.append(version)
+                logger.info("Göç uygulandı", extra={"fields": {
+                    "version": version, "name": name, "seconds": round(seconds, 3)
+                }})
+            return applied
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+# (ad, sorgu, parametreler, beklenen indeks, indeksten okunmalı mı)
+PLAN_CHECKS = (
+    ("geçmiş: ilk sayfa anahtarları", *history_pages.key_query(1, 50), "idx_user_datetime", True),
+    ("geçmiş: imleçli sayfa anahtarları", *history_pages.key_query(1, 50, before=(datetime(2025, 1, 1), 1000)),
+     "idx_user_datetime", True),
+    ("geçmiş: delta (since)", *history_pages.key_query(1, 50, after=(datetime(2025, 1, 1), 1000)),
+     "idx_user_datetime", True),
+    ("favoriler: liste",
+     "SELECT id, origin, destination, route_name, prediction_result, search_datetime, created_at "
+     "FROM favorites WHERE user_id = %s ORDER BY created_at DESC",
+     (1,), "idx_user_created_route", False),
+    ("favoriler: /favorites/forecast",
+     "SELECT id, origin, destination, route_name, created_at FROM favorites WHERE user_id = %s "
+     "ORDER BY created_at DESC",
+     (1,), "idx_user_created_route", True),
+    ("favoriler: rota araması",
+     "SELECT id FROM favorites WHERE user_id = %s AND origin = %s AND destination = %s",
+     (1, "Kadıköy, İstanbul", "Levent, İstanbul"), "uq_user_route", False),
+    ("favoriler: farklı başlangıçlar",
+     "SELECT DISTINCT origin FROM favorites", (), "idx_origin", True),
+)
+
+
+def check_plans(connection):
+    """PLAN_CHECKS'teki sorguların EXPLAIN çıktısı: (ad, geçti mi, açıklama) listesi
+
+    Beklenen indeks kullanılmalı, filesort ve temporary olmamalı; gerekiyorsa satır indeksten okunmalı.
+    """
+    cursor = connection.cursor()
+    results = []
+    try:
+        for name, sql, params, index, index_only in PLAN_CHECKS:
+            cursor.execute("EXPLAIN " + sql, params)
+            plan = [dict(zip(cursor.column_names, row)) for row in cursor.fetchall()]
+            step = plan[0]
+            extra = step.get("Extra") or ""
+            if isinstance(extra, bytes):
+                extra = extra.decode("utf-8")
+            if "no matching row in const table" in extra:
+                # Boş tabloda benzersiz anahtar araması planlama sırasında çözülür
+                results.append((name, True, extra))
+                continue
+            problems = []
+            if step.get("key") != index:
+                problems.append(f"indeks {step.get('key')} (beklenen {index})")
+            if "filesort" in extra or "temporary" in extra:
+                problems.append(extra)
+            if index_only and "Using index" not in extra:
+                problems.append("tablodan okunuyor")
+            results.append((name, not problems, "; ".join(problems) or f"{step.get('key')}, {extra or '-'}"))
+    finally:
+        cursor.close()
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    import app
+
+    with app.db_connection() as connection:
+        if connection is None:
+            sys.exit("❌ Database bağlantı hatası")
+        applied = migrate(connection)
+        print(f"✅ Uygulanan göçler: {applied or 'yok (şema güncel)'}")
+        if "--check" in sys.argv:
+            failed = False
+            for name, ok, detail in check_plans(connection):
+                print(f"{'✅' if ok else '❌'} {name}: {detail}")
+                failed |= not ok
+            sys.exit(1 if failed else 0)
@@ -0,0 +1,183 @@
+# Bellek eşlemeli (mmap) model paketi
+#
+# Her worker'ın trafik_model.pkl'i unpickle etmesi ormanın ayrı bir kopyasını
+# (ve sklearn/scipy/pandas importlarını) process belleğine alır. Paket dizini
+# düz orman dizilerini (flat_forest.py) ve scaler parametrelerini .npy olarak
+# tutar; np.load(mmap_mode="r") ile açıldığında sayfalar işletim sisteminin
+# sayfa önbelleğinden okunur ve aynı makinedeki tüm worker'lar arasında
+# paylaşılır.
+#
+#   trafik_model.artifact/
+#       manifest.json       sürüm, kaynak dosya bilgisi, dosya başına SHA-256
+#       feature.npy, threshold.npy, children.npy, value.npy, roots.npy, depths.npy
+#       forest.json
+#       scaler_mean.npy, scaler_scale.npy   (scaler varsa)
+#
+# Paketi elle üretmek / doğrulamak için model dizininde:
+#   python /path/to/backend/model_artifact.py export
+#   python /path/to/backend/model_artifact.py verify
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+from flat_forest import FlatForest
+from inference import ScalerParams
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+class ArtifactError(Exception):
+    """Model paketi eksik, bozuk ya da desteklenmeyen sürümde"""
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_info(paths):
+    """Kaynak dosyaların boyut ve değişiklik zamanı (bayatlık kontrolü için ucuz imza)"""
+    info = {}
+    for path in paths:
+        if path is not None and os.path.exists(path):
+            stat = os.stat(path)
+            info[os.path.basename(path)] = {"bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return info
+
+
+def export_artifact(model, scaler_params, directory, source_paths=()):
+    """Modeli paket dizinine yaz; dizin tek bir rename ile atomik olarak değiştirilir"""
+    forest = model if isinstance(model, FlatForest) else FlatForest.from_sklearn(model)
+    directory = os.path.abspath(directory)
+    parent = os.path.dirname(directory)
+    tmp_dir = tempfile.mkdtemp(prefix=".artifact-", dir=parent)
+    try:
+        forest.save(tmp_dir)
+        if scaler_params is not None:
+            for name, array in (("scaler_mean", scaler_params.mean), ("scaler_scale", scaler_params.scale)):
+                if array is not None:
+                    np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+
+        files = {}
+        checksum = hashlib.sha256()
+        for name in sorted(os.listdir(tmp_dir)):
+            digest = sha256_file(os.path.join(tmp_dir, name))
+            files[name] = {"sha256": digest, "bytes": os.path.getsize(os.path.join(tmp_dir, name))}
+            checksum.update(f"{name}:{digest}\n".encode())
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "version": checksum.hexdigest()[:12],
+            "checksum": checksum.hexdigest(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "model_type": forest.source_type,
+            "n_estimators": forest.n_estimators,
+            "node_count": forest.node_count,
+            "source": _source_info(source_paths),
+            "files": files
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        _swap_directory(tmp_dir, directory)
+    finally:
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return manifest
+
+
+def _swap_directory(tmp_dir, directory):
+    # Eski paketi açmış worker'lar etkilenmez: silinen dosyaların eşlenmiş sayfaları
+    # son referans kapanana kadar geçerli kalır
+    old_dir = None
+    if os.path.exists(directory):
+        old_dir = tempfile.mkdtemp(prefix=".artifact-old-", dir=os.path.dirname(directory))
+        os.rmdir(old_dir)
+        os.rename(directory, old_dir)
+    try:
+        os.rename(tmp_dir, directory)
+    except OSError:
+        # Aynı anda paketi üreten başka bir worker önce davrandı; onun paketi kullanılır
+        if not os.path.exists(directory):
+            raise
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, MANIFEST_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise ArtifactError(f"Manifest bulunamadı: {path}")
+    except ValueError as e:
+        raise ArtifactError(f"Manifest okunamadı: {e}")
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ArtifactError(f"Desteklenmeyen paket sürümü: {manifest.get('format_version')}")
+    return manifest
+
+
+def is_current(directory, source_paths):
+    """Paket mevcut ve kaynak dosyalardan (pkl) sonra değişmemişse True"""
+    try:
+        manifest = read_manifest(directory)
+    except ArtifactError:
+        return False
+    sources = _source_info(source_paths)
+    # Sadece paketin dağıtıldığı (pkl'in olmadığı) kurulumda paket her zaman günceldir
+    return not sources or manifest["source"] == sources
+
+
+def verify_artifact(directory, checksums=True):
+    """Dosya boyutlarını (ve istenirse SHA-256 özetlerini) manifest ile karşılaştır"""
+    manifest = read_manifest(directory)
+    for name, expected in manifest["files"].items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path) or os.path.getsize(path) != expected["bytes"]:
+            raise ArtifactError(f"Dosya eksik ya da boyutu farklı: {name}")
+        if checksums and sha256_file(path) != expected["sha256"]:
+            raise ArtifactError(f"Checksum uyuşmuyor: {name}")
+    return manifest
+
+
+def load_artifact(directory, mmap_mode="r", verify_checksums=False):
+    """(FlatForest, ScalerParams ya da None, manifest) döndür; diziler mmap ile açılır"""
+    # Tam checksum tüm dosyaları okur; varsayılan olarak sadece boyutlar kontrol edilir
+    manifest = verify_artifact(directory, checksums=verify_checksums)
+    forest = FlatForest.load(directory, mmap_mode=mmap_mode)
+
+    arrays = {}
+    for name in ("scaler_mean", "scaler_scale"):
+        path = os.path.join(directory, f"{name}.npy")
+        arrays[name] = np.load(path) if os.path.exists(path) else None
+    scaler_params = None
+    if any(array is not None for array in arrays.values()):
+        scaler_params = ScalerParams(arrays["scaler_mean"], arrays["scaler_scale"])
+    return forest, scaler_params, manifest
+
+
+if __name__ == "__main__":
+    import sys
+
+    import app
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "export"
+    if command == "verify":
+        manifest = verify_artifact(app.MODEL_ARTIFACT_DIR)
+        print(f"✅ Paket doğrulandı: sürüm {manifest['version']}, {len(manifest['files'])} dosya")
+    else:
+        bundle = app.load_pickled_bundle()
+        manifest = export_artifact(bundle.model, bundle.scaler_params, app.MODEL_ARTIFACT_DIR,
+                                   source_paths=(app.MODEL_PATH, app.SCALER_PATH))
+        print(f"✅ Paket yazıldı: {app.MODEL_ARTIFACT_DIR} (sürüm {manifest['version']})")
@@ -0,0 +1,220 @@
+# Çalışırken model değiştirme (hot reload)
+#
+# İstekler modeli, scaler'ı ve tahmin tablosunu tek bir değişmez ModelBundle
+# üzerinden okur: registry.current bir kez alınır ve istek sonuna kadar o
+# sürüm kullanılır. Yeni sürüm arka planda yüklenir, birkaç tahminle ısıtılır
+# ve doğrulanır; ardından tek bir atama ile etkin sürüm değiştirilir. Eski
+# sürümü kullanan istekler kendi referanslarıyla tamamlanır, son referans
+# bırakılınca eski model (ve mmap'lenmiş sayfaları) serbest kalır.
+#
+# Değişiklik ucuz bir imza (dosya boyutu + mtime) ile periyodik olarak
+# kontrol edilir; imzanın bir tur boyunca sabit kalması beklenir, böylece
+# yazılmakta olan bir dosya yüklenmez. Ayrıca reload_async() ile elle
+# tetiklenebilir.
+
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from logging_setup import get_logger
+
+logger = get_logger("model")
+
+_BUNDLE_FIELDS = (
+    "model", "scaler_params", "checksum", "manifest", "source", "prediction_table",
+    "loaded_at", "load_seconds", "warmup_ms", "warmup_first_ms"
+)
+
+
+class ModelBundle(namedtuple("ModelBundle", _BUNDLE_FIELDS, defaults=(None,) * 8)):
+    """Birlikte değişen model, scaler parametreleri ve tahmin tablosu (değiştirilemez)"""
+
+    __slots__ = ()
+
+    @property
+    def version(self):
+        return self.checksum[:12] if self.checksum else None
+
+
+def file_signature(*paths):
+    """Dosyaların (boyut, mtime) imzası; olmayan dosyalar None olarak yer alır"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            signature.append((path, None))
+    return tuple(signature)
+
+
+class ModelRegistry:
+    """loader() yeni bir ModelBundle döndürür; warmup(bundle) hata fırlatırsa sürüm reddedilir
+
+    on_activate(bundle) yeni sürüm etkinleştikten sonra çağrılır (ör. önbellekleri boşaltmak için).
+    """
+
+    def __init__(self, loader, signature=None, warmup=None, warmup_rounds=5, watch_interval=5.0,
+                 on_activate=None):
+        self.loader = loader
+        self.signature = signature
+        self.warmup = warmup
+        self.warmup_rounds = warmup_rounds
+        self.watch_interval = watch_interval
+        self.on_activate = on_activate
+
+        self._current = None
+        self._reload_lock = threading.Lock()
+        self._watch_thread = None
+        self._stop = threading.Event()
+        self._loaded_signature = None
+        self._pending_signature = None
+        self._stats = {
+            "reloads": 0,
+            "skipped_reloads": 0,
+            "failed_reloads": 0,
+            "last_error": None,
+            "last_reload_at": None
+        }
+
+    @property
+    def current(self):
+        """Etkin sürüm (yüklenmemişse None); istek boyunca tek bir kez okunmalı"""
+        return self._current
+
+    @property
+    def reloading(self):
+        return self._reload_lock.locked()
+
+    def reload(self, force=False):
+        """Yeni sürümü yükle, ısıt ve etkinleştir; etkin sürüm değiştiyse True döndür
+
+        Aynı sürüm tekrar yüklendiyse (force değilse) etkin sürüm korunur. Yükleme ya
+        da ısıtma başarısız olursa exception fırlatılır ve eski sürüm kullanılmaya devam eder.
+        """
+        with self._reload_lock:
+            return self._reload(force)
+
+    def reload_async(self, force=False):
+        """Arka planda yeniden yükle; başka bir yükleme sürüyorsa False döndür"""
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self._reload(force)
+            except Exception:
+                pass  # Hata _reload içinde loglanıp istatistiklere yazıldı
+            finally:
+                self._reload_lock.release()
+
+        threading.Thread(target=run, name="model-reload", daemon=True).start()
+        return True
+
+    def _reload(self, force):
+        signature = self.signature() if self.signature is not None else None
+        started = time.perf_counter()
+        try:
+            bundle = self.loader()
+            load_seconds = time.perf_counter() - started
+            bundle = self._warm(bundle)._replace(
+                loaded_at=datetime.now().isoformat(timespec="seconds"),
+                load_seconds=round(load_seconds, 3)
+            )
+        except Exception as e:
+            self._stats["failed_reloads"] += 1
+            self._stats["last_error"] = str(e)
+            logger.exception("Model yüklenemedi, etkin sürüm korunuyor", extra={"fields": {
+                "active_version": self._current.version if self._current is not None else None
+            }})
+            raise
+        finally:
+            # Başarısız sürüm de aynı imzayla tekrar tekrar denenmez
+            self._loaded_signature = signature
+
+        previous = self._current
+        if not force and previous is not None and previous.checksum == bundle.checksum:
+            self._stats["skipped_reloads"] += 1
+            return False
+
+        self._current = bundle  # Tek atama: sonraki istekler yeni sürümü görür
+        self._stats["reloads"] += 1
+        self._stats["last_error"] = None
+        self._stats["last_reload_at"] = bundle.loaded_at
+        if self.on_activate is not None:
+            try:
+                self.on_activate(bundle)
+            except Exception:
+                logger.exception("on_activate başarısız oldu")
+        logger.info("Model sürümü etkinleştirildi", extra={"fields": {
+            "version": bundle.version,
+            "previous_version": previous.version if previous is not None else None,
+            "source": bundle.source,
+            "load_seconds": bundle.load_seconds,
+            "warmup_ms": bundle.warmup_ms
+        }})
+        return True
+
+    def _warm(self, bundle):
+        """Sürümü birkaç tahminle ısıt; ilk (soğuk) ve ortanca çağrı süresini kaydet"""
+        if self.warmup is None or self.warmup_rounds <= 0:
+            return bundle
+        timings = []
+        for _ in range(self.warmup_rounds):
+            started = time.perf_counter()
+            self.warmup(bundle)
+            timings.append((time.perf_counter() - started) * 1000)
+        return bundle._replace(
+            warmup_first_ms=round(timings[0], 3),
+            warmup_ms=round(sorted(timings)[len(timings) // 2], 3)
+        )
+
+    def start_watching(self):
+        """İmza değişikliklerini arka planda izlemeye başla"""
+        if self.signature is None or self.watch_interval <= 0:
+            return
+        if self._watch_thread is None or not self._watch_thread.is_alive():
+            self._stop.clear()
+            self._watch_thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._watch_thread.start()
+
+    def stop_watching(self, timeout=5):
+        self._stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join(timeout)
+
+    def check(self):
+        """İmza değişip bir tur boyunca sabit kaldıysa yeniden yüklemeyi başlat"""
+        signature = self.signature()
+        if signature == self._loaded_signature:
+            self._pending_signature = None
+            return False
+        if signature != self._pending_signature:
+            # Dosya hâlâ yazılıyor olabilir; bir sonraki turda tekrar bakılır
+            self._pending_signature = signature
+            return False
+        self._pending_signature = None
+        return self.reload_async()
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Model dosyaları kontrol edilemedi")
+
+    def stats(self):
+        bundle = self._current
+        return {
+            "version": bundle.version if bundle is not None else None,
+            "source": bundle.source if bundle is not None else None,
+            "loaded_at": bundle.loaded_at if bundle is not None else None,
+            "load_seconds": bundle.load_seconds if bundle is not None else None,
+            "warmup_ms": bundle.warmup_ms if bundle is not None else None,
+            "warmup_first_ms": bundle.warmup_first_ms if bundle is not None else None,
+            "reloading": self.reloading,
+            "watching": self._watch_thread is not None and self._watch_thread.is_alive(),
+            **self._stats
+        }
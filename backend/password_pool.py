@@ -0,0 +1,209 @@
+# Şifre hash'leme için sınırlı süreç havuzu
+#
+# bcrypt bilerek yavaştır: varsayılan maliyette tek hashpw/checkpw çağrısı
+# ~250 ms CPU harcar. İstek thread'inde çalışınca sabah giriş yoğunluğunda tüm
+# Flask worker'ları bu işe bağlanıyor ve /predict bekliyordu. İş ayrı süreçlere
+# (düşük öncelikli, nice) taşınır; aynı anda en fazla workers + max_pending iş
+# kabul edilir, fazlası PasswordPoolBusy ile hemen reddedilir (istek 503 +
+# Retry-After döner).
+#
+# Giriş başarılıysa ve kayıtlı hash'in maliyeti rounds'tan düşükse, aynı
+# worker çağrısında yeni maliyetle tekrar hash'lenir; çağıran yeni hash'i
+# veritabanına yazar.
+#
+# Worker'lar fork ile açılır: forkserver/spawn ana modülü (app.py ya da
+# asgi_app.py) her worker'da yeniden import eder. Fork'ta alt süreç, o anda
+# başka bir thread'in tuttuğu kilitleri kilitli devralır. Bu yüzden start()
+# thread başlatan kodlardan önce çağrılmalıdır; app.py onu modül yüklenirken,
+# setup_logging'in dinleyici thread'inden önce çağırır. Çöken havuzun yerine
+# kurulan yenisi ve önceden başlatılmamış havuz ilk işte, o anki thread'lerle
+# fork edilir. Worker'lar yalnızca bcrypt çalıştırır, log yazmaz.
+#
+# Karışık giriş / tahmin yükünü ölçmek için model dizininde:
+#   python /path/to/backend/benchmark.py passwords --logins 4
+
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+from logging_setup import get_logger
+
+logger = get_logger("passwords")
+
+
+class PasswordPoolBusy(Exception):
+    """Havuz dolu; retry_after saniye sonra tekrar denenmeli"""
+
+    def __init__(self, retry_after):
+        super().__init__("Şifre işlem havuzu dolu")
+        self.retry_after = retry_after
+
+
+def hash_cost(hashed):
+    """$2b$12$... biçimindeki hash'in maliyet faktörü, okunamazsa None"""
+    try:
+        return int(hashed.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def _lower_priority(nice):
+    if nice:
+        os.nice(nice)
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _check(password, hashed, rounds):
+    """(doğru mu, maliyet eskiyse yeni hash)"""
+    if not bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8")):
+        return False, None
+    cost = hash_cost(hashed)
+    if cost is not None and cost < rounds:
+        return True, _hash(password, rounds)
+    return True, None
+
+
+class PasswordPool:
+    """workers 0 ise işler çağıran thread'de çalışır (eski davranış, kabul kontrolü yine geçerli)"""
+
+    def __init__(self, workers=2, max_pending=16, rounds=12, timeout=10, nice=5):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.timeout = timeout
+        self.nice = nice
+
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max_pending)
+        self._stats_lock = threading.Lock()  # _in_flight ve _stats
+        self._in_flight = 0
+        self._stats = {
+            "hashes": 0,
+            "checks": 0,
+            "rehashes": 0,
+            "rejected": 0,
+            "failures": 0,
+            "seconds_total": 0.0,
+            "seconds_max": 0.0
+        }
+
+    def start(self):
+        """Worker süreçlerini şimdi fork et; süreçte thread başlatan kodlardan önce çağrılmalı"""
+        if self.workers > 0:
+            self._pool().submit(_lower_priority, 0).result()
+
+    def _pool(self):
+        with self._executor_lock:
+            # Havuz fork'tan önce kurulduysa (ör. gunicorn --preload) worker'lar ana sürecindir
+            if self._executor is None or self._executor_pid != os.getpid():
+                # fork: app modülü worker'larda tekrar import edilmez
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("fork") if "fork" in methods else None
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=context,
+                                                     initializer=_lower_priority, initargs=(self.nice,))
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def retry_after(self):
+        """Kuyruktaki işlerin bitmesi için tahmini süre (saniye, en az 1)"""
+        with self._stats_lock:
+            done = self._stats["hashes"] + self._stats["checks"]
+            average = self._stats["seconds_total"] / done if done else 0.25
+            in_flight = self._in_flight
+        return max(1, math.ceil(in_flight / max(self.workers, 1) * average))
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise PasswordPoolBusy(self.retry_after())
+        with self._stats_lock:
+            self._in_flight += 1
+        started = time.perf_counter()
+
+        def finished(_=None):
+            # Kabul slotu iş gerçekten bitince (ya da kuyruktan iptal edilince) bırakılır;
+            # zaman aşımında worker hâlâ çalışıyor olabilir, o iş de kapasiteden sayılır
+            seconds = time.perf_counter() - started
+            with self._stats_lock:
+                self._in_flight -= 1
+                self._stats["seconds_total"] += seconds
+                self._stats["seconds_max"] = max(self._stats["seconds_max"], seconds)
+            self._slots.release()
+
+        if self.workers <= 0:
+            try:
+                return function(*args)
+            finally:
+                finished()
+
+        future = None
+        try:
+            future = self._pool().submit(function, *args)
+            future.add_done_callback(finished)
+            return future.result(self.timeout)
+        except FutureTimeout:
+            # İş kuyrukta fazla bekledi: havuz pratikte dolu. Başlamadıysa kuyruktan çıkar
+            future.cancel()
+            self._count("rejected")
+            raise PasswordPoolBusy(self.retry_after())
+        except BrokenProcessPool:
+            # Ölen worker havuzu kullanılamaz hale getirir; sonraki istek yenisini kurar
+            self._count("failures")
+            with self._executor_lock:
+                self._executor = None
+            logger.exception("Şifre işlem havuzu çöktü, yeniden kurulacak")
+            raise
+        finally:
+            if future is None:
+                finished()
+
+    def hash(self, password):
+        """Yeni bcrypt hash'i (str)"""
+        hashed = self._run(_hash, password, self.rounds)
+        self._count("hashes")
+        return hashed
+
+    def check(self, password, hashed):
+        """(şifre doğru mu, maliyet eskiyse yazılması gereken yeni hash ya da None)"""
+        valid, new_hash = self._run(_check, password, hashed, self.rounds)
+        self._count("checks")
+        if new_hash is not None:
+            self._count("rehashes")
+        return valid, new_hash
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+            in_flight = self._in_flight
+        done = stats["hashes"] + stats["checks"]
+        return dict(
+            stats,
+            seconds_total=round(stats["seconds_total"], 3),
+            seconds_max=round(stats["seconds_max"], 3),
+            seconds_avg=round(stats["seconds_total"] / done, 4) if done else None,
+            in_flight=in_flight,
+            workers=self.workers,
+            max_pending=self.max_pending,
+            rounds=self.rounds
+        )
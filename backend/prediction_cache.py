@@ -0,0 +1,74 @@
+# Tahmin sonucu önbelleği
+#
+# Aynı ilçe, aynı saat ve gün için gelen istekler aynı 9 özellikli satıra
+# düşer: hız/araç üçlüsü saat ve günün, is_weekend de günün fonksiyonudur.
+# Anahtar (model sürümü, modelin girdisi) ikilisidir. Girdi, ölçeklenmiş ve
+# float32'ye çevrilmiş satırın baytlarıdır (app.model_input): ağaçlar da
+# satırı bu haliyle karşılaştırır, eşit anahtar eşit model girdisi demektir.
+# Değer (seviye, traffic_info) çiftidir ve salt okunur kabul edilir.
+#
+# Sürüm anahtarın parçası olduğu için yeni model etkinleşince eski kayıtlar
+# zaten eşleşmez; clear() ile bellekten de hemen atılırlar.
+
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Boyut sınırlı LRU önbelleği; max_size 0 ise önbellek kapalıdır"""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0
+        }
+
+    def key(self, version, features):
+        # features hashlenebilir olmalı (bayt dizisi ya da demet)
+        return version, features
+
+    def get(self, version, features):
+        """Kayıtlı (seviye, traffic_info) çiftini döndür, yoksa None"""
+        if self.max_size <= 0:
+            return None
+        key = self.key(version, features)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry
+
+    def put(self, version, features, entry):
+        if self.max_size <= 0:
+            return
+        key = self.key(version, features)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+
+    def stats(self):
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return dict(
+            self._stats,
+            lookups=lookups,
+            hit_rate=round(self._stats["hits"] / lookups, 4) if lookups else None,
+            entries=len(self._entries),
+            max_size=self.max_size
+        )
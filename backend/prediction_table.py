@@ -0,0 +1,131 @@
+# Önceden hesaplanmış tahmin tablosu
+#
+# Modelin girdisi bilinen lokasyonlar için tamamen (lokasyon, ay, gün, saat)
+# dörtlüsüyle belirlenir: is_weekend günden, hız/araç üçlüsü de saat ve günden
+# türetilir. Bu yüzden tüm kombinasyonlar bir kez skorlanıp model dosyasının
+# yanına kaydedilir ve /predict bilinen lokasyonlar için O(1) cevap verir.
+#
+# Tabloyu elle derlemek için model dizininde:
+#   python /path/to/backend/prediction_table.py
+
+import hashlib
+import os
+
+import numpy as np
+
+MONTHS = 12
+DAYS = 7
+HOURS = 24
+
+
+def file_hash(*paths):
+    """Model (ve varsa scaler) dosyalarının ortak SHA-256 özeti"""
+    digest = hashlib.sha256()
+    for path in paths:
+        if path is None or not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class PredictionTable:
+    """(lokasyon, ay, gün, saat) -> (seviye, sınıf olasılıkları) tablosu"""
+
+    def __init__(self, coords, levels, probabilities, classes, model_hash):
+        self.coords = np.asarray(coords, dtype=np.float64)
+        self.levels = levels
+        self.probabilities = probabilities
+        self.classes = classes
+        self.model_hash = model_hash
+        self._index = {(float(lat), float(lng)): i for i, (lat, lng) in enumerate(self.coords)}
+
+    def __len__(self):
+        return self.levels.size
+
+    @classmethod
+    def compile(cls, predict_proba, classes, coords, feature_row, model_hash):
+        """Tüm saat x gün x ay x lokasyon kombinasyonlarını tek çağrıda skorla"""
+        coords = sorted(set((float(lat), float(lng)) for lat, lng in coords))
+        rows = [
+            feature_row(hour, day_of_week, month + 1, lat, lng)
+            for lat, lng in coords
+            for month in range(MONTHS)
+            for day_of_week in range(DAYS)
+            for hour in range(HOURS)
+        ]
+        probabilities = predict_proba(np.asarray(rows, dtype=np.float64))
+        classes = np.asarray(classes)
+        levels = classes.take(np.argmax(probabilities, axis=1)).astype(np.uint8)
+
+        shape = (len(coords), MONTHS, DAYS, HOURS)
+        return cls(
+            coords,
+            levels.reshape(shape),
+            probabilities.astype(np.float32).reshape(shape + (len(classes),)),
+            classes,
+            model_hash
+        )
+
+    def save(self, path):
+        # np.savez dosya adına .npz ekler, bu yüzden açık dosya nesnesi kullanılır
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                coords=self.coords,
+                levels=self.levels,
+                probabilities=self.probabilities,
+                classes=self.classes,
+                model_hash=np.array(self.model_hash)
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data["coords"],
+                data["levels"],
+                data["probabilities"],
+                data["classes"],
+                str(data["model_hash"])
+            )
+
+    @classmethod
+    def load_or_compile(cls, path, model_hash, **compile_kwargs):
+        """Kayıtlı tablo güncel modele aitse yükle, değilse yeniden derleyip kaydet"""
+        if os.path.exists(path):
+            try:
+                table = cls.load(path)
+                if table.model_hash == model_hash:
+                    return table, False
+            except Exception:
+                pass  # Bozuk tablo yeniden derlenir
+
+        table = cls.compile(model_hash=model_hash, **compile_kwargs)
+        table.save(path)
+        return table, True
+
+    def lookup(self, hour, day_of_week, month, lat, lng):
+        """Tablodaki (seviye, olasılıklar) çiftini döndür, koordinat yoksa None"""
+        location = self._index.get((float(lat), float(lng)))
+        if location is None:
+            return None
+        key = (location, month - 1, day_of_week, hour)
+        return int(self.levels[key]), self.probabilities[key]
+
+    def lookup_many(self, hours, days, months, lat, lng):
+        """Bir lokasyonun birden fazla zaman dilimi için (seviyeler, olasılıklar) dizileri, yoksa None"""
+        location = self._index.get((float(lat), float(lng)))
+        if location is None:
+            return None
+        key = (location, np.asarray(months) - 1, days, hours)
+        return self.levels[key], self.probabilities[key]
+
+
+if __name__ == "__main__":
+    import app
+
+    app.compile_prediction_table(app.load_model_bundle(compile_table=False), force=True)
@@ -0,0 +1,133 @@
+# Başlangıç -> varış rotası boyunca örnekleme
+#
+# Rota ya Google'ın kodlanmış polyline biçiminden çözülür ya da iki uç arasında
+# doğrusal olarak N noktaya bölünür. Uzun parçalar max_segment_km'yi aşmayacak
+# şekilde sıklaştırılır. Her parçanın orta noktası bir geohash hücresine düşer;
+# model parça başına değil hücre başına (hücre merkezi koordinatıyla) bir kez
+# skorlanır. Rota uzadıkça nokta sayısı artar ama aynı hücreye düşen noktalar
+# tek satır olarak kalır.
+
+import math
+
+import geohash  # pip install python-geohash
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def decode_polyline(text, precision=5):
+    """Google kodlanmış polyline'ını (lat, lng) listesine çevir"""
+    points, index, lat, lng = [], 0, 0, 0
+    factor = 10 ** precision
+    while index < len(text):
+        deltas = []
+        for _ in range(2):
+            shift, result = 0, 0
+            while True:
+                if index >= len(text):
+                    raise ValueError("Polyline eksik bitiyor")
+                byte = ord(text[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append((lat / factor, lng / factor))
+    return points
+
+
+def encode_polyline(points, precision=5):
+    """decode_polyline'ın tersi (test ve örnek istekler için)"""
+    factor = 10 ** precision
+    chunks, previous = [], (0, 0)
+    for lat, lng in points:
+        current = (int(round(lat * factor)), int(round(lng * factor)))
+        for value in (current[0] - previous[0], current[1] - previous[1]):
+            value = ~(value << 1) if value < 0 else value << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        previous = current
+    return "".join(chunks)
+
+
+def haversine_km(lats1, lngs1, lats2, lngs2):
+    """gazetteer.haversine_km'nin dizi hali"""
+    lats1, lngs1, lats2, lngs2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lats1, lngs1, lats2, lngs2))
+    a = (np.sin((lats2 - lats1) / 2) ** 2
+         + np.cos(lats1) * np.cos(lats2) * np.sin((lngs2 - lngs1) / 2) ** 2)
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(a))
+
+
+def interpolate(origin, destination, points):
+    """İki uç arasında eşit aralıklı `points` nokta, (points, 2) dizisi"""
+    t = np.linspace(0.0, 1.0, max(points, 2))[:, np.newaxis]
+    origin = np.asarray(origin, dtype=np.float64)
+    return origin + t * (np.asarray(destination, dtype=np.float64) - origin)
+
+
+def segment_pieces(points, max_segment_km):
+    """Her parçanın kaç alt parçaya bölüneceği"""
+    lengths = haversine_km(points[:-1, 0], points[:-1, 1], points[1:, 0], points[1:, 1])
+    return np.maximum(np.ceil(lengths / max_segment_km), 1).astype(np.int64)
+
+
+def densified_count(points, max_segment_km):
+    """densify'ın döndüreceği nokta sayısı; sınır kontrolü dizileri kurmadan yapılsın diye"""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 2:
+        return len(points)
+    return int(segment_pieces(points, max_segment_km).sum()) + 1
+
+
+def densify(points, max_segment_km):
+    """Parçaları max_segment_km'den kısa olacak şekilde ara noktalarla böl"""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 2:
+        return points
+    pieces = segment_pieces(points, max_segment_km)
+    starts = np.repeat(points[:-1], pieces, axis=0)
+    ends = np.repeat(points[1:], pieces, axis=0)
+    # Her parçanın içindeki 0, 1/k, ..., (k-1)/k oranları
+    offsets = np.arange(pieces.sum()) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    t = (offsets / np.repeat(pieces, pieces))[:, np.newaxis]
+    return np.vstack([starts + t * (ends - starts), points[-1:]])
+
+
+def route_cells(points, precision):
+    """Rotayı hücrelere böl: (hücreler, hücre merkezleri, parça -> hücre indeksi, parça uzunlukları)"""
+    points = np.asarray(points, dtype=np.float64)
+    lengths = haversine_km(points[:-1, 0], points[:-1, 1], points[1:, 0], points[1:, 1])
+    middles = (points[:-1] + points[1:]) / 2
+
+    cells, index = [], {}
+    segment_cells = np.empty(len(middles), dtype=np.int64)
+    for i, (lat, lng) in enumerate(middles.tolist()):
+        cell = geohash.encode(lat, lng, precision)
+        position = index.get(cell)
+        if position is None:
+            position = index[cell] = len(cells)
+            cells.append(cell)
+        segment_cells[i] = position
+    centers = np.array([geohash.decode(cell) for cell in cells], dtype=np.float64).reshape(-1, 2)
+    return cells, centers, segment_cells, lengths
+
+
+def cell_runs(segment_cells):
+    """Aynı hücrede kalan ardışık parçaların (başlangıç, bitiş) aralıkları"""
+    if not len(segment_cells):
+        return []
+    breaks = np.flatnonzero(np.diff(segment_cells)) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(segment_cells)]))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def default_point_count(origin, destination, max_segment_km):
+    """Doğrusal rota için parçaları max_segment_km'yi aşmayan nokta sayısı"""
+    distance = float(haversine_km(origin[0], origin[1], destination[0], destination[1]))
+    return max(2, math.ceil(distance / max_segment_km) + 1)
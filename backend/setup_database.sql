@@ -1,5 +1,7 @@
 -- CrowdPredictor Database Setup
 -- Bu script'i MySQL'de çalıştırarak database'i oluşturun
+-- Şema backend/migrations.py'deki göçlerin son halidir; uygulama açılırken
+-- bekleyen göçleri uygular ve schema_migrations tablosuna kaydeder
 
 -- Database oluştur
 CREATE DATABASE IF NOT EXISTS traffic_predictor CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
@@ -25,6 +27,7 @@ CREATE TABLE IF NOT EXISTS search_history (
     prediction_result JSON,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    -- Geçmiş sayfaları (user_id, created_at, id) sırasıyla; id InnoDB'de indekse dahil
     INDEX idx_user_datetime (user_id, created_at)
 );
 
@@ -33,12 +36,31 @@ CREATE TABLE IF NOT EXISTS favorites (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL,
     origin VARCHAR(255) NOT NULL,
-    destination VARCHAR(255),
+    -- Varışsız favoriler '' ile saklanır: UNIQUE anahtar NULL'ları eşit saymaz
+    destination VARCHAR(255) NOT NULL DEFAULT '',
     route_name VARCHAR(100),
     prediction_result JSON,
+    search_datetime DATETIME,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    -- Aynı rota bir kullanıcıda bir kez (add_favorite: INSERT ... ON DUPLICATE KEY)
+    UNIQUE KEY uq_user_route (user_id, origin, destination),
+    -- Favori listesi ve /favorites/forecast: sıralama ve okuma indeksten
+    INDEX idx_user_created_route (user_id, created_at, origin, destination, route_name),
+    -- Favori tahminleri: SELECT DISTINCT origin
+    INDEX idx_origin (origin)
+);
+
+-- Yenileme token'ları (jti): tek kullanım ve logout
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    jti CHAR(32) PRIMARY KEY,
+    user_id INT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    used TINYINT(1) NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    INDEX idx_user_id (user_id)
+    -- Girişte kullanıcının süresi dolmuş satırları silinir
+    INDEX idx_user_expires (user_id, expires_at)
 );
 
 -- Test kullanıcısı ekle (şifre: 123456)
@@ -0,0 +1,132 @@
+# Şema göçleri ve okuma yollarının EXPLAIN planları (gerçek MySQL ile)
+#
+# Her çalıştırmada geçici bir şema kurulur, göçler uygulanır, tablolar
+# doldurulur ve sonunda şema silinir. Bağlantı ayarları ortam
+# değişkenlerinden okunur (varsayılanlar app.MYSQL_CONFIG ile aynı); MySQL'e
+# bağlanılamazsa testler atlanır (TEST_MYSQL_REQUIRED=1 ise başarısız olur):
+#   TEST_MYSQL_HOST=localhost TEST_MYSQL_USER=root TEST_MYSQL_PASSWORD=12345 python -m pytest backend
+
+import os
+import random
+import secrets
+from datetime import datetime, timedelta
+
+import mysql.connector
+import pytest
+
+import migrations
+
+USERS = 50
+HISTORY_ROWS = 20000
+FAVORITES_PER_USER = 10
+ORIGINS = ["Kadıköy", "Üsküdar", "Beşiktaş", "Şişli", "Levent", "Maslak", "Taksim", "Fatih", "Pendik", "Kartal",
+           "Ataşehir", "Bakırköy"]
+
+# Tablodan okumadan (Using index) cevaplanması gereken okuma yolları
+COVERING = {
+    "geçmiş: ilk sayfa anahtarları",
+    "geçmiş: imleçli sayfa anahtarları",
+    "geçmiş: delta (since)",
+    "favoriler: /favorites/forecast",
+    "favoriler: farklı başlangıçlar",
+}
+
+
+def mysql_config():
+    return {
+        "host": os.environ.get("TEST_MYSQL_HOST", "localhost"),
+        "port": int(os.environ.get("TEST_MYSQL_PORT", 3306)),
+        "user": os.environ.get("TEST_MYSQL_USER", "root"),
+        "password": os.environ.get("TEST_MYSQL_PASSWORD", "12345"),
+    }
+
+
+def seed(connection):
+    """Planlayıcının küçük tablo kısayollarına düşmemesi için yeterli satır; 1 numaralı kullanıcı yoğun"""
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    cursor = connection.cursor()
+    cursor.executemany("INSERT INTO users (name, email, password_hash) VALUES (%s, %s, %s)",
+                       [(f"Kullanıcı {i}", f"user{i}@example.com", "x") for i in range(1, USERS + 1)])
+    cursor.executemany("""
+        INSERT INTO search_history (user_id, origin, destination, datetime, prediction_result, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, [
+        (1 if i % 4 == 0 else rng.randrange(2, USERS + 1), f"{rng.choice(ORIGINS)}, İstanbul",
+         f"{rng.choice(ORIGINS)}, İstanbul", start + timedelta(minutes=i), '{"traffic_level": 1}',
+         start + timedelta(seconds=i * 1500 // 1000))  # Aynı saniyede birden fazla satır (toplu yazma)
+        for i in range(HISTORY_ROWS)
+    ])
+    searched = ("Kadıköy, İstanbul", "Levent, İstanbul")  # PLAN_CHECKS'teki rota araması her kullanıcıda var
+    others = [(f"{a}, İstanbul", f"{b}, İstanbul") for a in ORIGINS for b in ORIGINS if a != b]
+    others.remove(searched)
+    cursor.executemany("""
+        INSERT INTO favorites (user_id, origin, destination, route_name, prediction_result, search_datetime)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, [
+        (user_id, origin, destination, None, '{"traffic_level": 1}', start)
+        for user_id in range(1, USERS + 1)
+        for origin, destination in [searched] + rng.sample(others, FAVORITES_PER_USER - 1)
+    ])
+    connection.commit()
+    cursor.execute("ANALYZE TABLE users, search_history, favorites")
+    cursor.fetchall()
+    cursor.close()
+
+
+@pytest.fixture(scope="module")
+def connection():
+    try:
+        admin = mysql.connector.connect(**mysql_config())
+    except mysql.connector.Error as e:
+        if os.environ.get("TEST_MYSQL_REQUIRED"):
+            raise
+        pytest.skip(f"MySQL'e bağlanılamadı: {e}")
+    schema = f"crowdpredictor_test_{secrets.token_hex(4)}"
+    cursor = admin.cursor()
+    cursor.execute(f"CREATE DATABASE {schema} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+    try:
+        connection = mysql.connector.connect(database=schema, **mysql_config())
+        applied = migrations.migrate(connection)
+        assert applied == [version for version, _, _ in migrations.MIGRATIONS]
+        seed(connection)
+        yield connection
+        connection.close()
+    finally:
+        cursor.execute(f"DROP DATABASE {schema}")
+        cursor.close()
+        admin.close()
+
+
+def test_migrations_recorded(connection):
+    cursor = connection.cursor()
+    cursor.execute("SELECT version, name FROM schema_migrations ORDER BY version")
+    assert cursor.fetchall() == [(version, name) for version, name, _ in migrations.MIGRATIONS]
+    cursor.close()
+
+
+def test_applied_migrations_skipped(connection, monkeypatch):
+    def applied_again(cursor):
+        raise AssertionError("Uygulanmış göç tekrar çalıştı")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS",
+                        tuple((version, name, applied_again) for version, name, _ in migrations.MIGRATIONS))
+    assert migrations.migrate(connection) == []
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM schema_migrations")
+    assert cursor.fetchone()[0] == len(migrations.MIGRATIONS)
+    cursor.close()
+
+
+def test_covering_checks_require_index_only():
+    assert COVERING == {name for name, _, _, _, index_only in migrations.PLAN_CHECKS if index_only}
+
+
+@pytest.mark.parametrize("name", [check[0] for check in migrations.PLAN_CHECKS])
+def test_query_plan(connection, name):
+    results = {check: (ok, detail) for check, ok, detail in migrations.check_plans(connection)}
+    ok, detail = results[name]
+    assert ok, detail
+    if name in COVERING:
+        assert "Using index" in detail
@@ -0,0 +1,140 @@
+# Doğrulanmış erişim token'ları önbelleği ve iptal (logout) listesi
+#
+# token_required her istekte jwt.decode çalıştırıyordu: HMAC doğrulaması,
+# base64 + JSON çözme ve claim kontrolleri. Bir sayfa açılışı aynı token ile
+# birkaç istek yapar. İlk doğrulamadan sonra token'ın SHA-256 özeti ->
+# (user_id, exp) ikilisi boyut sınırlı bir LRU'da tutulur; kayıt exp anında
+# geçersizleşir ve sonraki istekte tam doğrulamaya düşülür. Token'ın kendisi
+# bellekte tutulmaz.
+#
+# Logout ile iptal edilen erişim token'larının özetleri kendi exp zamanlarına
+# kadar iptal listesinde kalır; süresi dolan token zaten reddedildiği için daha
+# uzun tutmaya gerek yoktur. Liste süreç belleğindedir ve yalnızca en fazla
+# ACCESS_TOKEN_TTL (15 dk) yaşayan erişim token'larını tutar; yenileme
+# token'larının tek kullanımı ve iptali veritabanındadır (refresh_tokens).
+# Süresi dolan iptaller exp sırasındaki bir yığından atılır (her iptalde tüm
+# listeyi taramadan); liste max_revoked ile sınırlıdır, aşılırsa en erken
+# bitecek iptal düşer ve revocation_evictions sayılır.
+#
+# Ölçüm için model dizininde:
+#   python /path/to/backend/benchmark.py auth --requests 5000
+
+import hashlib
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+
+
+class TokenRevoked(jwt.InvalidTokenError):
+    """Token logout ile iptal edilmiş"""
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class TokenCache:
+    """decode(token) doğrulanmış claim'leri döndürür ya da jwt hatası fırlatır; max_size 0 ise önbellek kapalıdır"""
+
+    def __init__(self, decode, max_size=10000, max_revoked=100000, clock=time.time):
+        self.decode = decode
+        self.max_size = max_size
+        self.max_revoked = max_revoked
+        self.clock = clock
+
+        self._entries = OrderedDict()  # özet -> (user_id, exp)
+        self._revoked = {}  # özet -> exp
+        self._revoked_heap = []  # (exp, özet): en erken biten iptal başta
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "revocations": 0,
+            "revocation_evictions": 0,
+            "rejected_revoked": 0
+        }
+
+    def verify(self, token):
+        """Erişim token'ının user_id'si; geçersizse jwt.InvalidTokenError alt sınıfı fırlatır"""
+        digest = token_digest(token)
+        now = self.clock()
+        with self._lock:
+            revoked_until = self._revoked.get(digest)
+            if revoked_until is not None and revoked_until > now:
+                self._stats["rejected_revoked"] += 1
+                raise TokenRevoked("Token iptal edilmiş")
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(digest)
+                    self._stats["hits"] += 1
+                    return entry[0]
+                # Süresi doldu: tam doğrulama ExpiredSignatureError fırlatacak
+                del self._entries[digest]
+                self._stats["expired"] += 1
+            self._stats["misses"] += 1
+
+        claims = self.decode(token)
+        user_id = claims["user_id"]
+        exp = claims.get("exp")
+        # exp'siz token'lar önbelleğe alınmaz (iptal listesinde ne kadar tutulacağı belli değil)
+        if exp is not None and self.max_size > 0:
+            with self._lock:
+                self._entries[digest] = (user_id, exp)
+                self._entries.move_to_end(digest)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return user_id
+
+    def revoke(self, token, exp):
+        """Token'ı exp zamanına kadar reddet"""
+        digest = token_digest(token)
+        with self._lock:
+            self._revoke(digest, exp, self.clock())
+
+    def _revoke(self, digest, exp, now):
+        self._entries.pop(digest, None)
+        # Süresi dolan iptaller yığının başından atılır
+        while self._revoked_heap and self._revoked_heap[0][0] <= now:
+            self._drop(*heapq.heappop(self._revoked_heap))
+        if exp <= now or self._revoked.get(digest, 0) >= exp:
+            return
+        self._revoked[digest] = exp
+        heapq.heappush(self._revoked_heap, (exp, digest))
+        self._stats["revocations"] += 1
+        while len(self._revoked) > self.max_revoked:
+            if self._drop(*heapq.heappop(self._revoked_heap)):
+                self._stats["revocation_evictions"] += 1
+
+    def _drop(self, exp, digest):
+        """Yığından çıkan kayıt hâlâ geçerliyse iptali kaldır (daha geç exp ile yeniden iptal edilenler kalır)"""
+        if self._revoked.get(digest) == exp:
+            del self._revoked[digest]
+            return True
+        return False
+
+    def is_revoked(self, token):
+        until = self._revoked.get(token_digest(token))
+        return until is not None and until > self.clock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return dict(
+            self._stats,
+            lookups=lookups,
+            hit_rate=round(self._stats["hits"] / lookups, 4) if lookups else None,
+            entries=len(self._entries),
+            revoked=len(self._revoked),
+            max_size=self.max_size,
+            max_revoked=self.max_revoked
+        )
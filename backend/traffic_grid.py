@@ -0,0 +1,239 @@
+# Şehir geneli geohash trafik ızgarası
+#
+# Eğitim verisinin kapsadığı alan, verilen hassasiyetteki geohash hücreleriyle
+# kaplanır. Geohash hücreleri düzenli bir enlem/boylam ızgarasıdır: hassasiyet p
+# için 5p bitin yarısı boylama, kalanı enleme gider. Bu yüzden hücreler
+# (satır, sütun) indeksli bir diziyle tutulur; satır güneyden kuzeye, sütun
+# batıdan doğuya ilerler. Her saat için tüm hücreler tek bir batch ile skorlanır
+# ve sonuç uint8 seviye + float16 olasılık dizileri olarak saklanır.
+#
+# Harita katmanı için slippy-map (z/x/y, Web Mercator) karoları palet PNG'si
+# olarak üretilir; PNG kodlayıcı zlib ile burada yazılmıştır (Pillow gerekmez).
+#
+# Izgara üretim süresi ve boyutunu ölçmek için model dizininde:
+#   python /path/to/backend/benchmark.py grid --precisions 5 6 7
+
+import math
+import struct
+import threading
+import time
+import zlib
+from collections import namedtuple
+from datetime import datetime
+
+import geohash  # pip install python-geohash
+import numpy as np
+
+from logging_setup import get_logger
+
+logger = get_logger("grid")
+
+TILE_SIZE = 256
+
+# Palet: 0 şeffaf (alan dışı), ardından seviye 0/1/2 için yeşil, sarı, kırmızı
+TILE_PALETTE = [(0, 0, 0), (46, 204, 113), (241, 196, 15), (231, 76, 60)]
+TILE_ALPHA = [0, 140, 150, 160]
+
+TrafficGrid = namedtuple("TrafficGrid", [
+    "hour", "levels", "probabilities", "classes", "model_version", "generated_at", "seconds"
+])
+
+
+def cell_size(precision):
+    """Hassasiyetteki bir geohash hücresinin (enlem, boylam) boyutu (derece)"""
+    bits = 5 * precision
+    lng_bits = (bits + 1) // 2
+    return 180.0 / 2 ** (bits - lng_bits), 360.0 / 2 ** lng_bits
+
+
+class GridSpec:
+    """Sınır kutusunu kaplayan hücreler; (satır, sütun) <-> koordinat dönüşümleri"""
+
+    def __init__(self, bounds, precision):
+        min_lat, max_lat, min_lng, max_lng = bounds
+        self.bounds = bounds
+        self.precision = precision
+        self.dlat, self.dlng = cell_size(precision)
+        # Kutunun köşelerini içeren hücrelerin küresel indeksleri
+        self.row0 = int(math.floor((min_lat + 90.0) / self.dlat))
+        self.col0 = int(math.floor((min_lng + 180.0) / self.dlng))
+        self.rows = int(math.floor((max_lat + 90.0) / self.dlat)) - self.row0 + 1
+        self.cols = int(math.floor((max_lng + 180.0) / self.dlng)) - self.col0 + 1
+        self.lat0 = self.row0 * self.dlat - 90.0  # Güneybatı köşesi
+        self.lng0 = self.col0 * self.dlng - 180.0
+
+    @property
+    def shape(self):
+        return self.rows, self.cols
+
+    @property
+    def size(self):
+        return self.rows * self.cols
+
+    def centers(self):
+        """Tüm hücre merkezleri, satır öncelikli düz (lats, lngs) dizileri"""
+        lats = self.lat0 + (np.arange(self.rows) + 0.5) * self.dlat
+        lngs = self.lng0 + (np.arange(self.cols) + 0.5) * self.dlng
+        return np.repeat(lats, self.cols), np.tile(lngs, self.rows)
+
+    def cell(self, row, col):
+        """Hücrenin geohash kodu"""
+        return geohash.encode(self.lat0 + (row + 0.5) * self.dlat, self.lng0 + (col + 0.5) * self.dlng,
+                              self.precision)
+
+    def describe(self):
+        return {
+            "precision": self.precision,
+            "bounds": list(self.bounds),
+            "origin": {"lat": self.lat0, "lng": self.lng0},
+            "cell_size": {"lat": self.dlat, "lng": self.dlng},
+            "shape": [self.rows, self.cols]
+        }
+
+
+def compute_grid(spec, hour, score):
+    """score(moment, lats, lngs) -> (sürüm, sınıflar, olasılıklar); tüm hücreler tek çağrıda skorlanır"""
+    started = time.perf_counter()
+    lats, lngs = spec.centers()
+    version, classes, probabilities = score(hour.astype(datetime), lats, lngs)
+    classes = np.asarray(classes)
+    levels = classes.take(np.argmax(probabilities, axis=1)).astype(np.uint8)
+    return TrafficGrid(
+        hour,
+        levels.reshape(spec.shape),
+        probabilities.astype(np.float16).reshape(spec.shape + (len(classes),)),
+        classes,
+        version,
+        datetime.now().isoformat(timespec="seconds"),
+        round(time.perf_counter() - started, 3)
+    )
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+
+def encode_png(indices, palette=TILE_PALETTE, alpha=TILE_ALPHA):
+    """(yükseklik, genişlik) uint8 palet indekslerini 8 bitlik palet PNG'sine çevir"""
+    height, width = indices.shape
+    raw = np.zeros((height, width + 1), dtype=np.uint8)  # Her satırın başında filtre baytı (0)
+    raw[:, 1:] = indices
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)),
+        _png_chunk(b"PLTE", bytes(value for color in palette for value in color)),
+        _png_chunk(b"tRNS", bytes(alpha)),
+        _png_chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)),
+        _png_chunk(b"IEND", b"")
+    ])
+
+
+def tile_indices(spec, levels, classes, z, x, y, size=TILE_SIZE):
+    """Web Mercator z/x/y karosunun piksel başına palet indeksleri (0: alan dışı)"""
+    n = 2 ** z
+    pixels = (np.arange(size) + 0.5) / size
+    lngs = (x + pixels) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + pixels) / n))))
+    # Enlem ve boylam eksenleri ayrık: hücre indeksleri ayrı ayrı hesaplanıp birleştirilir
+    rows = np.floor((lats - spec.lat0) / spec.dlat).astype(np.int64)
+    cols = np.floor((lngs - spec.lng0) / spec.dlng).astype(np.int64)
+    row_ok = (rows >= 0) & (rows < spec.rows)
+    col_ok = (cols >= 0) & (cols < spec.cols)
+
+    palette_index = np.searchsorted(classes, levels).astype(np.uint8) + 1
+    indices = palette_index[np.ix_(np.clip(rows, 0, spec.rows - 1), np.clip(cols, 0, spec.cols - 1))]
+    indices[~np.outer(row_ok, col_ok)] = 0
+    return indices
+
+
+def render_tile(spec, grid, z, x, y, size=TILE_SIZE):
+    return encode_png(tile_indices(spec, grid.levels, grid.classes, z, x, y, size))
+
+
+class GridStore:
+    """Önümüzdeki saatlerin ızgaraları; eksik saatler istenince ya da arka planda hesaplanır"""
+
+    def __init__(self, spec, score, version, hours_ahead=24, refresh_interval=60, clock=datetime.now):
+        self.spec = spec
+        self.score = score
+        self.version = version  # Etkin model sürümünü döndüren fonksiyon
+        self.hours_ahead = hours_ahead
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+
+        self._grids = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {
+            "computed": 0,
+            "compute_seconds_total": 0.0,
+            "compute_seconds_max": 0.0,
+            "errors": 0
+        }
+
+    def current_hour(self):
+        return np.datetime64(self.clock().replace(tzinfo=None), "h")
+
+    def in_horizon(self, hour):
+        offset = int((hour - self.current_hour()) // np.timedelta64(1, "h"))
+        return 0 <= offset < self.hours_ahead
+
+    def get(self, hour):
+        """Saatin ızgarası; yoksa ya da eski model sürümüne aitse hesaplanır"""
+        grid = self._grids.get(hour)
+        if grid is not None and grid.model_version == self.version():
+            return grid
+        with self._lock:
+            grid = self._grids.get(hour)
+            if grid is None or grid.model_version != self.version():
+                grid = compute_grid(self.spec, hour, self.score)
+                self._grids[hour] = grid
+                self._stats["computed"] += 1
+                self._stats["compute_seconds_total"] += grid.seconds
+                self._stats["compute_seconds_max"] = max(self._stats["compute_seconds_max"], grid.seconds)
+        return grid
+
+    def refresh(self):
+        """Ufuktaki tüm saatleri hazırla, geçmiş saatleri bırak"""
+        start = self.current_hour()
+        for hour in list(self._grids):
+            if hour < start:
+                self._grids.pop(hour, None)
+        for offset in range(self.hours_ahead):
+            if self._stop.is_set():
+                break
+            self.get(start + np.timedelta64(offset, "h"))
+
+    def clear(self):
+        with self._lock:
+            self._grids.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="grid-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                self._stats["errors"] += 1
+                logger.exception("Trafik ızgarası hesaplanamadı")
+            self._stop.wait(self.refresh_interval)
+
+    def stats(self):
+        return dict(
+            self._stats,
+            compute_seconds_total=round(self._stats["compute_seconds_total"], 3),
+            hours_ready=len(self._grids),
+            cells=self.spec.size,
+            precision=self.spec.precision
+        )
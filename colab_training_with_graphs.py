@@ -34,19 +34,18 @@ dosyalar = [
 print(f"📋 Yüklenecek dosyalar: {dosyalar}")
 print("-" * 40)
 
-# Verileri birleştir
-df_list = []
-for dosya in dosyalar:
-    try:
-        df = pd.read_csv(dosya)
-        df_list.append(df)
-        print(f"✅ {dosya} başarıyla yüklendi - {df.shape[0]} satır, {df.shape[1]} sütun")
-    except Exception as e:
-        print(f"❌ {dosya} yüklenirken hata: {str(e)}")
-
-if df_list:
-    df = pd.concat(df_list, ignore_index=True)
-    print(f"\n📊 Birleştirilmiş veri seti boyutu: {df.shape[0]} satır, {df.shape[1]} sütun")
+# Verileri parça parça oku ve aylık önbelleğe al (egitim_pipeline.py bu script ile
+# aynı dizinde olmalı). Daha önce işlenmiş aylar CSV tekrar ayrıştırılmadan yüklenir.
+from egitim_pipeline import (
+    TRAFFIC_THRESHOLDS, TRAINING_FEATURES, balanced_indices, ingest_files, label_traffic,
+    load_frame, peak_memory_mb, take_rows
+)
+
+month_dirs = ingest_files(dosyalar)
+if month_dirs:
+    df = load_frame(month_dirs)
+    print(f"\n📊 Birleştirilmiş veri seti boyutu: {df.shape[0]} satır, {df.shape[1]} sütun "
+          f"(en yüksek bellek {peak_memory_mb():.0f} MB)")
 else:
     print("❌ Hiç dosya yüklenemedi!")
     exit()
@@ -63,18 +62,8 @@ if missing_columns:
 else:
     print("✅ Tüm gerekli sütunlar mevcut")
 
-# Veri tiplerini kontrol et ve düzenle
-print("\n🔧 Veri tipleri düzenleniyor...")
-df['DATE_TIME'] = pd.to_datetime(df['DATE_TIME'])
-df['LATITUDE'] = pd.to_numeric(df['LATITUDE'], errors='coerce')
-df['LONGITUDE'] = pd.to_numeric(df['LONGITUDE'], errors='coerce')
-df['MINIMUM_SPEED'] = pd.to_numeric(df['MINIMUM_SPEED'], errors='coerce')
-df['MAXIMUM_SPEED'] = pd.to_numeric(df['MAXIMUM_SPEED'], errors='coerce')
-df['AVERAGE_SPEED'] = pd.to_numeric(df['AVERAGE_SPEED'], errors='coerce')
-df['NUMBER_OF_VEHICLES'] = pd.to_numeric(df['NUMBER_OF_VEHICLES'], errors='coerce')
-
-# Eksik değerleri temizle
-df = df.dropna()
+# Veri tipleri (float32 koordinat/hız, int16 araç sayısı, kategorik GEOHASH) ve
+# eksik değer temizliği veri alma aşamasında yapıldı
 print(f"✅ Temizlenen veri: {df.shape[0]} satır")
 
 # Veri özeti
@@ -90,23 +79,12 @@ print(f"📍 Benzersiz GEOHASH: {df['GEOHASH'].nunique()}")
 # Veri ön işleme
 print("\n🔍 Veri ön işleme başlıyor...")
 
-# Zaman özelliklerini oluştur
-df["timestamp"] = pd.to_datetime(df["DATE_TIME"])
-df["hour"] = df["timestamp"].dt.hour
-df["day_of_week"] = df["timestamp"].dt.dayofweek
-df["is_weekend"] = (df["day_of_week"] >= 5).astype(int)
-df["month"] = df["timestamp"].dt.month
+# Zaman özellikleri (hour, day_of_week, is_weekend, month) veri alma aşamasında
+# parça başına türetildi
 
 # Trafik seviyesi sınıflandırması - Daha dengeli eşikler
-def classify_traffic(avg_speed):
-    if avg_speed <= 30:      # Daha yüksek eşik
-        return 2  # Yoğun
-    elif avg_speed <= 50:    # Daha yüksek eşik
-        return 1  # Orta
-    else:
-        return 0  # Az
-
-df["traffic_level"] = df["AVERAGE_SPEED"].apply(classify_traffic)
+# (<= 30 km/h yoğun, <= 50 km/h orta, üstü az; egitim_pipeline.TRAFFIC_THRESHOLDS)
+df["traffic_level"] = label_traffic(df["AVERAGE_SPEED"].to_numpy(), TRAFFIC_THRESHOLDS)
 
 # Sınıf dağılımını kontrol et
 print("\n📊 Sınıf dağılımı:")
@@ -115,32 +93,20 @@ for level, count in traffic_counts.items():
     level_name = ['Az', 'Orta', 'Yoğun'][level]
     print(f"  {level} ({level_name}): {count:,} ({count/len(df)*100:.1f}%)")
 
-# Veri dengesizliğini düzelt
+# Veri dengesizliğini düzelt: sınıf başına DataFrame kopyası oluşturmadan satır
+# numaraları üzerinden örnekleme yapılır (eski sample() zinciriyle aynı satırlar)
 print("\n⚖️ Veri dengesizliği düzeltiliyor...")
-df_0 = df[df["traffic_level"] == 0]
-df_1 = df[df["traffic_level"] == 1]
-df_2 = df[df["traffic_level"] == 2]
-
-n = min(len(df_0), len(df_1), len(df_2))
+level_count = len(TRAFFIC_THRESHOLDS) + 1
+balanced_order = balanced_indices(df["traffic_level"].to_numpy(), seed=42, classes=range(level_count))
+n = len(balanced_order) // level_count
 print(f"Her sınıf için {n:,} örnek kullanılacak")
-
-df_balanced = pd.concat([
-    df_0.sample(n=n, random_state=42),
-    df_1.sample(n=n, random_state=42),
-    df_2.sample(n=n, random_state=42)
-]).sample(frac=1, random_state=42)
-
-print(f"✅ Dengeli veri seti: {df_balanced.shape[0]:,} satır")
+print(f"✅ Dengeli veri seti: {len(balanced_order):,} satır")
 
 # Özellik seçimi
-features = [
-    "hour", "day_of_week", "is_weekend", "month",
-    "MINIMUM_SPEED", "MAXIMUM_SPEED", "NUMBER_OF_VEHICLES",
-    "LATITUDE", "LONGITUDE"
-]
+features = TRAINING_FEATURES
 
-X = df_balanced[features]
-y = df_balanced["traffic_level"]
+X = take_rows(df, features, balanced_order)
+y = df["traffic_level"].to_numpy()[balanced_order]
 
 # Veriyi böl
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -0,0 +1,227 @@
+# Eğitim hattı performans ölçümleri
+#
+# Gerçek İBB dosyaları yoksa İBB şemasında sentetik aylık CSV'ler üretilir:
+#   python egitim_benchmark.py make-data --rows 1000000 --months 2024_11 2024_12
+#   python egitim_benchmark.py ingest ibb_traffic_2024_11.csv ibb_traffic_2024_12.csv
+#
+#   python egitim_benchmark.py balance ibb_traffic_2024_11.csv ibb_traffic_2024_12.csv
+#
+# ingest ölçümlerinde temiz bir tepe değeri (ru_maxrss) için her yol ayrı bir
+# process'te çalıştırılır; balance ek belleği tracemalloc ile ölçer.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import egitim_pipeline
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def make_synthetic_csv(path, rows, year, month, seed=42, geohash_count=2500):
+    """İBB şemasında (DATE_TIME, LATITUDE, ..., NUMBER_OF_VEHICLES) rastgele bir aylık CSV yaz"""
+    rng = np.random.default_rng(seed + year * 100 + month)
+    codes = rng.integers(0, 32, size=(geohash_count, 3))
+    geohashes = np.array(["sxk" + "".join(_BASE32[c] for c in row) for row in codes])
+    lats = rng.uniform(40.85, 41.25, geohash_count).round(6)
+    lngs = rng.uniform(28.6, 29.35, geohash_count).round(6)
+
+    start = np.datetime64(f"{year:04d}-{month:02d}-01T00:00:00")
+    hours = np.arange(24 * 28)
+    chunk = 500_000
+    with open(path, "w", encoding="utf-8") as f:
+        for offset in range(0, rows, chunk):
+            n = min(chunk, rows - offset)
+            location = rng.integers(0, geohash_count, n)
+            hour = rng.choice(hours, n)
+            average = rng.gamma(6.0, 7.5, n).round()
+            spread = rng.uniform(5, 40, n)
+            frame = pd.DataFrame({
+                "DATE_TIME": (start + hour.astype("timedelta64[h]")).astype(str),
+                "LATITUDE": lats[location],
+                "LONGITUDE": lngs[location],
+                "GEOHASH": geohashes[location],
+                "MINIMUM_SPEED": np.maximum(average - spread, 0).round(),
+                "MAXIMUM_SPEED": (average + spread).round(),
+                "AVERAGE_SPEED": average,
+                "NUMBER_OF_VEHICLES": rng.integers(1, 400, n),
+            })
+            frame["DATE_TIME"] = frame["DATE_TIME"].str.replace("T", " ")
+            frame.to_csv(f, index=False, header=offset == 0)
+
+
+def old_ingest(paths):
+    """colab_training_with_graphs.py'deki eski yol: tam okuma, concat, to_numeric, iki kez to_datetime"""
+    df = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+    df["DATE_TIME"] = pd.to_datetime(df["DATE_TIME"])
+    for column in egitim_pipeline.NUMERIC_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    df = df.dropna()
+    df["timestamp"] = pd.to_datetime(df["DATE_TIME"])
+    df["hour"] = df["timestamp"].dt.hour
+    df["day_of_week"] = df["timestamp"].dt.dayofweek
+    df["is_weekend"] = (df["day_of_week"] >= 5).astype(int)
+    df["month"] = df["timestamp"].dt.month
+    return df
+
+
+def _classify_traffic(avg_speed):
+    if avg_speed <= 30:
+        return 2
+    elif avg_speed <= 50:
+        return 1
+    else:
+        return 0
+
+
+def old_label_balance(df):
+    """Eski yol: satır başına apply, sınıf başına DataFrame kopyası, iki kez sample"""
+    df = df.copy(deep=False)
+    df["traffic_level"] = df["AVERAGE_SPEED"].apply(_classify_traffic)
+    df_0 = df[df["traffic_level"] == 0]
+    df_1 = df[df["traffic_level"] == 1]
+    df_2 = df[df["traffic_level"] == 2]
+    n = min(len(df_0), len(df_1), len(df_2))
+    df_balanced = pd.concat([
+        df_0.sample(n=n, random_state=42),
+        df_1.sample(n=n, random_state=42),
+        df_2.sample(n=n, random_state=42)
+    ]).sample(frac=1, random_state=42)
+    return df_balanced[egitim_pipeline.TRAINING_FEATURES], df_balanced["traffic_level"], df_balanced.index
+
+
+def new_label_balance(df):
+    """Yeni yol: tek np.digitize, satır numarası üzerinden örnekleme, sütun başına tek kopya"""
+    labels = egitim_pipeline.label_traffic(df["AVERAGE_SPEED"].to_numpy())
+    order = egitim_pipeline.balanced_indices(labels, seed=42, classes=range(3))
+    return egitim_pipeline.take_rows(df, egitim_pipeline.TRAINING_FEATURES, order), labels[order], order
+
+
+def _traced_peak_mb(func, *args):
+    """Fonksiyonun çalışırken ayırdığı en yüksek ek bellek (tracemalloc, MB)"""
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, peak / 1e6
+
+
+def bench_balance(args):
+    """Etiketleme + sınıf dengeleme: eski ve yeni yolun süresi, ek belleği ve eşitliği"""
+    month_dirs = egitim_pipeline.ingest_files(args.files, args.cache_dir, verbose=False)
+    df = egitim_pipeline.load_frame(month_dirs)
+    print(f"📊 {len(df):,} satır ({df.memory_usage().sum() / 1e6:.0f} MB)")
+
+    results = {}
+    for title, func in (("eski: apply + sample", old_label_balance), ("yeni: digitize + indeks", new_label_balance)):
+        started = time.perf_counter()
+        func(df)
+        seconds = time.perf_counter() - started
+        results[title], peak_mb = _traced_peak_mb(func, df)
+        print(f"{title:<28} {seconds:7.2f} sn   ek bellek (tepe) {peak_mb:7.0f} MB")
+
+    (old_X, old_y, old_index), (new_X, new_y, new_order) = results.values()
+    same = (np.array_equal(old_index.to_numpy(), new_order)
+            and np.array_equal(old_y.to_numpy(), new_y)
+            and all(np.array_equal(old_X[c].to_numpy(), new_X[c].to_numpy()) for c in old_X.columns))
+    print(f"{'✅' if same else '❌'} Seçilen satırlar, sıraları, etiketler ve özellikler "
+          f"{'aynı' if same else 'FARKLI'} ({len(new_order):,} satır)")
+    if not same:
+        sys.exit(1)
+
+
+def _run_worker(*args):
+    """Komutu ayrı process'te çalıştır, son satırdaki JSON sonucunu döndür"""
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), *args],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def worker(args):
+    started = time.perf_counter()
+    if args.mode == "old":
+        df = old_ingest(args.files)
+        rows = len(df)
+    else:
+        month_dirs = egitim_pipeline.ingest_files(args.files, args.cache_dir, args.chunk_size,
+                                                  force=args.mode == "new", verbose=False)
+        if args.mode == "load":
+            df = egitim_pipeline.load_frame(month_dirs)
+            rows = len(df)
+        else:
+            rows = sum(egitim_pipeline.read_meta(month_dir)["rows"] for month_dir in month_dirs)
+    print(json.dumps({
+        "seconds": time.perf_counter() - started,
+        "peak_mb": egitim_pipeline.peak_memory_mb(),
+        "rows": rows
+    }))
+
+
+def bench_make_data(args):
+    for key in args.months:
+        year, month = (int(part) for part in key.split("_"))
+        path = f"ibb_traffic_{key}.csv"
+        started = time.perf_counter()
+        make_synthetic_csv(path, args.rows, year, month, seed=args.seed)
+        print(f"✅ {path}: {args.rows:,} satır, {os.path.getsize(path) / 1e6:.0f} MB "
+              f"({time.perf_counter() - started:.1f} sn)")
+
+
+def bench_ingest(args):
+    """Eski tam okuma ile parça parça önbelleğe alma: süre ve en yüksek bellek"""
+    size_mb = sum(os.path.getsize(path) for path in args.files) / 1e6
+    print(f"📊 {len(args.files)} dosya, {size_mb:.0f} MB CSV, parça boyutu {args.chunk_size:,}")
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="egitim_cache_")
+    common = ["--cache-dir", cache_dir, "--chunk-size", str(args.chunk_size), *args.files]
+    for mode, title in (("old", "eski: read_csv + concat"), ("new", "yeni: parça + önbellek yazma"),
+                        ("load", "yeni: önbellekten yükleme")):
+        result = _run_worker("worker", "--mode", mode, *common)
+        print(f"{title:<32} {result['rows']:>12,} satır   {result['seconds']:7.1f} sn   "
+              f"en yüksek bellek {result['peak_mb']:7.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eğitim hattı performans ölçümleri")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    make_data = subparsers.add_parser("make-data", help="Sentetik İBB CSV'leri üret")
+    make_data.add_argument("--rows", type=int, default=1_000_000)
+    make_data.add_argument("--months", nargs="+", default=["2024_11", "2024_12", "2025_01"])
+    make_data.add_argument("--seed", type=int, default=42)
+    make_data.set_defaults(func=bench_make_data)
+
+    ingest = subparsers.add_parser("ingest", help="Eski ve parça parça veri alma karşılaştırması")
+    ingest.add_argument("files", nargs="+")
+    ingest.add_argument("--cache-dir")
+    ingest.add_argument("--chunk-size", type=int, default=egitim_pipeline.CHUNK_SIZE)
+    ingest.set_defaults(func=bench_ingest)
+
+    balance = subparsers.add_parser("balance", help="Etiketleme ve sınıf dengeleme: eski ve yeni yol")
+    balance.add_argument("files", nargs="+")
+    balance.add_argument("--cache-dir", default=egitim_pipeline.CACHE_DIR)
+    balance.set_defaults(func=bench_balance)
+
+    run = subparsers.add_parser("worker")
+    run.add_argument("--mode", choices=["old", "new", "load"], required=True)
+    run.add_argument("--cache-dir", required=True)
+    run.add_argument("--chunk-size", type=int, default=egitim_pipeline.CHUNK_SIZE)
+    run.add_argument("files", nargs="+")
+    run.set_defaults(func=worker)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,565 @@
+# CrowdPredictor model eğitimi komut satırı aracı
+#
+# Colab script'inin (colab_training_with_graphs.py) tekrar kullanılabilir hali:
+# veriyi egitim_pipeline ile parça parça alır, etiketler ve dengeler, orman
+# boyutu ve derinliği üzerinde successive halving araması yapar ve seçilen
+# modeli sürümlü bir dizine yazar.
+#
+# Arama: her derinlik adayı az sayıda ağaçla başlar; her turda adayların en
+# iyi 1/HALVING_FACTOR'ı kalır ve ormanları warm_start ile HALVING_FACTOR kat
+# büyütülür. Adaylar ayrı process'lerde (her görev yeni bir process, böylece
+# en yüksek bellek aday başına ölçülür) çalışır. Zaman bütçesi dolunca yeni tur
+# başlatılmaz. Doğruluk tabanını geçen (ağaç sayısı, derinlik) ikilileri
+# arasından tahmin süresi en kısa olan seçilip tüm eğitim verisiyle yeniden
+# eğitilir.
+#
+#   python egitim_cli.py ibb_traffic_2024_11.csv ibb_traffic_2024_12.csv \
+#       --depths 10 12 15 --max-trees 200 --budget 1800 --workers 2 --n-jobs 2
+#
+#   models/20250115-093000/
+#       trafik_model.pkl, scaler.pkl     backend'in yüklediği dosyalar
+#       trafik_model.artifact/           mmap model paketi (backend/model_artifact.py)
+#       training_report.json             aday başına süre, bellek, boyut, doğruluk
+#   models/LATEST                        son sürümün adı
+#
+# Artımlı mod (--incremental): her ay için ayrı bir alt orman eğitilip
+# models/months/YYYY_MM/ altında saklanır. Yeni bir ay geldiğinde sadece o ayın
+# alt ormanı eğitilir; yayınlanan model son --window ayın alt ormanlarının
+# ağaçları birleştirilerek oluşturulur, geçmiş aylar tekrar işlenmez.
+#
+#   python egitim_cli.py ibb_traffic_*.csv --incremental --trees-per-month 25 --compare-full
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+import egitim_pipeline
+from egitim_pipeline import peak_memory_mb
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from flat_forest import FlatForest  # noqa: E402
+from inference import ScalerParams  # noqa: E402
+import model_artifact  # noqa: E402
+
+MODELS_DIR = "models"
+
+# Arama uzayı ve successive halving ayarları
+DEFAULT_DEPTHS = (10, 12, 15)
+MIN_TREES = 25
+MAX_TREES = 200
+HALVING_FACTOR = 2
+
+# Doğruluk tabanı verilmezse en iyi doğruluğun bu kadar altı kabul edilir
+ACCURACY_TOLERANCE = 0.005
+
+TEST_SIZE = 0.2
+VALIDATION_SIZE = 0.2
+RANDOM_STATE = 42
+
+# Colab script'indeki sabit ağaç parametreleri
+FOREST_PARAMS = {"min_samples_split": 5, "min_samples_leaf": 2}
+
+LATENCY_BATCH = 64
+
+# Artımlı mod: ay başına alt orman ayarları
+MONTHS_DIR = "months"
+TREES_PER_MONTH = 25
+INCREMENTAL_MAX_DEPTH = 15
+INCREMENTAL_WINDOW = 12
+
+
+def forest_size(model):
+    """Ormanın düğüm sayısı ve ağaç dizilerinin bellekteki boyutu (bayt)"""
+    nodes, size = 0, 0
+    for estimator in model.estimators_:
+        state = estimator.tree_.__getstate__()
+        nodes += estimator.tree_.node_count
+        size += state["nodes"].nbytes + state["values"].nbytes
+    return nodes, size
+
+
+def prediction_latency_ms(model, X, repeat=50):
+    """Servisteki değerlendirici (FlatForest) ile LATENCY_BATCH satırlık tahmin süresi (en iyi ölçüm)"""
+    flat = FlatForest.from_sklearn(model)
+    batch = X[:LATENCY_BATCH]
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        flat.predict_proba(batch)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def grow_candidate(task):
+    """Bir adayın ormanını task["n_trees"] ağaca büyüt, doğrulama setinde değerlendir
+
+    Ayrı bir process'te çalışır; eğitim verisi mmap ile açılır, model diskten
+    okunup diske yazılır.
+    """
+    X_fit = np.load(os.path.join(task["data_dir"], "X_fit.npy"), mmap_mode="r")
+    y_fit = np.load(os.path.join(task["data_dir"], "y_fit.npy"), mmap_mode="r")
+    X_val = np.load(os.path.join(task["data_dir"], "X_val.npy"))
+    y_val = np.load(os.path.join(task["data_dir"], "y_val.npy"))
+
+    if os.path.exists(task["model_path"]):
+        model = joblib.load(task["model_path"])
+    else:
+        model = RandomForestClassifier(
+            max_depth=task["max_depth"],
+            random_state=task["seed"],
+            warm_start=True,
+            **FOREST_PARAMS
+        )
+    model.set_params(n_estimators=task["n_trees"], n_jobs=task["n_jobs"])
+
+    started = time.perf_counter()
+    model.fit(X_fit, y_fit)
+    fit_seconds = time.perf_counter() - started
+    joblib.dump(model, task["model_path"])
+
+    nodes, size = forest_size(model)
+    model.set_params(n_jobs=1)
+    return {
+        "max_depth": task["max_depth"],
+        "n_trees": task["n_trees"],
+        "accuracy": float(accuracy_score(y_val, model.predict(X_val))),
+        "fit_seconds": round(fit_seconds, 3),
+        "fit_seconds_total": round(task["previous_seconds"] + fit_seconds, 3),
+        "peak_memory_mb": round(peak_memory_mb(), 1),
+        "node_count": nodes,
+        "model_mb": round(size / 1e6, 2),
+        "latency_ms": round(prediction_latency_ms(model, X_val), 3),
+        "model_path": task["model_path"]
+    }
+
+
+def successive_halving(data_dir, work_dir, depths, min_trees, max_trees, factor,
+                       workers, n_jobs, budget, seed, log=print):
+    """Tüm turlarda değerlendirilen (derinlik, ağaç sayısı) sonuçlarını döndür"""
+    started = time.perf_counter()
+    survivors = list(depths)
+    previous = {depth: 0.0 for depth in depths}
+    n_trees = min_trees
+    results = []
+    rung = 0
+    last_rung_seconds = None
+
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as executor:
+        while survivors:
+            elapsed = time.perf_counter() - started
+            # Bir sonraki tur bütçeyi aşacaksa başlatılmaz (tur süresi ağaç sayısıyla orantılı)
+            if budget is not None and (elapsed >= budget or (
+                    last_rung_seconds is not None and elapsed + last_rung_seconds * factor > budget)):
+                log(f"⏱️  Zaman bütçesi doldu ({elapsed:.0f} sn), arama durduruldu")
+                break
+
+            rung_started = time.perf_counter()
+            tasks = [
+                {
+                    "data_dir": data_dir,
+                    "model_path": os.path.join(work_dir, f"depth_{depth}.pkl"),
+                    "max_depth": depth,
+                    "n_trees": n_trees,
+                    "n_jobs": n_jobs,
+                    "seed": seed,
+                    "previous_seconds": previous[depth]
+                }
+                for depth in survivors
+            ]
+            rung_results = list(executor.map(grow_candidate, tasks))
+            for result in rung_results:
+                result["rung"] = rung
+                previous[result["max_depth"]] = result["fit_seconds_total"]
+                log(f"  tur {rung}  derinlik {str(result['max_depth']):>4}  {result['n_trees']:>4} ağaç  "
+                    f"doğruluk {result['accuracy']:.4f}  eğitim {result['fit_seconds']:7.1f} sn  "
+                    f"bellek {result['peak_memory_mb']:7.0f} MB  model {result['model_mb']:7.1f} MB  "
+                    f"tahmin({LATENCY_BATCH}) {result['latency_ms']:6.2f} ms")
+            results.extend(rung_results)
+            last_rung_seconds = time.perf_counter() - rung_started
+
+            if n_trees >= max_trees:
+                break
+            rung_results.sort(key=lambda r: r["accuracy"], reverse=True)
+            keep = max(1, len(rung_results) // factor)
+            survivors = [r["max_depth"] for r in rung_results[:keep]]
+            n_trees = min(max_trees, n_trees * factor)
+            rung += 1
+    return results
+
+
+def select_candidate(results, accuracy_floor=None, tolerance=ACCURACY_TOLERANCE):
+    """Doğruluk tabanını geçenler arasından tahmini en hızlı olanı seç (taban, seçilen)"""
+    if not results:
+        return None, None
+    if accuracy_floor is None:
+        accuracy_floor = max(r["accuracy"] for r in results) - tolerance
+    eligible = [r for r in results if r["accuracy"] >= accuracy_floor]
+    if not eligible:
+        return accuracy_floor, None
+    return accuracy_floor, min(eligible, key=lambda r: (r["latency_ms"], -r["accuracy"]))
+
+
+def load_training_data(files, cache_dir, chunk_size, thresholds, seed):
+    """Önbellekten özellikleri ve etiketleri yükle, sınıfları dengele: (X DataFrame, y)"""
+    month_dirs = egitim_pipeline.ingest_files(files, cache_dir, chunk_size)
+    if not month_dirs:
+        raise SystemExit("❌ Hiç dosya yüklenemedi!")
+
+    columns = egitim_pipeline.load_columns(
+        month_dirs, egitim_pipeline.TRAINING_FEATURES + ["AVERAGE_SPEED"], mmap_mode="r"
+    )
+    labels = egitim_pipeline.label_traffic(columns["AVERAGE_SPEED"], thresholds)
+    order = egitim_pipeline.balanced_indices(labels, seed=seed, classes=range(len(thresholds) + 1))
+    X = pd.DataFrame({name: np.asarray(columns[name])[order] for name in egitim_pipeline.TRAINING_FEATURES})
+    return X, labels[order]
+
+
+def write_version(output_dir, model, scaler, report):
+    """Modeli sürümlü dizine yaz ve LATEST'i güncelle; dizin adı (sürüm) döndürülür"""
+    version = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    suffix = 1
+    while os.path.exists(os.path.join(output_dir, version)):  # Aynı saniyede ikinci yayın
+        version = f"{version.split('.')[0]}.{suffix}"
+        suffix += 1
+    version_dir = os.path.join(output_dir, version)
+    tmp_dir = f"{version_dir}.tmp"
+    os.makedirs(tmp_dir)
+
+    model_path = os.path.join(tmp_dir, "trafik_model.pkl")
+    scaler_path = os.path.join(tmp_dir, "scaler.pkl")
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+    manifest = model_artifact.export_artifact(
+        model, ScalerParams.from_scaler(scaler), os.path.join(tmp_dir, "trafik_model.artifact"),
+        source_paths=(model_path, scaler_path)
+    )
+    report = dict(report, version=version, artifact_version=manifest["version"])
+    with open(os.path.join(tmp_dir, "training_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    os.rename(tmp_dir, version_dir)
+    with open(os.path.join(output_dir, "LATEST.tmp"), "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(os.path.join(output_dir, "LATEST.tmp"), os.path.join(output_dir, "LATEST"))
+    return version
+
+
+def month_training_split(month_dir, thresholds, seed):
+    """Tek ayın dengelenmiş verisini eğitim/test olarak böl (float32, ölçeklendirmesiz)"""
+    columns = egitim_pipeline.load_columns(
+        [month_dir], egitim_pipeline.TRAINING_FEATURES + ["AVERAGE_SPEED"], mmap_mode="r"
+    )
+    labels = egitim_pipeline.label_traffic(columns["AVERAGE_SPEED"], thresholds)
+    order = egitim_pipeline.balanced_indices(labels, seed=seed, classes=range(len(thresholds) + 1))
+    X = np.empty((len(order), len(egitim_pipeline.TRAINING_FEATURES)), dtype=np.float32)
+    for i, name in enumerate(egitim_pipeline.TRAINING_FEATURES):
+        X[:, i] = np.asarray(columns[name])[order]
+    return train_test_split(X, labels[order], test_size=TEST_SIZE, random_state=seed)
+
+
+def month_seed(seed, key):
+    """Her ayın alt ormanı farklı bootstrap örnekleri çeksin diye aya özel seed"""
+    return seed + int("".join(ch for ch in key if ch.isdigit()) or 0) % 1_000_000
+
+
+def train_month(month_dir, store_dir, thresholds, max_depth, n_trees, n_jobs, seed):
+    """Ayın alt ormanını eğit; orman, test seti ve meta store_dir altına yazılır"""
+    key = os.path.basename(month_dir)
+    X_train, X_test, y_train, y_test = month_training_split(month_dir, thresholds, seed)
+    model = RandomForestClassifier(
+        n_estimators=n_trees,
+        max_depth=max_depth,
+        random_state=month_seed(seed, key),
+        n_jobs=n_jobs,
+        **FOREST_PARAMS
+    )
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+
+    tmp_dir = f"{store_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    joblib.dump(model, os.path.join(tmp_dir, "forest.pkl"))
+    np.savez(os.path.join(tmp_dir, "test.npz"), X=X_test, y=y_test)
+    meta = {
+        "month": key,
+        "source": egitim_pipeline.read_meta(month_dir)["source"],
+        "params": {"max_depth": max_depth, "n_trees": n_trees, "thresholds": list(thresholds), "seed": seed},
+        "rows": {"train": len(X_train), "test": len(X_test)},
+        "fit_seconds": round(fit_seconds, 2)
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.rename(tmp_dir, store_dir)
+    return meta
+
+
+def month_is_current(store_dir, month_dir, params):
+    """Alt orman aynı kaynak dosya ve aynı ayarlarla eğitildiyse True"""
+    try:
+        with open(os.path.join(store_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return False
+    cache_meta = egitim_pipeline.read_meta(month_dir)
+    return cache_meta is not None and meta["source"] == cache_meta["source"] and meta["params"] == params
+
+
+def merge_forests(forests):
+    """Aynı sınıflara sahip ormanların ağaçlarını tek bir RandomForestClassifier'da birleştir"""
+    base = forests[0]
+    for forest in forests[1:]:
+        if not np.array_equal(forest.classes_, base.classes_) or forest.n_features_in_ != base.n_features_in_:
+            raise ValueError("Alt ormanların sınıfları ya da özellik sayıları farklı")
+    merged = RandomForestClassifier(**dict(base.get_params(), n_jobs=1))
+    merged.estimators_ = [tree for forest in forests for tree in forest.estimators_]
+    merged.n_estimators = len(merged.estimators_)
+    for attribute in ("classes_", "n_classes_", "n_outputs_", "n_features_in_", "estimator_"):
+        setattr(merged, attribute, getattr(base, attribute))
+    return merged
+
+
+def run_incremental(args):
+    """Sadece yeni/değişen ayların alt ormanlarını eğit, son pencereyi birleştirip yayınla"""
+    run_started = time.perf_counter()
+    thresholds = tuple(sorted(args.thresholds))
+    month_dirs = egitim_pipeline.ingest_files(args.files, args.cache_dir, args.chunk_size)
+    if not month_dirs:
+        print("❌ Hiç dosya yüklenemedi!")
+        return 1
+    month_dirs = sorted(month_dirs, key=os.path.basename)[-args.window:]
+
+    params = {"max_depth": args.max_depth, "n_trees": args.trees_per_month,
+              "thresholds": list(thresholds), "seed": args.seed}
+    months_root = os.path.join(args.output_dir, MONTHS_DIR)
+    os.makedirs(months_root, exist_ok=True)
+
+    trained, reused, train_seconds = [], [], 0.0
+    for month_dir in month_dirs:
+        key = os.path.basename(month_dir)
+        store_dir = os.path.join(months_root, key)
+        if month_is_current(store_dir, month_dir, params):
+            reused.append(key)
+            continue
+        started = time.perf_counter()
+        meta = train_month(month_dir, store_dir, thresholds, args.max_depth, args.trees_per_month,
+                           args.n_jobs, args.seed)
+        train_seconds += time.perf_counter() - started
+        trained.append(key)
+        print(f"  {key}: {args.trees_per_month} ağaç, {meta['rows']['train']:,} satır, "
+              f"eğitim {meta['fit_seconds']:.1f} sn (en yüksek bellek {peak_memory_mb():.0f} MB)")
+    print(f"🌲 Eğitilen aylar: {trained or '-'}; hazır alınan: {reused or '-'} ({train_seconds:.1f} sn)")
+
+    keys = [os.path.basename(month_dir) for month_dir in month_dirs]
+    forests, X_tests, y_tests = [], [], []
+    for key in keys:
+        store_dir = os.path.join(months_root, key)
+        forests.append(joblib.load(os.path.join(store_dir, "forest.pkl")))
+        with np.load(os.path.join(store_dir, "test.npz")) as test:
+            X_tests.append(test["X"])
+            y_tests.append(test["y"])
+    model = merge_forests(forests)
+    X_test, y_test = np.concatenate(X_tests), np.concatenate(y_tests)
+    accuracy = accuracy_score(y_test, model.predict(X_test))
+    print(f"🎯 Birleşik model: {model.n_estimators} ağaç, test doğruluğu {accuracy:.4f} "
+          f"({len(y_test):,} satır, {len(keys)} ayın test setleri)")
+
+    report = {
+        "mode": "incremental",
+        "months": keys,
+        "trained_months": trained,
+        "reused_months": reused,
+        "thresholds": list(thresholds),
+        "model": {
+            "max_depth": args.max_depth,
+            "n_estimators": model.n_estimators,
+            "trees_per_month": args.trees_per_month,
+            "params": FOREST_PARAMS,
+            "test_accuracy": accuracy,
+            "train_seconds": round(train_seconds, 1)
+        }
+    }
+
+    if args.compare_full:
+        # Aynı eğitim/test ayrımlarıyla tüm aylar üzerinde sıfırdan eğitim
+        splits = [month_training_split(month_dir, thresholds, args.seed) for month_dir in month_dirs]
+        X_train = np.concatenate([split[0] for split in splits])
+        y_train = np.concatenate([split[2] for split in splits])
+        del splits
+        full = RandomForestClassifier(
+            n_estimators=model.n_estimators,
+            max_depth=args.max_depth,
+            random_state=args.seed,
+            n_jobs=args.n_jobs,
+            **FOREST_PARAMS
+        )
+        started = time.perf_counter()
+        full.fit(X_train, y_train)
+        full_seconds = time.perf_counter() - started
+        full_accuracy = accuracy_score(y_test, full.predict(X_test))
+        print(f"⚖️  Sıfırdan eğitim: test doğruluğu {full_accuracy:.4f} ({full_seconds:.1f} sn); "
+              f"fark {accuracy - full_accuracy:+.4f}")
+        report["full_retrain"] = {"test_accuracy": full_accuracy, "fit_seconds": round(full_seconds, 1)}
+
+    # Ağaçlar ölçeklendirmeden etkilenmez; alt ormanlar ham özelliklerle eğitildiği
+    # için backend'e etkisiz (mean/scale'siz) bir scaler yazılır
+    scaler = StandardScaler(with_mean=False, with_std=False).fit(X_test)
+    report["peak_memory_mb"] = round(peak_memory_mb(), 1)
+    report["total_seconds"] = round(time.perf_counter() - run_started, 1)
+    version = write_version(args.output_dir, model, scaler, report)
+    print(f"✅ Model yazıldı: {os.path.join(args.output_dir, version)} (toplam {report['total_seconds']:.0f} sn)")
+    return 0
+
+
+def parse_depth(value):
+    return None if value.lower() == "none" else int(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trafik tahmin modelini eğit ve sürümlü dizine yaz")
+    parser.add_argument("files", nargs="+", help="ibb_traffic_YYYY_MM.csv dosyaları")
+    parser.add_argument("--cache-dir", default=egitim_pipeline.CACHE_DIR)
+    parser.add_argument("--chunk-size", type=int, default=egitim_pipeline.CHUNK_SIZE)
+    parser.add_argument("--output-dir", default=MODELS_DIR)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=list(egitim_pipeline.TRAFFIC_THRESHOLDS),
+                        help="Ortalama hız eşikleri (km/h), artan sırada")
+    parser.add_argument("--depths", type=parse_depth, nargs="+", default=list(DEFAULT_DEPTHS),
+                        help="Aday max_depth değerleri ('none' sınırsız)")
+    parser.add_argument("--min-trees", type=int, default=MIN_TREES)
+    parser.add_argument("--max-trees", type=int, default=MAX_TREES)
+    parser.add_argument("--factor", type=int, default=HALVING_FACTOR)
+    parser.add_argument("--budget", type=float, help="Arama için zaman bütçesi (sn)")
+    parser.add_argument("--accuracy-floor", type=float,
+                        help=f"Kabul edilen en düşük doğrulama doğruluğu (varsayılan: en iyi - {ACCURACY_TOLERANCE})")
+    parser.add_argument("--workers", type=int, default=1, help="Aynı anda eğitilen aday sayısı")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Aday başına RandomForest n_jobs")
+    parser.add_argument("--search-rows", type=int, help="Arama için eğitim verisinden kullanılacak satır sayısı")
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    parser.add_argument("--incremental", action="store_true",
+                        help="Sadece yeni ayların alt ormanlarını eğitip birleştir")
+    parser.add_argument("--trees-per-month", type=int, default=TREES_PER_MONTH)
+    parser.add_argument("--max-depth", type=parse_depth, default=INCREMENTAL_MAX_DEPTH,
+                        help="Artımlı modda alt ormanların max_depth değeri")
+    parser.add_argument("--window", type=int, default=INCREMENTAL_WINDOW,
+                        help="Artımlı modda birleştirilen en son ay sayısı")
+    parser.add_argument("--compare-full", action="store_true",
+                        help="Artımlı modda aynı veriyle sıfırdan eğitilen modelle doğruluğu karşılaştır")
+    args = parser.parse_args(argv)
+    if args.incremental:
+        return run_incremental(args)
+
+    run_started = time.perf_counter()
+    thresholds = tuple(sorted(args.thresholds))
+    X, y = load_training_data(args.files, args.cache_dir, args.chunk_size, thresholds, args.seed)
+    print(f"✅ Dengeli veri seti: {len(X):,} satır (en yüksek bellek {peak_memory_mb():.0f} MB)")
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=args.seed)
+    del X
+
+    work_dir = tempfile.mkdtemp(prefix="egitim_")
+    try:
+        # Arama: eğitim setinin bir kısmı doğrulama için ayrılır, scaler sadece kalan kısma uyar
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X_train, y_train, test_size=VALIDATION_SIZE, random_state=args.seed
+        )
+        if args.search_rows:
+            X_fit, y_fit = X_fit[:args.search_rows], y_fit[:args.search_rows]
+        search_scaler = StandardScaler().fit(X_fit)
+        for name, values in (("X_fit", search_scaler.transform(X_fit)), ("X_val", search_scaler.transform(X_val)),
+                             ("y_fit", y_fit), ("y_val", y_val)):
+            np.save(os.path.join(work_dir, f"{name}.npy"), np.asarray(values, dtype=np.float32)
+                    if name.startswith("X") else np.asarray(values))
+        del X_fit, X_val
+
+        print(f"\n🔍 Successive halving: derinlikler {args.depths}, {args.min_trees} -> {args.max_trees} ağaç, "
+              f"{args.workers} worker x n_jobs={args.n_jobs}")
+        search_started = time.perf_counter()
+        results = successive_halving(
+            work_dir, work_dir, args.depths, args.min_trees, args.max_trees, args.factor,
+            args.workers, args.n_jobs, args.budget, args.seed
+        )
+        search_seconds = time.perf_counter() - search_started
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    floor, chosen = select_candidate(results, args.accuracy_floor)
+    if chosen is None:
+        print(f"❌ Doğruluk tabanını ({floor}) geçen aday yok, model yazılmadı")
+        return 1
+    print(f"\n🏁 Seçilen: derinlik {chosen['max_depth']}, {chosen['n_trees']} ağaç "
+          f"(doğrulama {chosen['accuracy']:.4f} >= taban {floor:.4f}, tahmin {chosen['latency_ms']:.2f} ms)")
+
+    # Seçilen ayarla tüm eğitim verisi üzerinde son model
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    model = RandomForestClassifier(
+        n_estimators=chosen["n_trees"],
+        max_depth=chosen["max_depth"],
+        random_state=args.seed,
+        n_jobs=args.n_jobs,
+        **FOREST_PARAMS
+    )
+    fit_started = time.perf_counter()
+    model.fit(X_train_scaled, y_train)
+    fit_seconds = time.perf_counter() - fit_started
+    y_pred = model.predict(X_test_scaled)
+    accuracy = accuracy_score(y_test, y_pred)
+    print(f"🎯 Test doğruluğu: {accuracy:.4f} (eğitim {fit_seconds:.1f} sn)")
+    print(classification_report(y_test, y_pred, target_names=["Az", "Orta", "Yoğun"][:len(thresholds) + 1]))
+
+    nodes, size = forest_size(model)
+    report = {
+        "files": [os.path.basename(path) for path in args.files],
+        "thresholds": list(thresholds),
+        "rows": {"train": len(X_train), "test": len(X_test)},
+        "search": {
+            "depths": args.depths,
+            "min_trees": args.min_trees,
+            "max_trees": args.max_trees,
+            "factor": args.factor,
+            "budget": args.budget,
+            "workers": args.workers,
+            "n_jobs": args.n_jobs,
+            "seconds": round(search_seconds, 1),
+            "accuracy_floor": floor,
+            "candidates": [{k: v for k, v in r.items() if k != "model_path"} for r in results]
+        },
+        "model": {
+            "max_depth": chosen["max_depth"],
+            "n_estimators": chosen["n_trees"],
+            "params": FOREST_PARAMS,
+            "test_accuracy": accuracy,
+            "fit_seconds": round(fit_seconds, 1),
+            "node_count": nodes,
+            "model_mb": round(size / 1e6, 2)
+        },
+        "peak_memory_mb": round(peak_memory_mb(), 1),
+        "total_seconds": round(time.perf_counter() - run_started, 1)
+    }
+    version = write_version(args.output_dir, model, scaler, report)
+    print(f"✅ Model yazıldı: {os.path.join(args.output_dir, version)} "
+          f"(toplam {report['total_seconds']:.0f} sn, en yüksek bellek {report['peak_memory_mb']:.0f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
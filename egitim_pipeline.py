@@ -0,0 +1,327 @@
+# İBB trafik CSV'leri için parça parça (streaming) veri alma aşaması
+#
+# Aylık ibb_traffic_YYYY_MM.csv dosyaları tek seferde okunmaz: her dosya
+# CHUNK_SIZE satırlık parçalar halinde, sabit ve küçük veri tipleriyle okunur,
+# zaman özellikleri parça başına bir kez türetilir ve her sütun ay başına bir
+# .npy dosyasına eklenir. Sonraki çalıştırmalar CSV'yi tekrar ayrıştırmadan
+# önbelleği np.load(mmap_mode="r") ile açar. Bellek kullanımı veri setinin
+# değil parça boyutunun fonksiyonudur.
+#
+#   egitim_cache/2024_11/
+#       meta.json            kaynak dosya imzası, satır sayısı, sütun tipleri
+#       DATE_TIME.npy, LATITUDE.npy, ..., hour.npy, month.npy
+#       GEOHASH.npy          geohash_vocab.json'daki indeksler (kategorik)
+#
+# Kullanım:
+#   python egitim_pipeline.py ibb_traffic_2024_11.csv ibb_traffic_2024_12.csv
+
+import argparse
+import json
+import os
+import re
+import resource
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = "egitim_cache"
+CHUNK_SIZE = 500_000
+CACHE_FORMAT_VERSION = 1
+
+# CSV'de okunan sütunlar ve okuma tipleri
+CSV_DTYPES = {
+    "DATE_TIME": "object",
+    "LATITUDE": "float32",
+    "LONGITUDE": "float32",
+    "GEOHASH": "object",
+    "MINIMUM_SPEED": "float32",
+    "MAXIMUM_SPEED": "float32",
+    "AVERAGE_SPEED": "float32",
+    "NUMBER_OF_VEHICLES": "float32",  # NaN olabileceği için önce float32, temizlikten sonra int16
+}
+NUMERIC_COLUMNS = [
+    "LATITUDE", "LONGITUDE", "MINIMUM_SPEED", "MAXIMUM_SPEED",
+    "AVERAGE_SPEED", "NUMBER_OF_VEHICLES"
+]
+
+# Önbellekteki sütunlar ve tipleri
+CACHE_DTYPES = {
+    "DATE_TIME": "datetime64[ns]",
+    "LATITUDE": "float32",
+    "LONGITUDE": "float32",
+    "GEOHASH": "int32",
+    "MINIMUM_SPEED": "float32",
+    "MAXIMUM_SPEED": "float32",
+    "AVERAGE_SPEED": "float32",
+    "NUMBER_OF_VEHICLES": "int16",
+    "hour": "int8",
+    "day_of_week": "int8",
+    "is_weekend": "int8",
+    "month": "int8",
+}
+
+# Ortalama hız eşikleri (km/h): <= 30 yoğun (2), <= 50 orta (1), üstü az (0)
+TRAFFIC_THRESHOLDS = (30, 50)
+BALANCE_SEED = 42
+
+# Modelin eğitimde gördüğü özellik sırası (backend/app.py FEATURE_NAMES ile aynı)
+TRAINING_FEATURES = [
+    "hour", "day_of_week", "is_weekend", "month",
+    "MINIMUM_SPEED", "MAXIMUM_SPEED", "NUMBER_OF_VEHICLES",
+    "LATITUDE", "LONGITUDE"
+]
+
+_MONTH_PATTERN = re.compile(r"(\d{4})_(\d{2})")
+
+
+def peak_memory_mb():
+    """Process'in şimdiye kadarki en yüksek RSS değeri (MB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def month_key(path):
+    """ibb_traffic_2024_11.csv -> '2024_11' (eşleşmezse dosya adı)"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    match = _MONTH_PATTERN.search(name)
+    return f"{match.group(1)}_{match.group(2)}" if match else name
+
+
+def _source_info(path):
+    stat = os.stat(path)
+    return {"file": os.path.basename(path), "bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE, strict=True):
+    """CSV'yi parça parça oku; strict=False iken sayısal olmayan değerler NaN olur"""
+    if strict:
+        dtypes = CSV_DTYPES
+    else:
+        # pd.to_numeric(errors="coerce") davranışı: sütunlar metin okunup dönüştürülür
+        dtypes = {column: "object" for column in CSV_DTYPES}
+    for chunk in pd.read_csv(path, usecols=list(CSV_DTYPES), dtype=dtypes, chunksize=chunk_size):
+        if not strict:
+            for column in NUMERIC_COLUMNS:
+                chunk[column] = pd.to_numeric(chunk[column], errors="coerce").astype("float32")
+        yield chunk
+
+
+def prepare_chunk(chunk, vocab):
+    """Eksik satırları at, zaman özelliklerini türet, sütunları önbellek tiplerine çevir"""
+    chunk = chunk.dropna()
+    timestamp = pd.to_datetime(chunk["DATE_TIME"])
+
+    vehicles = chunk["NUMBER_OF_VEHICLES"].to_numpy()
+    if len(vehicles) and (vehicles.max() > np.iinfo(np.int16).max or vehicles.min() < np.iinfo(np.int16).min):
+        raise ValueError("NUMBER_OF_VEHICLES int16 aralığına sığmıyor")
+
+    # GEOHASH: parçanın kategorileri ay genelindeki sözlüğe eşlenir
+    categorical = pd.Categorical(chunk["GEOHASH"])
+    mapping = np.array([vocab.setdefault(value, len(vocab)) for value in categorical.categories], dtype=np.int32)
+
+    day_of_week = timestamp.dt.dayofweek.to_numpy(dtype=np.int8)
+    columns = {
+        "DATE_TIME": timestamp.to_numpy(dtype="datetime64[ns]"),
+        "LATITUDE": chunk["LATITUDE"].to_numpy(dtype=np.float32),
+        "LONGITUDE": chunk["LONGITUDE"].to_numpy(dtype=np.float32),
+        "GEOHASH": mapping[categorical.codes] if len(mapping) else np.empty(0, dtype=np.int32),
+        "MINIMUM_SPEED": chunk["MINIMUM_SPEED"].to_numpy(dtype=np.float32),
+        "MAXIMUM_SPEED": chunk["MAXIMUM_SPEED"].to_numpy(dtype=np.float32),
+        "AVERAGE_SPEED": chunk["AVERAGE_SPEED"].to_numpy(dtype=np.float32),
+        "NUMBER_OF_VEHICLES": vehicles.astype(np.int16),
+        "hour": timestamp.dt.hour.to_numpy(dtype=np.int8),
+        "day_of_week": day_of_week,
+        "is_weekend": (day_of_week >= 5).astype(np.int8),
+        "month": timestamp.dt.month.to_numpy(dtype=np.int8),
+    }
+    return columns
+
+
+def _finalize_column(raw_path, npy_path, dtype, rows, block_rows=CHUNK_SIZE):
+    """Ham .bin dosyasını parça parça standart .npy dosyasına kopyala"""
+    target = np.lib.format.open_memmap(npy_path, mode="w+", dtype=dtype, shape=(rows,))
+    if rows:
+        source = np.memmap(raw_path, dtype=dtype, mode="r", shape=(rows,))
+        for start in range(0, rows, block_rows):
+            target[start:start + block_rows] = source[start:start + block_rows]
+        del source
+    target.flush()
+    del target
+    os.remove(raw_path)
+
+
+def _write_month(path, month_dir, chunk_size, strict):
+    tmp_dir = f"{month_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    vocab = {}
+    rows, raw_rows = 0, 0
+    files = {name: open(os.path.join(tmp_dir, f"{name}.bin"), "wb") for name in CACHE_DTYPES}
+    try:
+        for chunk in read_chunks(path, chunk_size, strict=strict):
+            raw_rows += len(chunk)
+            columns = prepare_chunk(chunk, vocab)
+            for name, values in columns.items():
+                np.ascontiguousarray(values, dtype=CACHE_DTYPES[name]).tofile(files[name])
+            rows += len(columns["hour"])
+    finally:
+        for f in files.values():
+            f.close()
+
+    for name, dtype in CACHE_DTYPES.items():
+        _finalize_column(os.path.join(tmp_dir, f"{name}.bin"), os.path.join(tmp_dir, f"{name}.npy"),
+                         dtype, rows, chunk_size)
+    with open(os.path.join(tmp_dir, "geohash_vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(sorted(vocab, key=vocab.get), f)
+
+    meta = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "source": _source_info(path),
+        "rows": rows,
+        "raw_rows": raw_rows,
+        "dtypes": CACHE_DTYPES,
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(month_dir, ignore_errors=True)
+    os.replace(tmp_dir, month_dir)
+    return meta
+
+
+def read_meta(month_dir):
+    try:
+        with open(os.path.join(month_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return meta if meta.get("format_version") == CACHE_FORMAT_VERSION else None
+
+
+def ingest_file(path, cache_dir=CACHE_DIR, chunk_size=CHUNK_SIZE, force=False):
+    """Tek bir aylık CSV'yi önbelleğe al; güncel önbellek varsa dokunma. (dizin, meta, yeni_mi)"""
+    month_dir = os.path.join(cache_dir, month_key(path))
+    meta = read_meta(month_dir)
+    if not force and meta is not None and (not os.path.exists(path) or meta["source"] == _source_info(path)):
+        return month_dir, meta, False
+
+    os.makedirs(cache_dir, exist_ok=True)
+    try:
+        meta = _write_month(path, month_dir, chunk_size, strict=True)
+    except (ValueError, TypeError):
+        # Sayısal sütunlarda bozuk değer var; eski script gibi NaN'a çevirip atla
+        meta = _write_month(path, month_dir, chunk_size, strict=False)
+    return month_dir, meta, True
+
+
+def ingest_files(paths, cache_dir=CACHE_DIR, chunk_size=CHUNK_SIZE, force=False, verbose=True):
+    """Dosyaları sırayla önbelleğe al, ay dizinlerinin listesini döndür"""
+    month_dirs = []
+    for path in paths:
+        if not os.path.exists(path) and read_meta(os.path.join(cache_dir, month_key(path))) is None:
+            if verbose:
+                print(f"❌ {path} bulunamadı")
+            continue
+        started = time.perf_counter()
+        try:
+            month_dir, meta, created = ingest_file(path, cache_dir, chunk_size, force)
+        except Exception as e:
+            if verbose:
+                print(f"❌ {path} yüklenirken hata: {str(e)}")
+            continue
+        month_dirs.append(month_dir)
+        if verbose:
+            state = "işlendi" if created else "önbellekten"
+            print(f"✅ {path} {state} - {meta['rows']:,} satır "
+                  f"({time.perf_counter() - started:.1f} sn, en yüksek bellek {peak_memory_mb():.0f} MB)")
+    return month_dirs
+
+
+def load_columns(month_dirs, columns=None, mmap_mode=None):
+    """Ay dizinlerindeki sütunları birleştirip {sütun: dizi} döndür (GEOHASH sözlükleri birleştirilir)"""
+    columns = list(columns or CACHE_DTYPES)
+    parts = {name: [] for name in columns}
+    vocab = {}
+    for month_dir in month_dirs:
+        for name in columns:
+            values = np.load(os.path.join(month_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+            if name == "GEOHASH":
+                with open(os.path.join(month_dir, "geohash_vocab.json"), encoding="utf-8") as f:
+                    month_vocab = json.load(f)
+                mapping = np.array([vocab.setdefault(value, len(vocab)) for value in month_vocab], dtype=np.int32)
+                values = mapping[values] if len(mapping) else values
+            parts[name].append(values)
+
+    result = {
+        name: (np.concatenate(arrays) if len(arrays) > 1 else np.asarray(arrays[0]))
+        if arrays else np.empty(0, dtype=CACHE_DTYPES[name])
+        for name, arrays in parts.items()
+    }
+    if "GEOHASH" in result:
+        result["GEOHASH_VOCAB"] = np.array(sorted(vocab, key=vocab.get), dtype=object)
+    return result
+
+
+def load_frame(month_dirs, columns=None):
+    """Önbelleği eğitim script'inin beklediği sütun adlarıyla DataFrame olarak yükle"""
+    data = load_columns(month_dirs, columns)
+    vocab = data.pop("GEOHASH_VOCAB", None)
+    if vocab is not None:
+        data["GEOHASH"] = pd.Categorical.from_codes(data["GEOHASH"], categories=vocab)
+    return pd.DataFrame(data, copy=False)
+
+
+def label_traffic(speeds, thresholds=TRAFFIC_THRESHOLDS):
+    """Ortalama hızları tek bir np.digitize ile trafik seviyesine çevir (yavaş = yüksek seviye)"""
+    # right=True: eşiğe eşit hız alt aralığa düşer (eski "avg_speed <= 30" ile aynı)
+    bins = np.digitize(np.asarray(speeds), np.asarray(thresholds), right=True)
+    return (len(thresholds) - bins).astype(np.int8)
+
+
+def balanced_indices(labels, seed=BALANCE_SEED, classes=None):
+    """Her sınıftan en küçük sınıf kadar satır seçip karıştırılmış satır numaralarını döndür
+
+    Eski df_k.sample(n, random_state=seed) + concat + sample(frac=1, random_state=seed)
+    zinciriyle aynı sırayı verir: pandas sample() RandomState(seed).choice kullanır.
+    classes verilirse veride hiç olmayan bir sınıf n'yi sıfırlar (eski davranış).
+    """
+    labels = np.asarray(labels)
+    if classes is None:
+        classes = np.unique(labels)
+    positions = [np.flatnonzero(labels == level) for level in classes]
+    n = min((len(p) for p in positions), default=0)
+
+    picked = [
+        p[np.random.RandomState(seed).choice(len(p), size=n, replace=False)]
+        for p in positions
+    ]
+    order = np.concatenate(picked) if picked else np.empty(0, dtype=np.intp)
+    return order[np.random.RandomState(seed).choice(len(order), size=len(order), replace=False)]
+
+
+def take_rows(df, columns, order):
+    """Seçilen sütunları verilen satır numaralarıyla (sütun başına tek kopya) al"""
+    return pd.DataFrame({column: df[column].to_numpy()[order] for column in columns}, copy=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="İBB trafik CSV'lerini parça parça önbelleğe al")
+    parser.add_argument("files", nargs="+", help="ibb_traffic_YYYY_MM.csv dosyaları")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--force", action="store_true", help="Önbellek güncel olsa da yeniden işle")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    month_dirs = ingest_files(args.files, args.cache_dir, args.chunk_size, args.force)
+    rows = sum(read_meta(month_dir)["rows"] for month_dir in month_dirs)
+    print(f"\n📊 {len(month_dirs)} ay, {rows:,} satır ({time.perf_counter() - started:.1f} sn, "
+          f"en yüksek bellek {peak_memory_mb():.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# egitim_cli.py artımlı mod: sentetik iki aylık veri ile birleşik orman ve sıfırdan eğitim
+#
+#   python -m pytest test_egitim_cli.py
+
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+
+import egitim_cli
+import egitim_pipeline
+
+MONTHS = ("2024_11", "2024_12")
+ROWS_PER_MONTH = 10000
+TREES_PER_MONTH = 10
+MAX_DEPTH = 8
+
+# Birleşik alt ormanların sıfırdan eğitime göre en fazla bu kadar geride kalması kabul edilir
+ACCURACY_TOLERANCE = 0.02
+
+
+def write_month_csv(path, key, seed):
+    """Ortalama hızı saat ve min/max hıza bağlı, ibb_traffic_YYYY_MM.csv biçiminde sentetik ay"""
+    rng = np.random.default_rng(seed)
+    year, month = map(int, key.split("_"))
+    start = pd.Timestamp(year=year, month=month, day=1)
+    timestamps = start + pd.to_timedelta(rng.integers(0, 28 * 24 * 60, ROWS_PER_MONTH), unit="min")
+    rush = np.isin(timestamps.hour, (7, 8, 17, 18))
+    minimum = rng.uniform(5, 40, ROWS_PER_MONTH) - 10 * rush
+    maximum = minimum + rng.uniform(10, 50, ROWS_PER_MONTH)
+    average = (minimum + maximum) / 2 + rng.normal(0, 2, ROWS_PER_MONTH)
+    pd.DataFrame({
+        "DATE_TIME": timestamps.strftime("%Y-%m-%d %H:%M:%S"),
+        "LATITUDE": rng.uniform(40.9, 41.2, ROWS_PER_MONTH).round(5),
+        "LONGITUDE": rng.uniform(28.7, 29.3, ROWS_PER_MONTH).round(5),
+        "GEOHASH": rng.choice(["sxk9", "sxk3", "sxkd", "sxk6"], ROWS_PER_MONTH),
+        "MINIMUM_SPEED": minimum.clip(1).round(),
+        "MAXIMUM_SPEED": maximum.round(),
+        "AVERAGE_SPEED": average.clip(1).round(),
+        "NUMBER_OF_VEHICLES": rng.integers(1, 200, ROWS_PER_MONTH),
+    }).to_csv(path, index=False)
+
+
+def run(tmp_path, files):
+    """Artımlı modu --compare-full ile çalıştır, yayınlanan sürümün raporunu döndür"""
+    output_dir = tmp_path / "models"
+    assert egitim_cli.main([
+        *map(str, files), "--incremental", "--compare-full",
+        "--cache-dir", str(tmp_path / "cache"), "--output-dir", str(output_dir),
+        "--trees-per-month", str(TREES_PER_MONTH), "--max-depth", str(MAX_DEPTH), "--n-jobs", "1",
+    ]) == 0
+    version = (output_dir / "LATEST").read_text(encoding="utf-8").strip()
+    with open(output_dir / version / "training_report.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def csv_files(tmp_path):
+    files = []
+    for i, key in enumerate(MONTHS):
+        path = tmp_path / f"ibb_traffic_{key}.csv"
+        write_month_csv(path, key, seed=i)
+        files.append(path)
+    return files
+
+
+def test_merged_forest_matches_full_fit(tmp_path, csv_files):
+    thresholds = egitim_pipeline.TRAFFIC_THRESHOLDS
+    month_dirs = egitim_pipeline.ingest_files(csv_files, tmp_path / "cache", verbose=False)
+    forests = []
+    for month_dir in month_dirs:
+        store_dir = os.path.join(tmp_path, "months", os.path.basename(month_dir))
+        meta = egitim_cli.train_month(month_dir, store_dir, thresholds, MAX_DEPTH, TREES_PER_MONTH, 1,
+                                      egitim_cli.RANDOM_STATE)
+        assert meta["params"]["n_trees"] == TREES_PER_MONTH
+        forests.append(joblib.load(os.path.join(store_dir, "forest.pkl")))
+    merged = egitim_cli.merge_forests(forests)
+    assert merged.n_estimators == TREES_PER_MONTH * len(MONTHS)
+
+    # run_incremental --compare-full ile aynı ayrımlar: ay başına eğitim/test, testler birleşik
+    splits = [egitim_cli.month_training_split(month_dir, thresholds, egitim_cli.RANDOM_STATE)
+              for month_dir in month_dirs]
+    X_train = np.concatenate([split[0] for split in splits])
+    X_test = np.concatenate([split[1] for split in splits])
+    y_train = np.concatenate([split[2] for split in splits])
+    y_test = np.concatenate([split[3] for split in splits])
+    full = RandomForestClassifier(n_estimators=merged.n_estimators, max_depth=MAX_DEPTH,
+                                  random_state=egitim_cli.RANDOM_STATE, n_jobs=1,
+                                  **egitim_cli.FOREST_PARAMS).fit(X_train, y_train)
+
+    merged_accuracy = accuracy_score(y_test, merged.predict(X_test))
+    full_accuracy = accuracy_score(y_test, full.predict(X_test))
+    assert full_accuracy > 0.8  # Sentetik veri öğrenilebilir olmalı, yoksa karşılaştırma anlamsız
+    assert merged_accuracy >= full_accuracy - ACCURACY_TOLERANCE
+
+
+def test_incremental_run_retrains_only_new_month(tmp_path, csv_files):
+    first = run(tmp_path, csv_files[:1])
+    assert first["trained_months"] == [MONTHS[0]]
+    assert first["reused_months"] == []
+
+    second = run(tmp_path, csv_files)
+    assert second["months"] == list(MONTHS)
+    assert second["trained_months"] == [MONTHS[1]]
+    assert second["reused_months"] == [MONTHS[0]]
+    assert second["model"]["n_estimators"] == TREES_PER_MONTH * len(MONTHS)
+    assert second["model"]["test_accuracy"] >= second["full_retrain"]["test_accuracy"] - ACCURACY_TOLERANCE
@@ -28,6 +28,17 @@ function App() {
       }
     }
     setLoading(false);
+
+    // Yenileme token'ı da geçersizse (api.js) oturumu kapat
+    const handleSessionExpired = () => {
+      localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
+      localStorage.removeItem('user');
+      setUser(null);
+      setIsAuthenticated(false);
+    };
+    window.addEventListener('session-expired', handleSessionExpired);
+    return () => window.removeEventListener('session-expired', handleSessionExpired);
   }, []);
 
   const handleLogin = (userData) => {
@@ -36,7 +47,20 @@ function App() {
   };
 
   const handleLogout = () => {
+    // Token'ları sunucuda da iptal et (sonucu beklenmez)
+    const token = localStorage.getItem('token');
+    if (token) {
+      fetch('http://localhost:5050/logout', {
+        method: 'POST',
+        headers: {
+          'Authorization': `Bearer ${token}`,
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ refresh_token: localStorage.getItem('refresh_token') }),
+      }).catch(() => {});
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     localStorage.removeItem('user');
     setUser(null);
     setIsAuthenticated(false);
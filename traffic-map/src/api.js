@@ -0,0 +1,52 @@
+// Kimlik doğrulamalı istekler
+//
+// Erişim token'ları kısa ömürlüdür. Sunucu 401 döndüğünde yenileme token'ıyla
+// yeni bir token çifti alınır ve istek bir kez tekrarlanır; yenileme de
+// başarısız olursa oturum kapanır (App 'session-expired' olayını dinler).
+const API_URL = 'http://localhost:5050';
+
+// Yenileme token'ı tek kullanımlıktır: aynı anda 401 alan istekler tek yenilemeyi bekler
+let refreshing = null;
+
+function refreshTokens() {
+  if (!refreshing) {
+    refreshing = fetch(`${API_URL}/token/refresh`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ refresh_token: localStorage.getItem('refresh_token') }),
+    })
+      .then(async (response) => {
+        if (!response.ok) {
+          return false;
+        }
+        const data = await response.json();
+        localStorage.setItem('token', data.token);
+        localStorage.setItem('refresh_token', data.refresh_token);
+        return true;
+      })
+      .catch(() => false)
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+}
+
+export async function authFetch(url, options = {}) {
+  const send = () => fetch(url, {
+    ...options,
+    headers: {
+      ...options.headers,
+      'Authorization': `Bearer ${localStorage.getItem('token')}`,
+    },
+  });
+
+  let response = await send();
+  if (response.status === 401 && localStorage.getItem('refresh_token') && await refreshTokens()) {
+    response = await send();
+  }
+  if (response.status === 401) {
+    window.dispatchEvent(new Event('session-expired'));
+  }
+  return response;
+}
@@ -33,6 +33,7 @@ function Login({ onLogin }) {
       if (response.ok) {
         // Token'i localStorage'a kaydet
         localStorage.setItem('token', data.token);
+        localStorage.setItem('refresh_token', data.refresh_token);
         localStorage.setItem('user', JSON.stringify(data.user));
         
         console.log('Login successful, calling onLogin with:', data.user);
@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { authFetch } from '../api';
 
 function FavoritesPage() {
   const [favorites, setFavorites] = useState([]);
@@ -18,10 +19,9 @@ function FavoritesPage() {
         return;
       }
 
-      const response = await fetch('http://localhost:5050/favorites', {
+      const response = await authFetch('http://localhost:5050/favorites', {
         method: 'GET',
         headers: {
-          'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
         },
       });
@@ -43,12 +43,8 @@ function FavoritesPage() {
 
   const removeFavorite = async (favoriteId) => {
     try {
-      const token = localStorage.getItem('token');
-      const response = await fetch(`http://localhost:5050/favorites/${favoriteId}`, {
+      const response = await authFetch(`http://localhost:5050/favorites/${favoriteId}`, {
         method: 'DELETE',
-        headers: {
-          'Authorization': `Bearer ${token}`,
-        },
       });
 
       if (response.ok) {
@@ -65,11 +61,9 @@ function FavoritesPage() {
 
   const predictTraffic = async (favorite) => {
     try {
-      const token = localStorage.getItem('token');
-      const response = await fetch('http://localhost:5050/predict', {
+      const response = await authFetch('http://localhost:5050/predict', {
         method: 'POST',
         headers: {
-          'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
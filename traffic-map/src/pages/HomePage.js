@@ -5,6 +5,7 @@ import axios from "axios";
 import DatePicker from "react-datepicker";
 import "react-datepicker/dist/react-datepicker.css";
 import { useNavigate } from "react-router-dom";
+import { authFetch } from "../api";
 
 const center = { lat: 41.0082, lng: 28.9784 };
 
@@ -107,20 +108,20 @@ const HomePage = () => {
               
               console.log("Gönderilecek veri:", searchData);
               
-              const searchResponse = await axios.post("http://localhost:5050/search-history", searchData, {
+              const searchResponse = await authFetch("http://localhost:5050/search-history", {
+                method: "POST",
                 headers: {
-                  "Content-Type": "application/json",
-                  "Authorization": `Bearer ${token}`
-                }
+                  "Content-Type": "application/json"
+                },
+                body: JSON.stringify(searchData)
               });
               
-              console.log("Arama geçmişe kaydedildi:", searchResponse.data);
+              console.log("Arama geçmişe kaydedildi:", await searchResponse.json());
             } else {
               console.error("Token bulunamadı!");
             }
           } catch (error) {
             console.error("Arama geçmişe kaydedilemedi:", error);
-            console.error("Hata detayı:", error.response?.data);
           }
         } else {
           alert("Rota bulunamadı.");
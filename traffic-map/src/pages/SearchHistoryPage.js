@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { authFetch } from '../api';
 
 function SearchHistoryPage() {
   const [searchHistory, setSearchHistory] = useState([]);
@@ -18,10 +19,9 @@ function SearchHistoryPage() {
         return;
       }
 
-      const response = await fetch('http://localhost:5050/search-history', {
+      const response = await authFetch('http://localhost:5050/search-history', {
         method: 'GET',
         headers: {
-          'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
         },
       });
@@ -43,11 +43,9 @@ function SearchHistoryPage() {
 
   const addToFavorites = async (searchItem) => {
     try {
-      const token = localStorage.getItem('token');
-      const response = await fetch('http://localhost:5050/favorites', {
+      const response = await authFetch('http://localhost:5050/favorites', {
         method: 'POST',
         headers: {
-          'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
@@ -71,11 +69,9 @@ function SearchHistoryPage() {
 
   const repeatSearch = async (searchItem) => {
     try {
-      const token = localStorage.getItem('token');
-      const response = await fetch('http://localhost:5050/predict', {
+      const response = await authFetch('http://localhost:5050/predict', {
         method: 'POST',
         headers: {
-          'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
@@ -89,10 +85,9 @@ function SearchHistoryPage() {
 
       if (response.ok) {
         // Yeni aramayı geçmişe ekle
-        await fetch('http://localhost:5050/search-history', {
+        await authFetch('http://localhost:5050/search-history', {
           method: 'POST',
           headers: {
-            'Authorization': `Bearer ${token}`,
             'Content-Type': 'application/json',
           },
           body: JSON.stringify({